@@ -0,0 +1,156 @@
+"""Нагрузочный тест движка опроса на локальных заглушках.
+
+Заглушки API Практикума и Telegram работают в отдельных процессах, поэтому
+процессорное время и память в отчете относятся только к движку.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_engine --tenants 1000 --duration 30
+
+С --replay ответы API берутся из записи реального трафика (API_RECORD,
+см. recording.py) вместо заглушки Практикума:
+    python -m benchmarks.bench_engine --replay api.jsonl.gz --replay-speed max
+"""
+import argparse
+import asyncio
+import logging
+import resource
+import time
+
+from telebot import TeleBot, apihelper
+
+import cadence
+import engine
+import homework
+import http_client
+import ratelimit
+import recording
+import send_queue
+from benchmarks.stub_servers import (PracticumHandler, StubConfig,
+                                     TelegramHandler, start_stub_process)
+
+REPORT = ('tenants={tenants} polls={polls} polls/s={rate:.1f} '
+          'p50={p50:.1f}ms p99={p99:.1f}ms cpu={cpu:.2f}s '
+          'cpu/poll={cpu_per_poll:.3f}ms rss={rss:.1f}MB')
+
+
+def percentile(values, fraction):
+    """Возвращает перцентиль списка значений."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def cpu_seconds():
+    """Возвращает процессорное время процесса (user + system)."""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def build_engine(args, bot, session=None):
+    """Собирает движок, опрашивающий всех пользователей раз в period."""
+    tenants = [engine.Tenant(f'token{number}', str(number), timestamp=0)
+               for number in range(args.tenants)]
+    period = args.period
+    polling_engine = engine.PollingEngine(
+        tenants, bot, period=period, concurrency=args.concurrency,
+        session=session or http_client.create_session(
+            pool_size=args.concurrency),
+        jitter=0,
+        policy=cadence.CadencePolicy(
+            active=period, default=period, idle=period, dormant=period),
+        limiter=ratelimit.TokenBucket(rate=1e9))
+    polling_engine.send_queue = send_queue.SendQueue(
+        bot, workers=args.send_workers, global_rate=1e9, chat_rate=1e9,
+        executor=polling_engine.executor)
+    return polling_engine
+
+
+def instrument(polling_engine, latencies):
+    """Оборачивает poll движка, записывая длительность каждого опроса."""
+    poll = polling_engine.poll
+
+    async def timed_poll(tenant):
+        start = time.perf_counter()
+        try:
+            await poll(tenant)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    polling_engine.poll = timed_poll
+
+
+async def drive(polling_engine, duration):
+    """Запускает движок на duration секунд."""
+    task = asyncio.create_task(polling_engine.run())
+    await asyncio.sleep(duration)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+def run(args):
+    """Выполняет один прогон и возвращает отчет."""
+    practicum = session = None
+    if args.replay:
+        session = recording.ReplaySession(
+            args.replay, recording.parse_speed(args.replay_speed))
+    else:
+        practicum, practicum_url = start_stub_process(
+            PracticumHandler, StubConfig(
+                latency=args.api_latency, error_rate=args.api_error_rate,
+                homeworks=args.homeworks, payload_size=args.payload_size,
+                changing=not args.static))
+        homework.ENDPOINT = (
+            practicum_url + '/api/user_api/homework_statuses/')
+    telegram, telegram_url = start_stub_process(
+        TelegramHandler, StubConfig(
+            latency=args.telegram_latency,
+            error_rate=args.telegram_error_rate))
+    apihelper.API_URL = telegram_url + '/bot{0}/{1}'
+    bot = TeleBot(token='1234:benchmark')
+    polling_engine = build_engine(args, bot, session)
+    latencies = []
+    instrument(polling_engine, latencies)
+    cpu_before = cpu_seconds()
+    asyncio.run(drive(polling_engine, args.duration))
+    cpu = cpu_seconds() - cpu_before
+    if practicum:
+        practicum.terminate()
+    telegram.terminate()
+    polls = len(latencies)
+    return REPORT.format(
+        tenants=args.tenants, polls=polls, rate=polls / args.duration,
+        p50=percentile(latencies, 0.5) * 1000,
+        p99=percentile(latencies, 0.99) * 1000,
+        cpu=cpu, cpu_per_poll=cpu / polls * 1000 if polls else 0.0,
+        rss=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+
+def parse_args(argv=None):
+    """Разбирает аргументы командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--period', type=float, default=5,
+                        help='интервал опроса одного пользователя, с')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--send-workers', type=int, default=8)
+    parser.add_argument('--homeworks', type=int, default=1)
+    parser.add_argument('--payload-size', type=int, default=0)
+    parser.add_argument('--static', action='store_true',
+                        help='одинаковые ответы API (проверка кеша '
+                             'отпечатков)')
+    parser.add_argument('--api-latency', type=float, default=0.0)
+    parser.add_argument('--api-error-rate', type=float, default=0.0)
+    parser.add_argument('--telegram-latency', type=float, default=0.0)
+    parser.add_argument('--telegram-error-rate', type=float, default=0.0)
+    parser.add_argument('--replay', metavar='PATH',
+                        help='воспроизводить записанные ответы API')
+    parser.add_argument('--replay-speed', default='max',
+                        help='скорость воспроизведения: 1, N или max')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.CRITICAL)
+    print(run(parse_args()))
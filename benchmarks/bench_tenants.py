@@ -0,0 +1,118 @@
+"""Память на пользователя движка опроса.
+
+Сравнивает состояние пользователей в трех видах: словарь на пользователя
+(наивный вариант main() для многих пользователей), объекты Tenant со
+__slots__ и TenantTable со сроками опроса в IndexedTimingWheel. В каждом
+случае учитываются сами пользователи, индекс chat_id и запланированные
+сроки опроса; память считается через tracemalloc.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_tenants --tenants 100000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+import engine
+import homework
+import scheduler
+import tenant_table
+
+TARGET_BYTES = 1024
+REPORT = '{layout:<8} tenants={tenants} bytes/tenant={per_tenant:.0f}{mark}'
+TOKEN_LENGTH = 58
+
+
+def make_rows(count):
+    """Возвращает строки пользователей: токен, chat_id, метка."""
+    alphabet = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+    now = int(time.time())
+    return [(''.join(random.choices(alphabet, k=TOKEN_LENGTH)),
+             str(random.randrange(10 ** 8, 10 ** 10)), now)
+            for _ in range(count)]
+
+
+def build_dicts(rows):
+    """Словарь на пользователя и сроки в TimingWheel."""
+    tenants = [{'token': token, 'chat_id': chat_id, 'timestamp': timestamp,
+                'last_message': None,
+                'headers': homework.make_headers(token),
+                'last_statuses': {}}
+               for token, chat_id, timestamp in rows]
+    chats = {tenant['chat_id']: tenant for tenant in tenants}
+    wheel = scheduler.TimingWheel(0)
+    wheel.spread(range(len(tenants)), 0, homework.RETRY_PERIOD, 5)
+    return tenants, chats, wheel
+
+
+def build_objects(rows):
+    """Объекты Tenant и сроки в TimingWheel."""
+    tenants = [engine.Tenant(*row) for row in rows]
+    chats = {tenant.chat_id: tenant for tenant in tenants}
+    wheel = scheduler.TimingWheel(0)
+    wheel.spread(range(len(tenants)), 0, homework.RETRY_PERIOD, 5)
+    return tenants, chats, wheel
+
+
+def build_table(rows):
+    """Таблица TenantTable и сроки в IndexedTimingWheel, как в движке."""
+    tenants = tenant_table.TenantTable()
+    for row in rows:
+        tenants.append(*row)
+    chats = {chat_id: index
+             for index, chat_id in enumerate(tenants.chat_ids)}
+    wheel = scheduler.IndexedTimingWheel(0, len(tenants))
+    wheel.spread(range(len(tenants)), 0, homework.RETRY_PERIOD, 5)
+    return tenants, chats, wheel
+
+
+LAYOUTS = {'dict': build_dicts, 'slots': build_objects, 'table': build_table}
+
+
+def measure(build, count, seed):
+    """Возвращает память, которую занимает состояние count пользователей.
+    Учитываются и строки токенов и chat_id, которые состояние удерживает;
+    временные строки ввода освобождаются до замера.
+    """
+    random.seed(seed)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    rows = make_rows(count)
+    state = build(rows)
+    del rows
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del state
+    return used
+
+
+def run(args):
+    """Измеряет все варианты и возвращает строки отчета."""
+    lines = []
+    for layout in args.layouts:
+        per_tenant = measure(
+            LAYOUTS[layout], args.tenants, args.seed) / args.tenants
+        mark = ''
+        if layout == 'table':
+            mark = (' (цель < {target}: {verdict})'.format(
+                target=TARGET_BYTES,
+                verdict='да' if per_tenant < TARGET_BYTES else 'нет'))
+        lines.append(REPORT.format(
+            layout=layout, tenants=args.tenants, per_tenant=per_tenant,
+            mark=mark))
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    """Разбирает аргументы командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=100000)
+    parser.add_argument('--layouts', nargs='+', choices=list(LAYOUTS),
+                        default=list(LAYOUTS))
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    print(run(parse_args()))
@@ -0,0 +1,132 @@
+import json
+import multiprocessing
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+STATUSES = ('approved', 'reviewing', 'rejected')
+
+
+class StubConfig:
+    """Параметры поведения заглушки."""
+
+    def __init__(self, latency=0.0, error_rate=0.0, homeworks=1,
+                 payload_size=0, changing=True):
+        """Задает задержку ответа, долю ответов 500 и размер ответа.
+        Args:
+            latency (float): задержка ответа в секундах;
+            error_rate (float): доля ответов с кодом 500;
+            homeworks (int): число работ в ответе API Практикума;
+            payload_size (int): длина reviewer_comment каждой работы;
+            changing (bool): менять ли статусы от ответа к ответу;
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.homeworks = homeworks
+        self.payload_size = payload_size
+        self.changing = changing
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Общая часть обработчиков заглушек."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    config = StubConfig()
+
+    def reply(self, status, payload):
+        """Отправляет JSON-ответ с учетом задержки и доли ошибок."""
+        if self.config.latency:
+            time.sleep(self.config.latency)
+        if random.random() < self.config.error_rate:
+            status, payload = 500, {'error': 'stub failure'}
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Не пишет в лог каждый запрос."""
+
+
+class PracticumHandler(StubHandler):
+    """Заглушка ENDPOINT API Практикума."""
+
+    def homework(self, number, now):
+        """Возвращает одну работу ответа."""
+        status = (random.choice(STATUSES) if self.config.changing
+                  else STATUSES[0])
+        return {
+            'id': number,
+            'homework_name': f'hw{number}.zip',
+            'status': status,
+            'reviewer_comment': 'x' * self.config.payload_size,
+            'date_updated': time.strftime(
+                '%Y-%m-%dT%H:%M:%SZ', time.gmtime(now)),
+            'lesson_name': 'Stub',
+        }
+
+    def do_GET(self):
+        """Отвечает списком работ в формате API Практикума."""
+        query = parse_qs(urlparse(self.path).query)
+        if 'from_date' not in query:
+            self.reply(400, {'code': 'UnknownError'})
+            return
+        now = int(time.time())
+        self.reply(200, {
+            'homeworks': [self.homework(number, now)
+                          for number in range(self.config.homeworks)],
+            'current_date': now,
+        })
+
+
+class TelegramHandler(StubHandler):
+    """Заглушка Telegram Bot API: принимает sendMessage."""
+
+    def do_POST(self):
+        """Отвечает успешной отправкой сообщения."""
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.reply(200, {'ok': True, 'result': {
+            'message_id': 1,
+            'date': int(time.time()),
+            'chat': {'id': 1, 'type': 'private'},
+            'text': '',
+        }})
+
+    do_GET = do_POST
+
+
+def start_stub(handler, config, host='127.0.0.1'):
+    """Запускает заглушку на свободном порту в фоновом потоке.
+    Returns:
+        tuple: сервер и его базовый URL.
+    """
+    handler = type(handler.__name__, (handler,), {'config': config})
+    server = ThreadingHTTPServer((host, 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, 'http://{}:{}'.format(*server.server_address)
+
+
+def _serve(handler, config, connection):
+    server, url = start_stub(handler, config)
+    connection.send(url)
+    threading.Event().wait()
+
+
+def start_stub_process(handler, config):
+    """Запускает заглушку в отдельном процессе.
+    Так процессорное время и память заглушки не попадают в замеры
+    процесса с движком.
+    Returns:
+        tuple: процесс и базовый URL заглушки.
+    """
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(
+        target=_serve, args=(handler, config, child), daemon=True)
+    process.start()
+    return process, parent.recv()
@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+
+import settings
+
+CADENCE_ACTIVE = 120
+CADENCE_DEFAULT = 600
+CADENCE_IDLE = 3600
+CADENCE_DORMANT = 6 * 3600
+DORMANT_AFTER = 7 * 24 * 3600
+MAX_REQUESTS_PER_SECOND = settings.env_float('MAX_REQUESTS_PER_SECOND', 20.0)
+
+DATE_UPDATED_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def parse_date_updated(date_updated):
+    """Переводит поле date_updated ответа API в Unix-время.
+    Args:
+        date_updated (str): дата в формате 2021-04-11T10:31:09Z;
+    Returns:
+        float: Unix-время или None, если дату разобрать не удалось.
+    """
+    try:
+        return datetime.strptime(date_updated, DATE_UPDATED_FORMAT).replace(
+            tzinfo=timezone.utc).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class CadencePolicy:
+    """Выбирает интервал до следующего опроса по последнему статусу работы.
+    Работу на проверке (reviewing) опрашиваем часто - скоро придет
+    вердикт. После замечаний (rejected) студент вот-вот пришлет новую
+    версию, поэтому интервал обычный. Принятую работу и работы, которые
+    давно не менялись, опрашиваем редко: ничего нового там не ожидается.
+    """
+
+    def __init__(self, active=CADENCE_ACTIVE, default=CADENCE_DEFAULT,
+                 idle=CADENCE_IDLE, dormant=CADENCE_DORMANT,
+                 dormant_after=DORMANT_AFTER):
+        """Задает интервалы опроса в секундах."""
+        self.active = active
+        self.default = default
+        self.idle = idle
+        self.dormant = dormant
+        self.dormant_after = dormant_after
+
+    def interval(self, status, updated_at, now):
+        """Возвращает интервал до следующего опроса.
+        Args:
+            status (str): последний статус работы или None;
+            updated_at (float): Unix-время последнего изменения или None;
+            now (float): текущее Unix-время;
+        Returns:
+            float: интервал в секундах.
+        """
+        if status == 'reviewing':
+            return self.active
+        if updated_at is not None and now - updated_at > self.dormant_after:
+            return self.dormant
+        if status == 'approved':
+            return self.idle
+        return self.default
@@ -0,0 +1,152 @@
+import asyncio
+import collections
+import random
+import time
+from http import HTTPStatus
+
+import exceptions
+import settings
+
+BREAKER_WINDOW = 60
+BREAKER_ERROR_RATE = settings.env_float('BREAKER_ERROR_RATE', 0.5)
+BREAKER_MIN_REQUESTS = settings.env_int('BREAKER_MIN_REQUESTS', 20)
+BREAKER_OPEN_TIMEOUT = settings.env_float('BREAKER_OPEN_TIMEOUT', 30.0)
+BREAKER_HALF_OPEN_PROBES = 1
+FETCH_RETRIES = 2
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 5.0
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+CIRCUIT_OPEN = ('API Практикума недоступен, запросы приостановлены '
+                'на {seconds:.0f} с.')
+
+
+def is_transient(error):
+    """Проверяет, что ошибка говорит о сбое API, а не о самом запросе.
+    Сбой соединения и ответы 5xx временные: их стоит повторить, и они
+    учитываются автоматом. Ответы 4xx (например, неверный токен
+    пользователя) к здоровью API отношения не имеют.
+    """
+    if isinstance(error, ConnectionError):
+        return True
+    if isinstance(error, exceptions.APIIsUnavailableError):
+        return (error.status_code is None
+                or error.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR)
+    return False
+
+
+def backoff(attempt, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY):
+    """Возвращает паузу перед повтором: экспонента с полным джиттером."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Автоматический выключатель для запросов к ENDPOINT.
+    В закрытом состоянии запросы идут как обычно, а их исходы копятся по
+    секундам в окне window. Если за окно было не меньше min_requests
+    запросов и доля временных ошибок достигла error_rate, выключатель
+    размыкается: следующие open_timeout секунд запросы сразу завершаются
+    ошибкой CircuitOpenError, не трогая сеть. Затем он полуоткрыт и
+    пропускает probes пробных запросов: успех замыкает его, ошибка снова
+    размыкает. Один выключатель общий для всех пользователей движка.
+    """
+
+    def __init__(self, window=BREAKER_WINDOW, error_rate=BREAKER_ERROR_RATE,
+                 min_requests=BREAKER_MIN_REQUESTS,
+                 open_timeout=BREAKER_OPEN_TIMEOUT,
+                 probes=BREAKER_HALF_OPEN_PROBES):
+        """Создает замкнутый выключатель."""
+        self.window = window
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.open_timeout = open_timeout
+        self.probes = probes
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.buckets = collections.deque()
+
+    def _bucket(self, now):
+        second = int(now)
+        while self.buckets and self.buckets[0][0] <= second - self.window:
+            self.buckets.popleft()
+        if not self.buckets or self.buckets[-1][0] != second:
+            self.buckets.append([second, 0, 0])
+        return self.buckets[-1]
+
+    def _open(self, now):
+        self.state = OPEN
+        self.opened_at = now
+        self.probes_in_flight = 0
+        self.buckets.clear()
+
+    def before_call(self, now=None):
+        """Разрешает запрос или выбрасывает CircuitOpenError."""
+        now = time.monotonic() if now is None else now
+        if self.state == OPEN:
+            remaining = self.opened_at + self.open_timeout - now
+            if remaining > 0:
+                raise exceptions.CircuitOpenError(
+                    CIRCUIT_OPEN.format(seconds=remaining))
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self.probes_in_flight >= self.probes:
+                raise exceptions.CircuitOpenError(
+                    CIRCUIT_OPEN.format(seconds=self.open_timeout))
+            self.probes_in_flight += 1
+
+    def record(self, failed, now=None):
+        """Учитывает исход запроса, разрешенного before_call.
+        failed - True для временной ошибки, False для успеха и None для
+        ошибки, которая о здоровье API не говорит (ответ 4xx, в том числе
+        429). Такая пробная попытка не замыкает выключатель, а только
+        освобождает место следующей пробе. Пока выключатель разомкнут,
+        исходы запросов, начатых до размыкания, не учитываются.
+        """
+        now = time.monotonic() if now is None else now
+        if self.state == OPEN:
+            return
+        if self.state == HALF_OPEN:
+            if failed:
+                self._open(now)
+            elif failed is None:
+                self.probes_in_flight = max(0, self.probes_in_flight - 1)
+            else:
+                self.state = CLOSED
+                self.probes_in_flight = 0
+            return
+        bucket = self._bucket(now)
+        bucket[1] += 1
+        bucket[2] += bool(failed)
+        total = sum(bucket[1] for bucket in self.buckets)
+        failures = sum(bucket[2] for bucket in self.buckets)
+        if (total >= self.min_requests
+                and failures >= self.error_rate * total):
+            self._open(now)
+
+    async def call(self, request, retries=FETCH_RETRIES):
+        """Выполняет корутину request() через выключатель с повторами.
+        Временные ошибки повторяются до retries раз с паузой backoff;
+        остальные ошибки пробрасываются сразу.
+        Args:
+            request (callable): функция, возвращающая новую корутину;
+            retries (int): число повторов;
+        Returns:
+            результат request().
+        """
+        for attempt in range(retries + 1):
+            self.before_call()
+            try:
+                result = await request()
+            except Exception as error:
+                transient = is_transient(error)
+                self.record(failed=True if transient else None)
+                if not transient or attempt == retries:
+                    raise
+            else:
+                self.record(failed=False)
+                return result
+            await asyncio.sleep(backoff(attempt))
@@ -0,0 +1,602 @@
+import asyncio
+import concurrent.futures
+import json
+import logging
+import os
+import random
+import signal
+import threading
+import time
+
+from telebot import TeleBot
+
+import cadence
+import circuit_breaker
+import error_digest
+import exceptions
+import fingerprint
+import homework
+import http_client
+import json_decoding
+import log_config
+import metrics
+import notifiers
+import outbox
+import ratelimit
+import recording
+import scheduler
+import send_queue
+import settings
+import shutdown
+import startup
+import state_store
+import status_cache
+import status_index
+import tenant_table
+import validation
+
+TENANTS_FILE = os.getenv('TENANTS_FILE', 'tenants.jsonl')
+POLL_CONCURRENCY = settings.env_int('POLL_CONCURRENCY', 64)
+POLL_JITTER = settings.env_float('POLL_JITTER', 5.0)
+STREAM_BACKFILL_AFTER = settings.env_int('STREAM_BACKFILL_AFTER', 86400)
+
+TENANTS_LOADED = 'Загружено пользователей: {count}.'
+TENANT_LINE_INVALID = ('Некорректная строка {line_number} в файле '
+                       'пользователей {path}: {error}.')
+TENANT_ERROR = 'Пользователь {chat_id}: {message}'
+POLL_SKIPPED = 'Пользователь {chat_id}: опрос пропущен. {message}'
+ENGINE_STARTED = ('Движок запущен: {count} пользователей, '
+                  'параллельных запросов {concurrency}.')
+COMMANDS = ('status', 'list')
+STATUS_REPLY = 'Работа "{homework_name}": {verdict}'
+NO_HOMEWORKS_REPLY = 'Работ пока нет.'
+UNKNOWN_CHAT_REPLY = 'Этот чат не подписан на уведомления о работах.'
+DRAIN_TIMED_OUT = ('За {timeout} с не удалось завершить опросы и отправить '
+                   'все сообщения, остаток очереди отброшен.')
+STATUS_UNAVAILABLE_REPLY = ('Не удалось получить статус работ, '
+                            'попробуйте позже.')
+OUTBOX_FAILED = 'Ошибка отправки уведомлений outbox: {error}'
+
+
+class Tenant:
+    """Пользователь движка: токен Практикума, чат и временная метка.
+    Вместо словаря используется класс со __slots__. Движок переносит
+    пользователей в компактную TenantTable, так что Tenant нужен только
+    для создания отдельных пользователей.
+    """
+
+    __slots__ = ('token', 'chat_id', 'timestamp', 'last_message', 'headers',
+                 'last_status', 'last_updated')
+
+    def __init__(self, token, chat_id, timestamp=None):
+        """Создает пользователя; по умолчанию опрос идет с текущего момента."""
+        self.token = token
+        self.chat_id = chat_id
+        self.timestamp = (int(time.time()) if timestamp is None
+                          else int(timestamp))
+        self.last_message = None
+        self.headers = homework.make_headers(token)
+        self.last_status = None
+        self.last_updated = None
+
+
+def load_tenants(path):
+    """Читает пользователей из файла в формате JSON Lines.
+    Каждая строка - объект с ключами token, chat_id и необязательным
+    from_date. Некорректные строки логируются и пропускаются.
+    Args:
+        path (str): путь к файлу;
+    Returns:
+        TenantTable: пользователи.
+    """
+    tenants = tenant_table.TenantTable()
+    with open(path, encoding='UTF-8') as tenants_file:
+        for line_number, line in enumerate(tenants_file, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                from_date = record.get('from_date')
+                tenants.append(
+                    record['token'], str(record['chat_id']),
+                    int(time.time()) if from_date is None else from_date)
+            except (ValueError, KeyError, TypeError) as error:
+                logging.error(TENANT_LINE_INVALID.format(
+                    line_number=line_number, path=path, error=error))
+    logging.info(TENANTS_LOADED.format(count=len(tenants)))
+    return tenants
+
+
+class PollingEngine:
+    """Опрашивает API Практикума для множества пользователей.
+    Все пользователи обслуживаются одним процессом: диспетчер (dispatch)
+    кладет наступившие сроки опроса в очередь, фиксированное число
+    воркеров (worker) опрашивает пользователей (poll), а отправитель
+    (deliver_outbox) доставляет уведомления из outbox хранилища store.
+    Остановка и опрос по сигналу - request_stop и poll_now.
+    """
+
+    def __init__(self, tenants, bot, period=homework.RETRY_PERIOD,
+                 concurrency=POLL_CONCURRENCY, session=None, store=None,
+                 jitter=POLL_JITTER, policy=None, limiter=None,
+                 commands=False, signals=False,
+                 shutdown_timeout=shutdown.SHUTDOWN_TIMEOUT, notifier=None):
+        """Готовит движок; потоки пула создаются по мере надобности.
+        Блокирующие запросы и отправка выполняются в пуле потоков, так что
+        число потоков не зависит от числа пользователей; все пользователи
+        делят HTTP-сессию session. Пользователи хранятся по столбцам в
+        TenantTable, их метки и последние ошибки восстанавливаются из
+        store. Если commands, бот отвечает на /status и /list (answer),
+        если signals - подключаются сигналы (install_signal_handlers).
+        """
+        self.tenants = (
+            tenants if isinstance(tenants, tenant_table.TenantTable)
+            else tenant_table.TenantTable(tenants))
+        self.chats = {chat_id: index
+                      for index, chat_id in enumerate(self.tenants.chat_ids)}
+        self.bot = bot
+        self.commands = commands
+        self.signals = signals
+        self.shutdown_timeout = shutdown_timeout
+        self.stopping = asyncio.Event()
+        self.outbox_ready = asyncio.Event()
+        self.polls_finished = asyncio.Event()
+        self.loop = None
+        self.statuses = status_cache.StatusCache()
+        self.jitter = jitter
+        self.fingerprints = fingerprint.FingerprintCache()
+        self.errors = error_digest.ErrorDigest()
+        self.breaker = circuit_breaker.CircuitBreaker()
+        self.policy = policy or cadence.CadencePolicy()
+        self.limiter = limiter or ratelimit.TokenBucket(
+            cadence.MAX_REQUESTS_PER_SECOND)
+        self.session = session
+        self.store = store or state_store.MemoryStateStore()
+        self.index = status_index.StatusIndex(self.store)
+        self.notifier = notifier or notifiers.Notifier.from_env(
+            self.send_threadsafe)
+        for tenant in self.tenants:
+            tenant.timestamp = (
+                self.store.get_cursor(tenant.chat_id) or tenant.timestamp)
+            tenant.last_message = self.store.get_last_error(tenant.chat_id)
+        self.period = period
+        self.concurrency = concurrency
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix='poll')
+        self.send_queue = send_queue.SendQueue(bot, executor=self.executor)
+        self.wheel = scheduler.IndexedTimingWheel(
+            time.monotonic(), len(self.tenants))
+
+    async def run_blocking(self, func, *args):
+        """Выполняет блокирующую функцию в пуле потоков движка."""
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, func, *args)
+
+    async def fetch(self, tenant, stream=False, timestamp=None):
+        """Корутина-обертка над fetch_api_response с выключателем.
+        Общее число запросов в секунду ограничено limiter, а пока API
+        недоступен, общий выключатель breaker завершает запрос ошибкой без
+        обращения к сети. По умолчанию запрос идет с временной метки
+        пользователя.
+        """
+        if timestamp is None:
+            timestamp = tenant.timestamp
+
+        async def request():
+            await self.limiter.acquire()
+            return await self.run_blocking(
+                homework.fetch_api_response, timestamp,
+                tenant.headers, self.session, stream)
+        return await self.breaker.call(request)
+
+    @staticmethod
+    def read_stream(request_params, response):
+        """Потоково читает и проверяет ответ API.
+        Каждая работа превращается в запись Homework сразу по приходе, так
+        что исходные словари не копятся. Блокирует поток, поэтому
+        выполняется в пуле потоков движка.
+        Returns:
+            tuple: список Homework и current_date ответа.
+        """
+        stream = json_decoding.HomeworkStream(
+            response.iter_content(json_decoding.STREAM_CHUNK_SIZE))
+        records = [validation.validate_homework(item) for item in stream]
+        if isinstance(stream.document, dict):
+            homework.check_api_error(request_params, stream.document)
+        _, current_date = validation.validate_response(stream.document)
+        return records, current_date
+
+    async def fetch_records(self, tenant, timestamp):
+        """Запрашивает работы с метки timestamp потоковым чтением.
+        Returns:
+            tuple: список Homework и current_date ответа.
+        """
+        request_params, raw_response = await self.fetch(
+            tenant, stream=True, timestamp=timestamp)
+        try:
+            return await self.run_blocking(
+                self.read_stream, request_params, raw_response)
+        finally:
+            raw_response.close()
+
+    async def backfill(self, tenant):
+        """Опрашивает пользователя с давней меткой потоковым чтением."""
+        await self.process(
+            tenant, *await self.fetch_records(tenant, tenant.timestamp))
+
+    async def send(self, tenant, message):
+        """Отправляет сообщение пользователю через очередь отправки."""
+        return await self.send_queue.send(tenant.chat_id, message)
+
+    def send_threadsafe(self, chat_id, message, timeout):
+        """Отправляет сообщение через очередь отправки из другого потока.
+        Так отправляют приемники telegram рассылки notifier: с теми же
+        лимитами частоты и повторами, что и уведомления пользователей.
+        Если сообщение не отправлено за timeout секунд, отправка
+        отменяется и выбрасывается TimeoutError.
+        Returns:
+            bool: True, если сообщение отправлено.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self.send_queue.send(chat_id, message), self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    async def poll(self, tenant):
+        """Одна итерация цикла main() для одного пользователя.
+        Если метка старше STREAM_BACKFILL_AFTER секунд, ответ может
+        содержать длинную историю работ и читается потоково (backfill).
+        Ответ, тело которого совпадает с уже обработанным (fingerprints),
+        повторно не разбирается. Повторы ошибки копятся в errors и
+        приходят периодической сводкой. Пока выключатель breaker открыт,
+        опрос просто пропускается: это не ошибка пользователя, и ему
+        ничего не отправляется.
+        """
+        summary = self.errors.summary(tenant.chat_id)
+        if summary:
+            await self.send(tenant, summary)
+        try:
+            if time.time() - tenant.timestamp > STREAM_BACKFILL_AFTER:
+                await self.backfill(tenant)
+                return
+            request_params, response = await self.fetch(tenant)
+            digest = fingerprint.fingerprint(response.content)
+            if self.fingerprints.matches(tenant.chat_id, digest):
+                self.statuses.update(tenant.chat_id, ())
+                logging.debug(homework.NO_NEW_HOMEWORKS)
+                return
+            response = homework.decode_api_answer(request_params, response)
+            await self.process(
+                tenant, *validation.validate_response(response))
+            self.fingerprints.remember(tenant.chat_id, digest)
+        except exceptions.CircuitOpenError as error:
+            metrics.count_error(error)
+            logging.info(POLL_SKIPPED.format(
+                chat_id=tenant.chat_id, message=error))
+        except Exception as error:
+            metrics.count_error(error)
+            self.fingerprints.forget(tenant.chat_id)
+            message = homework.ERROR_MESSAGE.format(error=error)
+            logging.error(TENANT_ERROR.format(
+                chat_id=tenant.chat_id, message=message))
+            if (self.errors.record(tenant.chat_id, error)
+                    and message != tenant.last_message):
+                await self.send(tenant, message)
+                tenant.last_message = message
+                self.store.set_last_error(tenant.chat_id, message)
+
+    async def process(self, tenant, records, current_date):
+        """Ставит в outbox уведомления о работах с новым статусом.
+        Уведомления ставятся в одной транзакции со сдвигом метки и только
+        для работ, статус которых изменился с прошлого раза (index); те же
+        события передаются дополнительным приемникам notifier.
+        Args:
+            tenant (Tenant): пользователь;
+            records (list): проверенные записи Homework;
+            current_date (int): current_date ответа или None;
+        """
+        self.statuses.update(tenant.chat_id, records)
+        if current_date is not None:
+            tenant.timestamp = current_date
+        if not records:
+            self.store.set_cursor(tenant.chat_id, tenant.timestamp)
+            logging.debug(homework.NO_NEW_HOMEWORKS)
+            return
+        tenant.last_status = records[0].status
+        tenant.last_updated = cadence.parse_date_updated(
+            records[0].date_updated)
+        changes = [
+            record for record in records
+            if self.index.changed(tenant.chat_id, record.id, record.status,
+                                  record.date_updated)]
+        self.store.enqueue_messages(
+            tenant.chat_id,
+            homework.join_messages([record.message() for record in changes]),
+            tenant.timestamp)
+        for record in changes:
+            self.index.remember(tenant.chat_id, record.id, record.status,
+                                record.date_updated)
+            self.notifier.publish(notifiers.status_event(
+                tenant.chat_id, record.id, record.name, record.status,
+                record.date_updated, record.message()))
+        if changes:
+            self.outbox_ready.set()
+
+    async def deliver_due(self):
+        """Отправляет уведомления outbox, которые пора отправить.
+        Уведомления разных пользователей уходят параллельно через очередь
+        отправки, у одного пользователя - по порядку. Исключение при
+        отправке считается неудачной попыткой.
+        Returns:
+            int: число обработанных уведомлений.
+        """
+        due = self.store.due_messages(time.time())
+        results = await asyncio.gather(*(
+            self.send_queue.send(tenant, message)
+            for _, tenant, message, _ in due), return_exceptions=True)
+        for entry, sent in zip(due, results):
+            if isinstance(sent, Exception):
+                metrics.count_error(sent)
+                logging.error(homework.MESSAGE_NOT_SENT.format(
+                    error=sent, message=entry[2]))
+            outbox.settle(self.store, entry, sent is True)
+        return len(due)
+
+    async def deliver_outbox(self):
+        """Отправитель outbox: работает, пока не завершены все опросы.
+        Просыпается, когда process поставил уведомления, и не реже раза в
+        OUTBOX_POLL_INTERVAL секунд для отложенных повторов. Последний
+        проход выполняется после polls_finished, когда начатые при
+        остановке опросы уже поставили свои уведомления.
+        """
+        while True:
+            self.outbox_ready.clear()
+            finished = self.polls_finished.is_set()
+            try:
+                while await self.deliver_due():
+                    pass
+            except Exception as error:
+                metrics.count_error(error)
+                logging.exception(OUTBOX_FAILED.format(error=error))
+            if finished:
+                return
+            try:
+                await asyncio.wait_for(
+                    self.outbox_ready.wait(), outbox.OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def answer(self, chat_id, command):
+        """Отвечает на команду /status или /list из кеша статусов.
+        Если запись пользователя в кеше устарела, полный список работ
+        загружается одним запросом, сколько бы команд ни пришло.
+        """
+        index = self.chats.get(chat_id)
+        if index is None:
+            messages = [UNKNOWN_CHAT_REPLY]
+        else:
+            tenant = self.tenants[index]
+            try:
+                records = await self.statuses.get_or_fetch(
+                    chat_id, lambda: self.fetch_statuses(tenant))
+            except Exception as error:
+                metrics.count_error(error)
+                logging.error(TENANT_ERROR.format(
+                    chat_id=chat_id,
+                    message=homework.ERROR_MESSAGE.format(error=error)))
+                messages = [STATUS_UNAVAILABLE_REPLY]
+            else:
+                messages = status_messages(command, records)
+        for message in messages:
+            await self.send_queue.send(chat_id, message)
+
+    async def fetch_statuses(self, tenant):
+        """Загружает полный список работ пользователя."""
+        records, _ = await self.fetch_records(tenant, 0)
+        return records
+
+    def on_command(self, message):
+        """Обработчик команд TeleBot; выполняется в потоке бота."""
+        command = message.text.split()[0].lstrip('/').split('@')[0]
+        asyncio.run_coroutine_threadsafe(
+            self.answer(str(message.chat.id), command), self.loop)
+
+    def start_commands(self):
+        """Запускает прием команд бота в фоновом потоке."""
+        self.bot.register_message_handler(
+            self.on_command, commands=list(COMMANDS))
+        threading.Thread(
+            target=self.bot.infinity_polling,
+            kwargs={'allowed_updates': ['message']},
+            name='commands', daemon=True).start()
+
+    def request_stop(self, signum=signal.SIGTERM):
+        """Останавливает движок после текущих опросов.
+        Новые опросы не начинаются, начатые завершаются, очередь отправки
+        дописывается не дольше shutdown_timeout секунд (drain), состояние
+        сохраняется.
+        """
+        logging.warning(shutdown.SHUTDOWN_REQUESTED.format(
+            signal=signal.Signals(signum).name))
+        self.stopping.set()
+
+    def poll_now(self, signum=shutdown.POLL_NOW_SIGNAL):
+        """Переносит ожидающие опросы всех пользователей на текущий момент.
+        Пользователи, которых опрашивают прямо сейчас, не затрагиваются.
+        Частоту запросов по-прежнему ограничивает limiter.
+        """
+        logging.info(shutdown.POLL_NOW_REQUESTED.format(
+            signal=signal.Signals(signum).name))
+        now = time.monotonic()
+        for index in self.wheel.scheduled():
+            self.wheel.schedule(index, now)
+
+    def install_signal_handlers(self):
+        """Подключает сигналы остановки и опроса к циклу событий."""
+        for signum in shutdown.STOP_SIGNALS:
+            self.loop.add_signal_handler(signum, self.request_stop, signum)
+        self.loop.add_signal_handler(
+            shutdown.POLL_NOW_SIGNAL, self.poll_now)
+
+    def schedule_all(self, now):
+        """Равномерно раскладывает первые опросы по окну period."""
+        self.wheel = scheduler.IndexedTimingWheel(now, len(self.tenants))
+        self.wheel.spread(
+            range(len(self.tenants)), now, self.period, self.jitter)
+
+    def next_deadline(self, tenant, now):
+        """Считает срок следующего опроса пользователя по политике.
+        Интервал выбирает политика cadence по статусу последней работы,
+        к нему добавляется случайный сдвиг до jitter секунд.
+        """
+        interval = self.policy.interval(
+            tenant.last_status, tenant.last_updated, time.time())
+        return now + interval + random.uniform(0, self.jitter)
+
+    async def worker(self, queue):
+        """Опрашивает пользователей из очереди и планирует следующий опрос."""
+        while True:
+            index = await queue.get()
+            tenant = self.tenants[index]
+            try:
+                if not self.stopping.is_set():
+                    await self.poll(tenant)
+                    startup.TIMER.first_poll()
+            except Exception as error:
+                metrics.count_error(error)
+                logging.exception(TENANT_ERROR.format(
+                    chat_id=tenant.chat_id, message=error))
+            finally:
+                self.wheel.schedule(index, self.next_deadline(
+                    tenant, time.monotonic()))
+                queue.task_done()
+
+    async def dispatch(self, queue):
+        """Перекладывает наступившие сроки опроса в очередь воркеров."""
+        expected = time.monotonic()
+        while not self.stopping.is_set():
+            now = time.monotonic()
+            metrics.LOOP_LAG.set(max(0.0, now - expected), loop='engine')
+            for index in self.wheel.advance(now):
+                await queue.put(index)
+            self.store.maybe_flush()
+            expected = time.monotonic() + self.wheel.tick
+            try:
+                await asyncio.wait_for(self.stopping.wait(), self.wheel.tick)
+            except asyncio.TimeoutError:
+                pass
+
+    async def drain(self, queue, sender):
+        """Дожидается начатых опросов и отправки сообщений из очереди.
+        Отправитель outbox напоследок отправляет то, что уже пора
+        отправить; отложенные повторы остаются в хранилище до следующего
+        запуска.
+        """
+        async def finish():
+            await queue.join()
+            self.polls_finished.set()
+            self.outbox_ready.set()
+            await sender
+            await self.send_queue.join()
+            await self.run_blocking(self.notifier.close)
+        try:
+            await asyncio.wait_for(finish(), self.shutdown_timeout)
+        except asyncio.TimeoutError:
+            logging.error(DRAIN_TIMED_OUT.format(
+                timeout=self.shutdown_timeout))
+
+    def collect_metrics(self, queue):
+        """Обновляет метрики движка перед выгрузкой."""
+        metrics.ACTIVE_TENANTS.set(len(self.tenants))
+        metrics.QUEUE_DEPTH.set(queue.qsize(), queue='poll')
+        metrics.QUEUE_DEPTH.set(self.send_queue.qsize(), queue='send')
+        metrics.QUEUE_DEPTH.set(self.store.count_messages(), queue='outbox')
+        metrics.QUEUE_DEPTH.set(len(self.wheel), queue='scheduled')
+        metrics.LOOP_LAG.set(self.wheel.stats()['lag_max'], loop='wheel_max')
+        for stat, value in self.fingerprints.stats().items():
+            metrics.FINGERPRINT_CACHE.set(value, stat=stat)
+
+    async def run(self):
+        """Запускает диспетчер и воркеры и работает до отмены или остановки."""
+        self.schedule_all(time.monotonic())
+        self.loop = asyncio.get_running_loop()
+        await self.send_queue.start()
+        if self.commands:
+            self.start_commands()
+        if self.signals:
+            self.install_signal_handlers()
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [asyncio.create_task(self.worker(queue))
+                   for _ in range(self.concurrency)]
+        sender = asyncio.create_task(self.deliver_outbox())
+        collector = metrics.REGISTRY.add_collector(
+            lambda: self.collect_metrics(queue))
+        logging.info(ENGINE_STARTED.format(
+            count=len(self.tenants), concurrency=self.concurrency))
+        try:
+            await self.dispatch(queue)
+            await self.drain(queue, sender)
+        finally:
+            for task in workers:
+                task.cancel()
+            sender.cancel()
+            if self.commands:
+                self.bot.stop_polling()
+            await self.send_queue.stop()
+            self.notifier.close(wait=False)
+            self.executor.shutdown(wait=False)
+            metrics.REGISTRY.remove_collector(collector)
+            self.store.close()
+            logging.info(homework.BOT_STOPPED)
+
+
+def status_messages(command, records):
+    """Готовит ответ на команду по списку работ, самых новых первыми.
+    /status сообщает статус последней работы, /list - всех работ.
+    """
+    if not records:
+        return [NO_HOMEWORKS_REPLY]
+    if command == 'status':
+        records = records[:1]
+    return homework.join_messages([
+        STATUS_REPLY.format(
+            homework_name=record.name,
+            verdict=homework.HOMEWORK_VERDICTS[record.status])
+        for record in records])
+
+
+def check_engine_tokens():
+    """Проверяет токен бота.
+    Токены Практикума и чаты движок берет из файла пользователей.
+    """
+    if not homework.TELEGRAM_TOKEN:
+        message = homework.TOKENS_UNAVAILABLE.format(
+            unavailable_tokens=['TELEGRAM_TOKEN'])
+        logging.critical(message)
+        raise ValueError(message)
+
+
+def main():
+    """Запускает многопользовательский движок опроса."""
+    startup.TIMER.mark('imports')
+    check_engine_tokens()
+    settings.check()
+    bot = TeleBot(token=homework.TELEGRAM_TOKEN)
+    metrics.start_server()
+    engine = PollingEngine(
+        load_tenants(TENANTS_FILE), bot,
+        session=recording.session_from_env(
+            http_client.create_session(pool_size=POLL_CONCURRENCY)),
+        store=state_store.open_store(homework.STATE_DB_PATH),
+        commands=True, signals=True)
+    asyncio.run(engine.run())
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=os.getenv('LOG_LEVEL', 'INFO'),
+        handlers=[log_config.build_queue_handler(f'{__file__}.log')])
+    main()
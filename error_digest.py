@@ -0,0 +1,113 @@
+import hashlib
+import re
+import time
+from collections import OrderedDict
+
+import settings
+
+ERROR_SUMMARY_WINDOW = settings.env_float('ERROR_SUMMARY_WINDOW', 3600.0)
+ERROR_DIGEST_SIZE = settings.env_int('ERROR_DIGEST_SIZE', 10000)
+FINGERPRINTS_PER_TENANT = 16
+VARIABLE_PARTS = re.compile(r"'[^']*'|\"[^\"]*\"|\d+")
+
+ERROR_SUMMARY = 'Повторяющиеся ошибки за последние {minutes} мин.: {counts}.'
+ERROR_COUNT = '{name} ×{count}'
+
+
+def error_fingerprint(error):
+    """Возвращает отпечаток ошибки: класс исключения и шаблон текста.
+    Из текста убираются изменчивые части - числа и строки в кавычках
+    (временные метки, заголовки, параметры запроса), поэтому ошибки,
+    отформатированные по одному шаблону, получают один отпечаток.
+    Args:
+        error (Exception): ошибка;
+    Returns:
+        bytes: 8-байтовый хеш.
+    """
+    template = VARIABLE_PARTS.sub('*', str(error))
+    return hashlib.blake2b(
+        f'{type(error).__name__}:{template}'.encode('UTF-8'),
+        digest_size=8).digest()
+
+
+class ErrorDigest:
+    """Подавление повторяющихся уведомлений об ошибках.
+    Первая ошибка с данным отпечатком уведомляет пользователя сразу, а
+    повторы в течение window секунд только считаются. Когда окно
+    закончилось, summary возвращает одну сводку по всем подавленным
+    ошибкам пользователя («ConnectionError ×37»). Память ограничена:
+    не больше max_size пользователей и FINGERPRINTS_PER_TENANT
+    отпечатков у каждого, при переполнении вытесняются давно не
+    обновлявшиеся (LRU).
+    """
+
+    def __init__(self, window=ERROR_SUMMARY_WINDOW, max_size=ERROR_DIGEST_SIZE,
+                 clock=time.monotonic):
+        """Создает пустой журнал."""
+        self.window = window
+        self.max_size = max_size
+        self.clock = clock
+        self.tenants = OrderedDict()
+
+    def record(self, key, error):
+        """Учитывает ошибку пользователя.
+        Returns:
+            bool: True, если о ней нужно уведомить сейчас; False, если это
+            повтор внутри окна и он попадет в сводку.
+        """
+        now = self.clock()
+        fingerprints = self.tenants.get(key)
+        if fingerprints is None:
+            fingerprints = self.tenants[key] = OrderedDict()
+        self.tenants.move_to_end(key)
+        while len(self.tenants) > self.max_size:
+            self.tenants.popitem(last=False)
+        digest = error_fingerprint(error)
+        entry = fingerprints.get(digest)
+        if entry is not None and now - entry[0] < self.window:
+            entry[1] += 1
+            fingerprints.move_to_end(digest)
+            return False
+        fingerprints[digest] = [now, 0, type(error).__name__]
+        fingerprints.move_to_end(digest)
+        while len(fingerprints) > FINGERPRINTS_PER_TENANT:
+            fingerprints.popitem(last=False)
+        return True
+
+    def summary(self, key):
+        """Возвращает сводку по закончившимся окнам пользователя.
+        Окна, которые закончились, забываются; следующая такая ошибка
+        снова уведомит сразу.
+        Returns:
+            str: текст сводки или None, если подавленных ошибок нет.
+        """
+        fingerprints = self.tenants.get(key)
+        if not fingerprints:
+            return None
+        now = self.clock()
+        counts = {}
+        for digest, (start, suppressed, name) in list(fingerprints.items()):
+            if now - start < self.window:
+                continue
+            del fingerprints[digest]
+            if suppressed:
+                counts[name] = counts.get(name, 0) + suppressed
+        if not fingerprints:
+            del self.tenants[key]
+        if not counts:
+            return None
+        return ERROR_SUMMARY.format(
+            minutes=round(self.window / 60),
+            counts=', '.join(
+                ERROR_COUNT.format(name=name, count=count)
+                for name, count in counts.items()))
+
+    def stats(self):
+        """Возвращает размер журнала.
+        Returns:
+            dict: tenants - число пользователей и fingerprints - отпечатков.
+        """
+        return {'tenants': len(self.tenants),
+                'fingerprints': sum(
+                    len(fingerprints)
+                    for fingerprints in self.tenants.values())}
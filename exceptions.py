@@ -1,5 +1,7 @@
 class APIIsUnavailableError(Exception):
-    pass
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
 
 
 class TelegramConnectionError(Exception):
@@ -10,4 +12,8 @@ class TokenNotFoundError(Exception):
     pass
 
 class ResponseFormatError(Exception):
+    pass
+
+
+class CircuitOpenError(Exception):
     pass
\ No newline at end of file
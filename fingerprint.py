@@ -0,0 +1,57 @@
+import hashlib
+import re
+
+CURRENT_DATE = re.compile(rb'"current_date"\s*:\s*\d+')
+
+
+def fingerprint(body):
+    """Возвращает отпечаток тела ответа API.
+    Поле current_date - это время сервера, оно меняется при каждом
+    запросе, поэтому в отпечаток не входит: иначе одинаковые по сути
+    ответы никогда бы не совпадали.
+    Args:
+        body (bytes): сырое тело ответа;
+    Returns:
+        bytes: 16-байтовый хеш.
+    """
+    return hashlib.blake2b(
+        CURRENT_DATE.sub(b'', body), digest_size=16).digest()
+
+
+class FingerprintCache:
+    """Отпечатки последних обработанных ответов API по пользователям.
+    Если тело нового ответа совпадает с уже обработанным, его не нужно
+    заново декодировать, проверять и разбирать. Отпечаток запоминается
+    только после успешной обработки ответа, чтобы неотправленное
+    сообщение не потерялось.
+    """
+
+    def __init__(self):
+        """Создает пустой кеш."""
+        self.digests = {}
+        self.hits = 0
+        self.misses = 0
+
+    def matches(self, key, digest):
+        """Проверяет, совпадает ли отпечаток с последним обработанным."""
+        if self.digests.get(key) == digest:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def remember(self, key, digest):
+        """Запоминает отпечаток успешно обработанного ответа."""
+        self.digests[key] = digest
+
+    def forget(self, key):
+        """Забывает отпечаток, например после ошибки обработки."""
+        self.digests.pop(key, None)
+
+    def stats(self):
+        """Возвращает счетчики попаданий и промахов.
+        Returns:
+            dict: hits, misses и size - число запомненных отпечатков.
+        """
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self.digests)}
@@ -0,0 +1,56 @@
+import bisect
+import hashlib
+
+RING_REPLICAS = 128
+
+
+def ring_hash(value):
+    """Возвращает 64-битный хеш строки для кольца."""
+    return int.from_bytes(hashlib.blake2b(
+        value.encode('UTF-8'), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Консистентное хеширование пользователей по воркерам.
+    Каждый узел (воркер) занимает на кольце replicas виртуальных точек,
+    пользователь принадлежит узлу первой точки по часовой стрелке от хеша
+    его ключа. Поэтому при добавлении или удалении одного узла из N
+    переезжает только около 1/N пользователей, а остальные остаются у
+    своих воркеров.
+    """
+
+    def __init__(self, nodes=(), replicas=RING_REPLICAS):
+        """Строит кольцо из узлов nodes."""
+        self.replicas = replicas
+        self.points = []
+        self.owners = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        """Добавляет узел на кольцо."""
+        for replica in range(self.replicas):
+            point = ring_hash(f'{node}#{replica}')
+            index = bisect.bisect(self.points, point)
+            self.points.insert(index, point)
+            self.owners.insert(index, node)
+
+    def remove(self, node):
+        """Убирает узел с кольца."""
+        pairs = [(point, owner)
+                 for point, owner in zip(self.points, self.owners)
+                 if owner != node]
+        self.points = [point for point, _ in pairs]
+        self.owners = [owner for _, owner in pairs]
+
+    def node_for(self, key):
+        """Возвращает узел, которому принадлежит ключ.
+        Args:
+            key (str): ключ пользователя, например chat_id;
+        Returns:
+            str: узел или None, если кольцо пустое.
+        """
+        if not self.points:
+            return None
+        index = bisect.bisect(self.points, ring_hash(key))
+        return self.owners[index % len(self.points)]
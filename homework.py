@@ -1,26 +1,43 @@
 from http import HTTPStatus
+import functools
 import logging
 import os
 import sys
 import time
 
-import requests
-import requests.exceptions
-from dotenv import load_dotenv
-from telebot import TeleBot
-from telebot.apihelper import ApiException
-
+import error_digest
 import exceptions
+import http_client
+import json_decoding
+import log_config
+import metrics
+import notifiers
+import outbox
+import profiling
+import recording
+import settings
+import shutdown
+import startup
+import state_store
+import status_index
 
-load_dotenv()
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if any(os.path.isfile(os.path.join(directory, '.env'))
+       for directory in (BASE_DIR, os.getcwd())):
+    from dotenv import load_dotenv
+    load_dotenv()
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
+STATE_DB_PATH = os.getenv('STATE_DB_PATH')
 
 RETRY_PERIOD = 600
+TELEGRAM_MESSAGE_LIMIT = 4096
+SESSION = None
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+AUTHORIZATION = 'OAuth {token}'
+HEADERS = {'Authorization': AUTHORIZATION.format(token=PRACTICUM_TOKEN)}
 
 HOMEWORK_VERDICTS = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
@@ -55,6 +72,7 @@ HOMEWORK_VERDICT = ('Изменился статус проверки работ
                     '{verdict}')
 MISSING_ENVIRONMENT_VARIABLE = 'Отсутствует переменная окружения.'
 PROGRAM_STOPPED = 'Программа принудительно остановлена.'
+BOT_STOPPED = 'Бот остановлен, состояние сохранено.'
 ERROR_MESSAGE = 'Сбой в работе программы: {error}.'
 CONNECTION_ERROR = 'Ошибка соединения. ' + REQUEST_PARAMS
 RESPONSE_NOT_JSON = 'Ошибка, ответ не в формате json, {error}.'
@@ -63,6 +81,10 @@ TELEGRAM_MESSAGE_NOT_SUCCESSFUL = ('Не удалось отправить со
 NO_NEW_HOMEWORKS = ('Обновлений по домашним работам нет. '
                     f'Жду {RETRY_PERIOD / 60} минут.')
 MESSAGE_SUCCESSFULY_SENT = 'Сообщение успешно отправлено.'
+STATE_DIR_UNAVAILABLE = ('Нет доступа на запись к каталогу базы '
+                         'состояния {path}.')
+METRICS_PORT_INVALID = 'Некорректный порт метрик METRICS_PORT={port}.'
+CONFIG_VALID = 'Настройки в порядке.'
 
 TOKEN_NAMES = {'PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID'}
 
@@ -93,40 +115,150 @@ def send_message(bot, message):
         bot (class 'telebot.TeleBot'): бот;
         message (str): сообщение
     """
+    return send_chat_message(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_chat_message(bot, chat_id, message, timeout=None):
+    """Посылает сообщение в произвольный Telegram-чат.
+    Общая часть send_message, которую использует и многопользовательский
+    движок (engine.py): там у каждого пользователя свой чат.
+    Args:
+        bot (class 'telebot.TeleBot'): бот;
+        chat_id (str): идентификатор чата;
+        message (str): сообщение;
+        timeout (float): таймаут запроса к Telegram, по умолчанию
+            таймаут бота
+    Returns:
+        bool: True, если сообщение отправлено.
+    """
+    import requests
+    from telebot.apihelper import ApiException
+    options = {} if timeout is None else {'timeout': timeout}
     try:
-        bot.send_message(TELEGRAM_CHAT_ID, message)
-        logging.debug(MESSAGE_SENT_SUCCESSULLY.format(message=message))
+        with metrics.SEND_LATENCY.time():
+            bot.send_message(chat_id, message, **options)
+        logging.debug(
+            log_config.lazy(MESSAGE_SENT_SUCCESSULLY, message=message))
         return True
-    except ApiException as error:
+    except (ApiException, requests.exceptions.RequestException) as error:
+        metrics.count_error(error)
         logging.exception(
             MESSAGE_NOT_SENT.format(error=error, message=message))
         return False
 
 
+def deliver_outbox(bot, store):
+    """Отправляет накопленные в outbox уведомления в чат TELEGRAM_CHAT_ID.
+    Неотправленные уведомления остаются в outbox и повторяются с
+    растущей паузой (outbox.settle).
+    Args:
+        bot (class 'telebot.TeleBot'): бот;
+        store: хранилище состояния;
+    """
+    def send(message):
+        sent = send_message(bot, message)
+        if sent:
+            logging.debug(MESSAGE_SUCCESSFULY_SENT)
+        return sent
+
+    outbox.deliver_pending(store, send, TELEGRAM_CHAT_ID)
+
+
 def get_api_answer(timestamp):
     """Получает ответ API.
     Пытается получить ответ API и проверять его корректность. Если код ответа
     не равен 200, вызывает исключение APIIsUnavailableException.
     Если код правильный, возвращает отформатированный результат запроса.
+    Запрос идет через общую сессию SESSION, если она настроена.
     Args:
         timestamp (dict): временная метка;
     Returns:
         response.json(): ответ API.
     """
+    return request_api_answer(timestamp, HEADERS, SESSION)
+
+
+def make_headers(token):
+    """Собирает заголовки запроса к API для токена Практикума.
+    Args:
+        token (str): OAuth-токен пользователя;
+    Returns:
+        dict: заголовки с полем Authorization.
+    """
+    return {'Authorization': AUTHORIZATION.format(token=token)}
+
+
+def request_api_answer(timestamp, headers, session=None):
+    """Получает ответ API с заданными заголовками.
+    Общая часть get_api_answer: у каждого пользователя движка свой токен,
+    поэтому заголовки передаются явно.
+    Args:
+        timestamp (int): временная метка;
+        headers (dict): заголовки запроса;
+        session (requests.Session): общая сессия с пулом соединений, без нее
+            каждый запрос открывает новое соединение;
+    Returns:
+        response.json(): ответ API.
+    """
+    return decode_api_answer(
+        *fetch_api_response(timestamp, headers, session))
+
+
+def fetch_api_response(timestamp, headers, session=None, stream=False):
+    """Выполняет запрос к API и проверяет код ответа.
+    Тело ответа не разбирается, поэтому его можно сравнить с предыдущим
+    до декодирования JSON или читать по частям.
+    Args:
+        timestamp (int): временная метка;
+        headers (dict): заголовки запроса;
+        session (requests.Session): общая сессия с пулом соединений;
+        stream (bool): не загружать тело сразу, а читать его по частям;
+    Returns:
+        tuple: параметры запроса и ответ requests.Response.
+    """
+    import requests
     timestamp = {'from_date': timestamp}
-    request_params = dict(url=ENDPOINT, headers=HEADERS, params=timestamp)
+    request_params = dict(url=ENDPOINT, headers=headers, params=timestamp,
+                          timeout=http_client.HTTP_TIMEOUT)
+    if stream:
+        request_params['stream'] = True
     try:
-        response = requests.get(**request_params)
+        with metrics.API_LATENCY.time():
+            response = (session or requests).get(**request_params)
     except requests.exceptions.RequestException as error:
         raise ConnectionError(
             CONNECTION_ERROR.format(
                 error=error,
                 **request_params))
     if response.status_code != HTTPStatus.OK:
-        raise exceptions.APIIsUnavailableError(API_IS_UNAVAILABLE.format(
-            status_code=response.status_code,
-            **request_params))
-    response_json = response.json()
+        raise exceptions.APIIsUnavailableError(
+            API_IS_UNAVAILABLE.format(
+                status_code=response.status_code,
+                **request_params),
+            status_code=response.status_code)
+    return request_params, response
+
+
+def decode_api_answer(request_params, response):
+    """Декодирует ответ API и проверяет, что в нем нет ошибки.
+    Args:
+        request_params (dict): параметры запроса для текста ошибки;
+        response (requests.Response): ответ API;
+    Returns:
+        response.json(): ответ API.
+    """
+    response_json = json_decoding.decode_response(response)
+    check_api_error(request_params, response_json)
+    logging.debug(API_SUCCESS)
+    return response_json
+
+
+def check_api_error(request_params, response_json):
+    """Выбрасывает ResponseFormatError, если API вернул ошибку в теле.
+    Args:
+        request_params (dict): параметры запроса для текста ошибки;
+        response_json (dict): декодированный ответ API;
+    """
     for key in ('code', 'error'):
         if key in response_json:
             raise exceptions.ResponseFormatError(
@@ -134,8 +266,6 @@ def get_api_answer(timestamp):
                     key=key,
                     value=response_json[key],
                     **request_params))
-    logging.debug(API_SUCCESS)
-    return response_json
 
 
 def check_response(response):
@@ -173,7 +303,8 @@ def parse_status(homework):
     if status not in HOMEWORK_VERDICTS:
         raise ValueError(UNKNOWN_HOMEWORK_STATUS.format(status=status))
     verdict = HOMEWORK_VERDICTS[status]
-    logging.debug(HOMEWORK_PROCESSED.format(
+    logging.debug(log_config.lazy(
+        HOMEWORK_PROCESSED,
         homework_name=homework_name,
         verdict=verdict))
     return HOMEWORK_VERDICT.format(
@@ -181,38 +312,178 @@ def parse_status(homework):
         verdict=verdict)
 
 
+def parse_statuses(homeworks):
+    """Извлекает статусы всех домашних работ из ответа API.
+    Args:
+        homeworks (list): список работ из ответа API;
+    Returns:
+        list: строки с сообщениями о статусе каждой работы.
+    """
+    return [parse_status(homework) for homework in homeworks]
+
+
+def changed_homeworks(index, homeworks):
+    """Оставляет работы, статус которых изменился с прошлого уведомления.
+    Args:
+        index (StatusIndex): индекс статусов работ;
+        homeworks (list): список работ из ответа API;
+    Returns:
+        list: работы, о которых нужно уведомить.
+    """
+    return [
+        homework for homework in homeworks
+        if index.changed(TELEGRAM_CHAT_ID, homework.get('id'),
+                         homework.get('status'), homework.get('date_updated'))]
+
+
+def remember_homeworks(index, homeworks):
+    """Запоминает статусы работ, уведомления о которых поставлены."""
+    for homework in homeworks:
+        index.remember(TELEGRAM_CHAT_ID, homework.get('id'),
+                       homework['status'], homework.get('date_updated'))
+
+
+def publish_homeworks(notifier, homeworks, messages):
+    """Передает события о новых статусах работ приемникам NOTIFY_SINKS.
+    Args:
+        notifier (Notifier): рассылка;
+        homeworks (list): работы с новым статусом;
+        messages (list): уже готовые сообщения о них (parse_statuses).
+    """
+    for homework, message in zip(homeworks, messages):
+        notifier.publish(notifiers.status_event(
+            TELEGRAM_CHAT_ID, homework.get('id'), homework['homework_name'],
+            homework['status'], homework.get('date_updated'), message))
+
+
+def join_messages(messages, limit=TELEGRAM_MESSAGE_LIMIT):
+    """Объединяет сообщения в как можно меньшее число частей.
+    Сообщения склеиваются через перевод строки, пока часть не превышает
+    ограничение Telegram на длину сообщения; слишком длинное сообщение
+    режется на куски.
+    Args:
+        messages (list): сообщения;
+        limit (int): максимальная длина одной части;
+    Returns:
+        list: части для отправки.
+    """
+    chunks = []
+    current = ''
+    for message in messages:
+        for start in range(0, len(message), limit):
+            piece = message[start:start + limit]
+            if current and len(current) + 1 + len(piece) <= limit:
+                current = f'{current}\n{piece}'
+                continue
+            if current:
+                chunks.append(current)
+            current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def check_config():
+    """Проверяет токены и настройки без запуска бота.
+    Сетевые библиотеки (telebot, requests) при этом не импортируются,
+    поэтому проверка быстрая и подходит для предстартовых проверок
+    выкладки: python homework.py --check.
+    """
+    check_tokens()
+    settings.check()
+    if STATE_DB_PATH:
+        directory = os.path.dirname(os.path.abspath(STATE_DB_PATH))
+        if not os.access(directory, os.W_OK):
+            raise ValueError(STATE_DIR_UNAVAILABLE.format(path=directory))
+    if not 0 <= metrics.METRICS_PORT <= 65535:
+        raise ValueError(METRICS_PORT_INVALID.format(
+            port=metrics.METRICS_PORT))
+    for sink in notifiers.parse_sinks(notifiers.NOTIFY_SINKS):
+        sink.close()
+    startup.TIMER.mark('check')
+    logging.info(CONFIG_VALID)
+    logging.info(startup.TIMER.report())
+
+
 def main():
-    """Основная логика работы бота."""
+    """Основная логика работы бота.
+    Метка и последняя ошибка хранятся в STATE_DB_PATH, уведомления
+    отправляются через outbox (deliver_outbox), ожидание между опросами
+    прерывается сигналами (shutdown.GracefulShutdown).
+    """
+    from telebot import TeleBot
+    startup.TIMER.mark('imports')
     check_tokens()
+    settings.check()
     bot = TeleBot(token=TELEGRAM_TOKEN)
-    timestamp = int(time.time())
-    last_message = None
-    while True:
-        try:
-            response = get_api_answer(timestamp)
-            check_response(response)
-            homework = response['homeworks']
-            if not homework:
-                logging.info(NO_NEW_HOMEWORKS)
-                continue
-            message = parse_status(homework[0])
-            if send_message(bot, message):
-                logging.debug(MESSAGE_SUCCESSFULY_SENT)
+    metrics.start_server()
+    store = state_store.open_store(STATE_DB_PATH)
+    timestamp = store.get_cursor(TELEGRAM_CHAT_ID) or int(time.time())
+    last_message = store.get_last_error(TELEGRAM_CHAT_ID)
+    errors = error_digest.ErrorDigest()
+    index = status_index.StatusIndex(store)
+    notifier = notifiers.Notifier.from_env(
+        functools.partial(send_chat_message, bot))
+    profiler = profiling.from_env()
+    with shutdown.GracefulShutdown() as controller:
+        while True:
+            profiler.start_iteration()
+            try:
+                with profiler.phase('send'):
+                    summary = errors.summary(TELEGRAM_CHAT_ID)
+                    if summary:
+                        send_message(bot, summary)
+                    deliver_outbox(bot, store)
+                with profiler.phase('fetch'):
+                    response = get_api_answer(timestamp)
+                with profiler.phase('validate'):
+                    check_response(response)
+                homework = response['homeworks']
+                if not homework:
+                    logging.info(NO_NEW_HOMEWORKS)
+                    continue
+                with profiler.phase('parse'):
+                    changes = changed_homeworks(index, homework)
+                    statuses = parse_statuses(changes)
+                    messages = join_messages(statuses)
                 timestamp = response.get('current_date', timestamp)
-        except Exception as error:
-            message = ERROR_MESSAGE.format(error=error)
-            logging.error(message)
-            if message != last_message:
-                send_message(bot, message)
-                last_message = message
-        finally:
-            time.sleep(RETRY_PERIOD)
+                store.enqueue_messages(TELEGRAM_CHAT_ID, messages, timestamp)
+                remember_homeworks(index, changes)
+                publish_homeworks(notifier, changes, statuses)
+                with profiler.phase('send'):
+                    deliver_outbox(bot, store)
+            except Exception as error:
+                metrics.count_error(error)
+                message = ERROR_MESSAGE.format(error=error)
+                logging.error(message)
+                if (errors.record(TELEGRAM_CHAT_ID, error)
+                        and message != last_message):
+                    send_message(bot, message)
+                    last_message = message
+                    store.set_last_error(TELEGRAM_CHAT_ID, message)
+            finally:
+                store.flush()
+                profiler.end_iteration()
+                startup.TIMER.first_poll()
+                with controller.interruptible():
+                    time.sleep(RETRY_PERIOD)
+    profiler.close()
+    notifier.close(timeout=shutdown.SHUTDOWN_TIMEOUT)
+    store.close()
+    logging.info(BOT_STOPPED)
 
 
 if __name__ == '__main__':
+    if '--check' in sys.argv[1:]:
+        logging.basicConfig(level=logging.INFO, format=log_config.LOG_FORMAT)
+        try:
+            check_config()
+        except ValueError as error:
+            logging.critical(error)
+            sys.exit(1)
+        sys.exit(0)
     logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s, %(levelname)s, %(message)s',
-        handlers=[logging.FileHandler(f'{__file__}.log', encoding='UTF-8'),
-                  logging.StreamHandler(sys.stdout)])
+        level=log_config.LOG_LEVEL,
+        handlers=[log_config.build_queue_handler(f'{__file__}.log')])
+    SESSION = recording.session_from_env(http_client.create_session())
     main()
@@ -0,0 +1,32 @@
+import settings
+
+HTTP_POOL_HOSTS = settings.env_int('HTTP_POOL_HOSTS', 4)
+HTTP_POOL_SIZE = settings.env_int('HTTP_POOL_SIZE', 16)
+HTTP_TIMEOUT = (settings.env_float('HTTP_CONNECT_TIMEOUT', 5.0),
+                settings.env_float('HTTP_READ_TIMEOUT', 30.0))
+
+
+def create_session(pool_size=HTTP_POOL_SIZE, pool_hosts=HTTP_POOL_HOSTS):
+    """Создает общую HTTP-сессию с пулом keep-alive соединений.
+    Соединения с хостом после ответа возвращаются в пул и переиспользуются
+    следующими запросами, поэтому TCP- и TLS-рукопожатие выполняется один
+    раз на соединение, а не на каждый опрос. Если все соединения заняты,
+    запрос ждет свободное, а не открывает новое сверх pool_size. Поэтому
+    каждый запрос должен передавать timeout=HTTP_TIMEOUT (подключение и
+    чтение): иначе зависшее соединение навсегда займет место в пуле.
+    Args:
+        pool_size (int): число соединений с одним хостом;
+        pool_hosts (int): число хостов, для которых хранятся пулы;
+    Returns:
+        requests.Session: сессия, которую можно передавать в get_api_answer.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_hosts, pool_maxsize=pool_size,
+        pool_block=True)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Connection'] = 'keep-alive'
+    return session
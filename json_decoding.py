@@ -0,0 +1,110 @@
+import codecs
+import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+STREAM_CHUNK_SIZE = 64 * 1024
+HOMEWORKS_KEY = re.compile(r'"homeworks"\s*:\s*\[')
+SEPARATORS = ' \t\r\n,'
+
+BACKEND = 'orjson' if orjson else 'json'
+STREAM_TRUNCATED = 'Ответ API оборвался до конца списка homeworks.'
+
+
+def loads(data):
+    """Декодирует JSON самым быстрым из установленных модулей.
+    Если установлен orjson, используется он, иначе стандартный json.
+    Args:
+        data (bytes): JSON-документ;
+    Returns:
+        объект Python.
+    """
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def decode_response(response):
+    """Декодирует тело HTTP-ответа.
+    Если установлен orjson и тело доступно в виде байтов, оно декодируется
+    через orjson, иначе через response.json().
+    """
+    content = getattr(response, 'content', None)
+    if orjson and isinstance(content, (bytes, bytearray)):
+        return orjson.loads(content)
+    return response.json()
+
+
+class HomeworkStream:
+    """Потоковый разбор ответа API: работы по одной, пока тело загружается.
+    Итерация выдает элементы списка homeworks по мере прихода данных, не
+    собирая документ целиком. Остальные поля ответа (current_date, code,
+    error) после итерации доступны в атрибуте document; сам список в нем
+    пуст. В памяти одновременно держится только текущий фрагмент тела.
+    """
+
+    def __init__(self, chunks):
+        """Принимает итератор кусков тела в байтах (response.iter_content)."""
+        self.chunks = iter(chunks)
+        self.text_decoder = codecs.getincrementaldecoder('UTF-8')()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.document = None
+
+    def _read(self):
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            return False
+        self.buffer += self.text_decoder.decode(chunk)
+        return True
+
+    def _skip_separators(self):
+        while True:
+            self.buffer = self.buffer.lstrip(SEPARATORS)
+            if self.buffer or not self._read():
+                return
+
+    def _find_homeworks(self):
+        match = HOMEWORKS_KEY.search(self.buffer)
+        while not match:
+            if not self._read():
+                return None
+            match = HOMEWORKS_KEY.search(self.buffer)
+        head = self.buffer[:match.end()]
+        self.buffer = self.buffer[match.end():]
+        return head
+
+    def _decode_item(self):
+        while True:
+            try:
+                item, end = self.json_decoder.raw_decode(self.buffer)
+            except json.JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+            if end == len(self.buffer) and self._read():
+                continue
+            self.buffer = self.buffer[end:]
+            return item
+
+    def __iter__(self):
+        """Выдает работы из списка homeworks."""
+        head = self._find_homeworks()
+        if head is None:
+            self.document = json.loads(self.buffer)
+            return
+        while True:
+            self._skip_separators()
+            if not self.buffer:
+                raise ValueError(STREAM_TRUNCATED)
+            if self.buffer[0] == ']':
+                break
+            yield self._decode_item()
+        while self._read():
+            pass
+        self.document = json.loads(
+            head + self.buffer + self.text_decoder.decode(b'', final=True))
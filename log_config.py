@@ -0,0 +1,130 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+import settings
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
+LOG_JSON = os.getenv('LOG_JSON', '') not in ('', '0')
+LOG_MAX_BYTES = settings.env_int('LOG_MAX_BYTES', 10 * 1024 * 1024)
+LOG_BACKUP_COUNT = settings.env_int('LOG_BACKUP_COUNT', 5)
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN')
+LOG_FORMAT = '%(asctime)s, %(levelname)s, %(message)s'
+
+
+class LazyMessage:
+    """Сообщение лога, которое форматируется только при записи.
+    logging вызывает str() у сообщения лишь тогда, когда запись прошла
+    проверку уровня, поэтому шаблон не форматируется, если, например,
+    уровень DEBUG выключен.
+    """
+
+    __slots__ = ('template', 'kwargs')
+
+    def __init__(self, template, kwargs):
+        """Запоминает шаблон и его параметры."""
+        self.template = template
+        self.kwargs = kwargs
+
+    def __str__(self):
+        """Форматирует шаблон."""
+        return self.template.format(**self.kwargs)
+
+
+def lazy(template, **kwargs):
+    """Возвращает сообщение лога, отформатированное при записи.
+    Пример: logging.debug(lazy(MESSAGE_SENT_SUCCESSULLY, message=message)).
+    """
+    return LazyMessage(template, kwargs)
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует записи лога как JSON-строки (JSON Lines)."""
+
+    def format(self, record):
+        """Возвращает запись в виде одной JSON-строки."""
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Кладет записи в очередь без форматирования.
+    Стандартный QueueHandler форматирует сообщение в вызывающем потоке;
+    здесь очередь не покидает процесс, поэтому запись передается как есть,
+    а форматирование и запись в файл выполняет фоновый поток.
+    """
+
+    def prepare(self, record):
+        """Возвращает запись без изменений."""
+        return record
+
+
+class BackgroundListener(logging.handlers.QueueListener):
+    """Фоновый поток записи лога, который можно останавливать повторно."""
+
+    def stop(self):
+        """Записывает остаток очереди и останавливает поток, если он идет."""
+        if self._thread is not None:
+            super().stop()
+
+
+def build_file_handler(path, max_bytes=LOG_MAX_BYTES,
+                       backup_count=LOG_BACKUP_COUNT, when=LOG_ROTATE_WHEN):
+    """Создает файловый обработчик с ротацией.
+    Args:
+        path (str): путь к файлу лога;
+        max_bytes (int): размер файла, после которого он ротируется;
+        backup_count (int): сколько старых файлов хранить;
+        when (str): период ротации по времени ('midnight', 'H' и т. п.);
+            если задан, ротация идет по времени, а не по размеру;
+    Returns:
+        logging.Handler.
+    """
+    if when:
+        return logging.handlers.TimedRotatingFileHandler(
+            path, when=when, backupCount=backup_count, encoding='UTF-8')
+    return logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backup_count,
+        encoding='UTF-8')
+
+
+def build_queue_handler(path, json_lines=LOG_JSON, stream=sys.stdout):
+    """Создает неблокирующий обработчик лога.
+    Записи попадают в очередь в памяти, а в файл с ротацией и в stream их
+    пишет фоновый поток QueueListener, поэтому ввод-вывод лога не задерживает
+    опрос. Поток останавливается (с записью остатка очереди) при выходе
+    из программы.
+    Args:
+        path (str): путь к файлу лога;
+        json_lines (bool): писать записи в формате JSON Lines;
+        stream: поток для вывода в консоль или None;
+    Returns:
+        DeferredQueueHandler для logging.basicConfig; фоновый поток
+        доступен в его атрибуте listener.
+    """
+    formatter = (JsonFormatter() if json_lines
+                 else logging.Formatter(LOG_FORMAT))
+    handlers = [build_file_handler(path)]
+    if stream is not None:
+        handlers.append(logging.StreamHandler(stream))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    log_queue = queue.SimpleQueue()
+    listener = BackgroundListener(
+        log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.listener = listener
+    return queue_handler
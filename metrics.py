@@ -0,0 +1,238 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import settings
+
+METRICS_PORT = settings.env_int('METRICS_PORT', 0)
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+METRICS_SERVER_STARTED = 'Метрики доступны на http://{host}:{port}/metrics.'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def format_labels(labels):
+    """Форматирует метки в виде {name="value",...} для формата Prometheus."""
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('"', '\\"'))
+        for name, value in labels)
+    return '{' + pairs + '}'
+
+
+class Metric:
+    """Базовая метрика: значения по наборам меток."""
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation):
+        """Создает метрику без значений."""
+        self.name = name
+        self.documentation = documentation
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def header(self):
+        """Возвращает строки HELP и TYPE."""
+        return [f'# HELP {self.name} {self.documentation}',
+                f'# TYPE {self.name} {self.kind}']
+
+    def samples(self):
+        """Возвращает пары (имя с метками, значение)."""
+        with self.lock:
+            return [(self.name + format_labels(labels), value)
+                    for labels, value in self.values.items()]
+
+    def render(self):
+        """Возвращает метрику в текстовом формате Prometheus."""
+        return self.header() + [
+            f'{name} {value}' for name, value in self.samples()]
+
+
+class Counter(Metric):
+    """Монотонно растущий счетчик."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """Увеличивает счетчик для набора меток."""
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Значение, которое может и расти, и убывать."""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        """Устанавливает значение для набора меток."""
+        with self.lock:
+            self.values[tuple(sorted(labels.items()))] = value
+
+
+class Histogram(Metric):
+    """Гистограмма длительностей с фиксированными границами корзин."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS):
+        """Создает гистограмму с границами buckets (в секундах)."""
+        super().__init__(name, documentation)
+        self.buckets = buckets
+
+    def observe(self, value, **labels):
+        """Учитывает одно наблюдение."""
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [0] * (len(self.buckets) + 2)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Контекстный менеджер: измеряет длительность блока."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        """Возвращает корзины, сумму и число наблюдений."""
+        samples = []
+        with self.lock:
+            items = [(labels, list(counts))
+                     for labels, counts in self.values.items()]
+        for labels, counts in items:
+            cumulative = 0
+            bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                samples.append((
+                    self.name + '_bucket'
+                    + format_labels(labels + (('le', bound),)),
+                    cumulative))
+            samples.append(
+                (self.name + '_sum' + format_labels(labels), counts[-1]))
+            samples.append(
+                (self.name + '_count' + format_labels(labels), cumulative))
+        return samples
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        """Создает пустой набор."""
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric):
+        """Добавляет метрику в набор и возвращает ее."""
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """Добавляет функцию, обновляющую метрики перед выгрузкой.
+        Так заполняются значения, которые дешевле прочитать по запросу,
+        чем обновлять на каждом шаге: размеры очередей, число пользователей.
+        Возвращает collector, чтобы его можно было убрать remove_collector.
+        """
+        self.collectors.append(collector)
+        return collector
+
+    def remove_collector(self, collector):
+        """Убирает функцию, добавленную add_collector."""
+        if collector in self.collectors:
+            self.collectors.remove(collector)
+
+    def render(self):
+        """Возвращает все метрики в текстовом формате Prometheus."""
+        for collector in self.collectors:
+            collector()
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+API_LATENCY = REGISTRY.register(Histogram(
+    'homework_api_request_seconds',
+    'Длительность запроса к API Практикума.'))
+SEND_LATENCY = REGISTRY.register(Histogram(
+    'homework_telegram_send_seconds',
+    'Длительность отправки сообщения в Telegram.'))
+ERRORS = REGISTRY.register(Counter(
+    'homework_errors_total', 'Ошибки по классам исключений.'))
+LOOP_LAG = REGISTRY.register(Gauge(
+    'homework_loop_lag_seconds',
+    'Опоздание итерации цикла опроса относительно срока.'))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    'homework_queue_depth', 'Число элементов в очередях.'))
+ACTIVE_TENANTS = REGISTRY.register(Gauge(
+    'homework_active_tenants', 'Число опрашиваемых пользователей.'))
+FINGERPRINT_CACHE = REGISTRY.register(Gauge(
+    'homework_fingerprint_cache',
+    'Попадания, промахи и размер кеша отпечатков ответов API.'))
+STARTUP_SECONDS = REGISTRY.register(Gauge(
+    'homework_startup_seconds',
+    'Время от запуска процесса до окончания этапа запуска.'))
+
+
+def count_error(error):
+    """Учитывает исключение в счетчике ошибок по имени его класса."""
+    ERRORS.inc(exception=type(error).__name__)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Отдает метрики по адресу /metrics."""
+
+    registry = REGISTRY
+
+    def do_GET(self):
+        """Обрабатывает GET-запрос."""
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('UTF-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Не пишет в лог каждый запрос к метрикам."""
+
+
+def start_server(port=METRICS_PORT, host=METRICS_HOST, registry=REGISTRY,
+                 handler=MetricsHandler):
+    """Запускает HTTP-сервер метрик в фоновом потоке.
+    Args:
+        port (int): порт; 0 - сервер не запускается;
+        host (str): адрес, по умолчанию только локальный;
+        registry (Registry): выгружаемый набор метрик;
+        handler: класс обработчика запросов, наследник MetricsHandler;
+    Returns:
+        ThreadingHTTPServer или None.
+    """
+    if not port:
+        return None
+    handler = type('Handler', (handler,), {'registry': registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(
+        target=server.serve_forever, name='metrics', daemon=True).start()
+    logging.info(METRICS_SERVER_STARTED.format(
+        host=host, port=server.server_address[1]))
+    return server
@@ -0,0 +1,289 @@
+import abc
+import concurrent.futures
+import json
+import logging
+import os
+import threading
+import time
+
+import exceptions
+import metrics
+import settings
+
+NOTIFY_SINKS = os.getenv('NOTIFY_SINKS', '')
+NOTIFY_TIMEOUT = settings.env_float('NOTIFY_TIMEOUT', 5.0)
+NOTIFY_MAX_PENDING = settings.env_int('NOTIFY_MAX_PENDING', 1000)
+
+SINK_FAILED = 'Приемник {sink} не принял событие: {error}'
+SINK_DROPPED = ('Очередь приемника {sink} заполнена ({limit} событий), '
+                'событие пропущено.')
+SINK_SLOW = ('Приемник {sink} обрабатывал событие {elapsed:.1f} с '
+             '(лимит {timeout} с).')
+NOTIFY_CLOSE_TIMED_OUT = ('Рассылка не завершилась к сроку остановки, '
+                          'недоставленных событий: {pending}.')
+SINK_UNKNOWN = 'Неизвестный тип приемника уведомлений: {kind}.'
+SINK_SPEC_INVALID = ('Некорректное описание приемника «{spec}»: ожидается '
+                     'тип=адрес[@таймаут].')
+TELEGRAM_NOT_SENT = 'Сообщение в чат {chat_id} не отправлено.'
+
+NOTIFY_EVENTS = metrics.REGISTRY.register(metrics.Counter(
+    'homework_notify_events_total',
+    'События, переданные приемникам уведомлений, по результату.'))
+NOTIFY_LATENCY = metrics.REGISTRY.register(metrics.Histogram(
+    'homework_notify_seconds', 'Длительность доставки события приемнику.'))
+
+SINK_TYPES = {}
+
+
+def register_sink(kind):
+    """Декоратор: регистрирует класс приемника под типом kind.
+    Зарегистрированный тип можно указывать в NOTIFY_SINKS.
+    """
+    def decorator(cls):
+        SINK_TYPES[kind] = cls
+        return cls
+    return decorator
+
+
+def status_event(chat_id, homework_id, name, status, date_updated, message):
+    """Собирает событие об изменении статуса работы.
+    Returns:
+        dict: событие для приемников; message - готовый текст уведомления.
+    """
+    return {'chat_id': chat_id, 'homework_id': homework_id,
+            'homework_name': name, 'status': status,
+            'date_updated': date_updated, 'message': message}
+
+
+class Sink(abc.ABC):
+    """Приемник уведомлений.
+    Подклассы реализуют send: метод блокирующий, выполняется в потоке
+    приемника и при ошибке выбрасывает исключение. Сетевые приемники
+    передают timeout в запрос. Приемникам с uses_send parse_sinks
+    передает функцию отправки бота.
+    """
+
+    kind = 'sink'
+    uses_send = False
+
+    def __init__(self, target, timeout=NOTIFY_TIMEOUT):
+        """Запоминает адрес приемника и таймаут доставки."""
+        self.target = target
+        self.timeout = timeout
+        self.name = f'{type(self).kind}:{target}'
+
+    @abc.abstractmethod
+    def send(self, event):
+        """Доставляет событие."""
+
+    def close(self):
+        """Освобождает ресурсы приемника."""
+
+
+@register_sink('telegram')
+class TelegramSink(Sink):
+    """Дополнительный Telegram-чат: получает текст уведомления.
+    Сообщение уходит через функцию отправки бота send(chat_id, текст,
+    таймаут), а не напрямую, чтобы на него действовали те же лимиты
+    частоты и повторы, что и на уведомления пользователей. Функция
+    ждет отправки не дольше таймаута приемника.
+    """
+
+    kind = 'telegram'
+    uses_send = True
+
+    def __init__(self, target, timeout=NOTIFY_TIMEOUT, send=None):
+        """Запоминает чат и функцию отправки."""
+        super().__init__(target, timeout)
+        self.send_message = send
+
+    def send(self, event):
+        """Отправляет текст события в чат."""
+        if not self.send_message(
+                self.target, event['message'], self.timeout):
+            raise exceptions.TelegramConnectionError(
+                TELEGRAM_NOT_SENT.format(chat_id=self.target))
+
+
+@register_sink('webhook')
+class WebhookSink(Sink):
+    """Внутренний webhook: получает событие POST-запросом в JSON."""
+
+    kind = 'webhook'
+
+    def __init__(self, target, timeout=NOTIFY_TIMEOUT):
+        """Готовит отдельную HTTP-сессию приемника."""
+        super().__init__(target, timeout)
+        self.session = None
+
+    def send(self, event):
+        """Отправляет событие; ответ не 2xx считается ошибкой."""
+        if self.session is None:
+            import requests
+            self.session = requests.Session()
+        response = self.session.post(
+            self.target, json=event, timeout=self.timeout)
+        response.raise_for_status()
+
+    def close(self):
+        """Закрывает HTTP-сессию."""
+        if self.session is not None:
+            self.session.close()
+
+
+@register_sink('jsonl')
+class JsonLinesSink(Sink):
+    """Файл аудита: каждое событие - строка JSON с временем получения."""
+
+    kind = 'jsonl'
+
+    def __init__(self, target, timeout=NOTIFY_TIMEOUT):
+        """Открывает файл на дозапись."""
+        super().__init__(target, timeout)
+        self.file = open(target, 'a', encoding='UTF-8')
+
+    def send(self, event):
+        """Дописывает событие в файл."""
+        record = dict(event, time=time.time())
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.file.flush()
+
+    def close(self):
+        """Закрывает файл."""
+        self.file.close()
+
+
+def parse_sinks(spec, send=None):
+    """Создает приемники по описанию NOTIFY_SINKS.
+    Описание - элементы «тип=адрес[@таймаут]» через точку с запятой,
+    например «webhook=http://hooks/homework@2; jsonl=audit.jsonl;
+    telegram=-100123».
+    Args:
+        spec (str): описание приемников;
+        send: функция send(chat_id, текст, таймаут) -> bool для
+            приемников с uses_send (telegram);
+    Returns:
+        list: приемники.
+    """
+    sinks = []
+    for item in filter(None, (part.strip() for part in spec.split(';'))):
+        kind, separator, target = item.partition('=')
+        if not separator or not target:
+            raise ValueError(SINK_SPEC_INVALID.format(spec=item))
+        if kind not in SINK_TYPES:
+            raise ValueError(SINK_UNKNOWN.format(kind=kind))
+        timeout = NOTIFY_TIMEOUT
+        address, at, suffix = target.rpartition('@')
+        if at and suffix.replace('.', '', 1).isdigit():
+            target, timeout = address, float(suffix)
+        sink_type = SINK_TYPES[kind]
+        if sink_type.uses_send:
+            sinks.append(sink_type(target, timeout, send=send))
+        else:
+            sinks.append(sink_type(target, timeout))
+    return sinks
+
+
+class Notifier:
+    """Рассылка событий о статусах по дополнительным приемникам.
+    У каждого приемника свой поток и своя ограниченная очередь, поэтому
+    медленный или недоступный приемник не задерживает остальные и цикл
+    опроса: publish только ставит событие в очереди. Если в очереди
+    приемника уже max_pending событий, новое пропускается. Доставка
+    без повторов; результаты (ok, error, timeout, dropped) учитываются по
+    каждому приемнику в stats и в метрике homework_notify_events_total.
+    Доставка, занявшая дольше таймаута приемника, считается timeout.
+    """
+
+    def __init__(self, sinks=(), max_pending=NOTIFY_MAX_PENDING):
+        """Запускает по одному потоку на приемник."""
+        self.sinks = list(sinks)
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.pending = {sink.name: 0 for sink in self.sinks}
+        self.results = {sink.name: dict.fromkeys(
+            ('ok', 'error', 'timeout', 'dropped'), 0) for sink in self.sinks}
+        self.executors = {
+            sink.name: concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f'notify-{sink.kind}')
+            for sink in self.sinks}
+
+    @classmethod
+    def from_env(cls, send=None):
+        """Создает рассылку по переменной окружения NOTIFY_SINKS.
+        send - функция отправки бота для приемников telegram.
+        """
+        return cls(parse_sinks(NOTIFY_SINKS, send))
+
+    def __bool__(self):
+        """Истинна, если есть хотя бы один приемник."""
+        return bool(self.sinks)
+
+    def publish(self, event):
+        """Передает событие всем приемникам, не дожидаясь доставки."""
+        for sink in self.sinks:
+            with self.lock:
+                if self.pending[sink.name] >= self.max_pending:
+                    self._account(sink, 'dropped')
+                    logging.warning(SINK_DROPPED.format(
+                        sink=sink.name, limit=self.max_pending))
+                    continue
+                self.pending[sink.name] += 1
+            self.executors[sink.name].submit(self._deliver, sink, event)
+
+    def _account(self, sink, result):
+        self.results[sink.name][result] += 1
+        NOTIFY_EVENTS.inc(sink=sink.kind, result=result)
+
+    def _deliver(self, sink, event):
+        started = time.monotonic()
+        try:
+            sink.send(event)
+            result = 'ok'
+        except Exception as error:
+            metrics.count_error(error)
+            logging.warning(SINK_FAILED.format(sink=sink.name, error=error))
+            result = 'error'
+        elapsed = time.monotonic() - started
+        NOTIFY_LATENCY.observe(elapsed, sink=sink.kind)
+        if result == 'ok' and elapsed > sink.timeout:
+            logging.warning(SINK_SLOW.format(
+                sink=sink.name, elapsed=elapsed, timeout=sink.timeout))
+            result = 'timeout'
+        with self.lock:
+            self.pending[sink.name] -= 1
+            self._account(sink, result)
+
+    def stats(self):
+        """Возвращает результаты доставки и очереди по приемникам.
+        Returns:
+            dict: по имени приемника - счетчики результатов и pending.
+        """
+        with self.lock:
+            return {name: dict(results, pending=self.pending[name])
+                    for name, results in self.results.items()}
+
+    def close(self, wait=True, timeout=None):
+        """Дожидается доставки поставленных событий и закрывает приемники.
+        Если задан timeout, события, не доставленные за timeout секунд,
+        отбрасываются: ждать остается только уже начатые доставки, а их
+        ограничивает таймаут приемника.
+        """
+        if timeout is not None:
+            self._wait_pending(time.monotonic() + timeout)
+            wait = False
+        for executor in self.executors.values():
+            executor.shutdown(wait=wait, cancel_futures=timeout is not None)
+        for sink in self.sinks:
+            sink.close()
+
+    def _wait_pending(self, deadline):
+        markers = [executor.submit(lambda: None)
+                   for executor in self.executors.values()]
+        for marker in markers:
+            try:
+                marker.result(max(0.0, deadline - time.monotonic()))
+            except concurrent.futures.TimeoutError:
+                logging.warning(NOTIFY_CLOSE_TIMED_OUT.format(
+                    pending=sum(self.pending.values())))
+                return
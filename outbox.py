@@ -0,0 +1,66 @@
+import logging
+import time
+
+import settings
+
+OUTBOX_MAX_ATTEMPTS = settings.env_int('OUTBOX_MAX_ATTEMPTS', 50)
+OUTBOX_RETRY_BASE = 5.0
+OUTBOX_RETRY_MAX = 600.0
+OUTBOX_POLL_INTERVAL = 1.0
+
+MESSAGE_POSTPONED = ('Уведомление {message_id} для {tenant} не отправлено '
+                     '(попытка {attempts}), повтор через {delay:.0f} с.')
+MESSAGE_DROPPED = ('Уведомление {message_id} для {tenant} не отправлено '
+                   'за {attempts} попыток и удалено: {message}')
+
+
+def retry_delay(attempts, base=OUTBOX_RETRY_BASE, cap=OUTBOX_RETRY_MAX):
+    """Возвращает паузу перед повторной отправкой: экспонента с потолком."""
+    return min(cap, base * 2 ** (attempts - 1))
+
+
+def settle(store, entry, sent, now=None):
+    """Учитывает результат отправки уведомления из outbox.
+    Отправленное уведомление удаляется, неотправленное откладывается с
+    растущей паузой, а после OUTBOX_MAX_ATTEMPTS попыток удаляется с
+    записью в лог.
+    Args:
+        store: хранилище состояния;
+        entry (tuple): (id, пользователь, текст, число попыток);
+        sent (bool): отправлено ли уведомление;
+        now (float): текущее время (time.time());
+    """
+    message_id, tenant, message, attempts = entry
+    if sent:
+        store.ack_message(message_id)
+        return
+    attempts += 1
+    if attempts >= OUTBOX_MAX_ATTEMPTS:
+        logging.error(MESSAGE_DROPPED.format(
+            message_id=message_id, tenant=tenant, attempts=attempts,
+            message=message))
+        store.ack_message(message_id)
+        return
+    delay = retry_delay(attempts)
+    logging.warning(MESSAGE_POSTPONED.format(
+        message_id=message_id, tenant=tenant, attempts=attempts,
+        delay=delay))
+    store.retry_message(
+        message_id, attempts, (now or time.time()) + delay)
+
+
+def deliver_pending(store, send, tenant=None):
+    """Отправляет все уведомления outbox, которые пора отправить.
+    Уведомления пользователя уходят по порядку: пока самое старое не
+    отправлено, следующие ждут.
+    Args:
+        store: хранилище состояния;
+        send: функция send(текст) -> bool;
+        tenant (str): отправлять только уведомления этого пользователя;
+    """
+    while True:
+        due = store.due_messages(time.time(), tenant=tenant)
+        if not due:
+            return
+        for entry in due:
+            settle(store, entry, send(entry[2]))
@@ -0,0 +1,166 @@
+import contextlib
+import cProfile
+import glob
+import json
+import logging
+import os
+import time
+import tracemalloc
+
+import log_config
+import settings
+
+PROFILE_CPU_EVERY = settings.env_int('PROFILE_CPU_EVERY', 0)
+PROFILE_MEMORY_EVERY = settings.env_int('PROFILE_MEMORY_EVERY', 0)
+PROFILE_PHASES = os.getenv('PROFILE_PHASES', '') not in ('', '0')
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_KEEP = settings.env_int('PROFILE_KEEP', 20)
+MEMORY_TOP = 25
+MEMORY_FRAMES = 10
+
+PROFILE_WRITTEN = 'Профиль итерации {iteration} записан в {path}.'
+
+NULL_CONTEXT = contextlib.nullcontext()
+
+
+class NullProfiler:
+    """Выключенное профилирование: все методы ничего не делают.
+    phase возвращает один и тот же пустой контекст, так что цикл опроса
+    не создает объектов и не читает часы.
+    """
+
+    def start_iteration(self):
+        """Ничего не делает."""
+
+    def end_iteration(self):
+        """Ничего не делает."""
+
+    def phase(self, name):
+        """Возвращает пустой контекст."""
+        return NULL_CONTEXT
+
+    def close(self):
+        """Ничего не делает."""
+
+
+class Profiler(NullProfiler):
+    """Профилирование итераций цикла опроса main().
+    cpu_every - каждая такая итерация снимается cProfile в файл
+    cpu-<итерация>.prof (смотреть через pstats или snakeviz);
+    memory_every - раз в столько итераций разница снимков tracemalloc с
+    предыдущим снимком записывается в лог профилирования (MEMORY_TOP
+    строк кода с наибольшим приростом памяти); phases - время этапов
+    итерации (fetch, validate, parse, send) пишется в тот же лог строкой
+    JSON. Лог profile.log ротируется по размеру, из файлов .prof хранятся
+    последние keep.
+    """
+
+    def __init__(self, cpu_every=0, memory_every=0, phases=False,
+                 directory=PROFILE_DIR, keep=PROFILE_KEEP):
+        """Готовит каталог и лог профилирования."""
+        self.cpu_every = cpu_every
+        self.memory_every = memory_every
+        self.phases = phases
+        self.directory = directory
+        self.keep = keep
+        self.iteration = 0
+        self.profile = None
+        self.snapshot = None
+        self.started = None
+        self.timings = {}
+        os.makedirs(directory, exist_ok=True)
+        self.logger = logging.getLogger('homework.profile')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+            handler.close()
+        self.logger.addHandler(log_config.build_file_handler(
+            os.path.join(directory, 'profile.log')))
+        self.tracing = bool(memory_every) and not tracemalloc.is_tracing()
+        if self.tracing:
+            tracemalloc.start(MEMORY_FRAMES)
+
+    def start_iteration(self):
+        """Начинает итерацию: включает cProfile, если она выбрана."""
+        self.iteration += 1
+        self.timings = {}
+        self.started = time.perf_counter()
+        if self.cpu_every and self.iteration % self.cpu_every == 0:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    def end_iteration(self):
+        """Завершает итерацию и записывает собранные данные."""
+        if self.started is None:
+            return
+        total = time.perf_counter() - self.started
+        self.started = None
+        if self.profile is not None:
+            self.profile.disable()
+            self.write_profile()
+        if self.memory_every and self.iteration % self.memory_every == 0:
+            self.write_memory_diff()
+        if self.phases:
+            self.logger.info(json.dumps({
+                'iteration': self.iteration, 'total': round(total, 6),
+                'phases': {name: round(seconds, 6)
+                           for name, seconds in self.timings.items()}}))
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Измеряет время этапа итерации."""
+        if not self.phases:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = (self.timings.get(name, 0.0)
+                                  + time.perf_counter() - started)
+
+    def write_profile(self):
+        """Сохраняет профиль cProfile и удаляет лишние старые файлы."""
+        path = os.path.join(
+            self.directory, f'cpu-{self.iteration:08d}.prof')
+        self.profile.dump_stats(path)
+        self.profile = None
+        self.logger.info(PROFILE_WRITTEN.format(
+            iteration=self.iteration, path=path))
+        files = sorted(glob.glob(os.path.join(self.directory, 'cpu-*.prof')))
+        for old in files[:max(0, len(files) - self.keep)]:
+            os.remove(old)
+
+    def write_memory_diff(self):
+        """Записывает прирост памяти с предыдущего снимка tracemalloc."""
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),))
+        if self.snapshot is not None:
+            lines = [str(stat) for stat in snapshot.compare_to(
+                self.snapshot, 'lineno')[:MEMORY_TOP]]
+            self.logger.info(json.dumps(
+                {'iteration': self.iteration, 'memory': lines},
+                ensure_ascii=False))
+        self.snapshot = snapshot
+
+    def close(self):
+        """Останавливает tracemalloc и закрывает лог профилирования."""
+        if self.tracing:
+            tracemalloc.stop()
+            self.tracing = False
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+            handler.close()
+
+
+def from_env():
+    """Создает профилировщик по переменным окружения.
+    PROFILE_CPU_EVERY=N - cProfile каждой N-й итерации,
+    PROFILE_MEMORY_EVERY=N - разница снимков памяти раз в N итераций,
+    PROFILE_PHASES=1 - время этапов. Если ничего не задано, возвращается
+    NullProfiler, и профилирование ничего не стоит.
+    """
+    if not (PROFILE_CPU_EVERY or PROFILE_MEMORY_EVERY or PROFILE_PHASES):
+        return NullProfiler()
+    return Profiler(PROFILE_CPU_EVERY, PROFILE_MEMORY_EVERY, PROFILE_PHASES)
@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Ограничитель частоты по алгоритму token bucket.
+    Ведро вмещает capacity жетонов и пополняется со скоростью rate жетонов
+    в секунду. Каждое действие забирает жетон; если жетонов нет, действие
+    ждет, пока ведро пополнится.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """Создает полное ведро; по умолчанию емкость равна rate."""
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now=None):
+        """Забирает жетон и возвращает, сколько секунд нужно подождать.
+        Жетон резервируется сразу, даже если его еще нет, поэтому
+        одновременные вызовы получают разные задержки и не превышают rate.
+        """
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def pause(self, seconds, now=None):
+        """Не выдает жетонов ближайшие seconds секунд.
+        Следующий reserve получит задержку не меньше seconds, например
+        после ответа Telegram 429 с retry_after.
+        """
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+    async def acquire(self):
+        """Корутина: ждет, пока появится жетон."""
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
@@ -0,0 +1,192 @@
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from http import HTTPStatus
+
+API_RECORD = os.getenv('API_RECORD')
+API_REPLAY = os.getenv('API_REPLAY')
+API_REPLAY_SPEED = os.getenv('API_REPLAY_SPEED', '1')
+REDACTED = '***'
+
+REPLAY_EMPTY = 'В записи {path} нет ответов API.'
+REPLAY_SPEED_INVALID = ('Некорректная скорость воспроизведения «{value}»: '
+                        'ожидается положительное число или max.')
+
+
+def tenant_key(headers):
+    """Возвращает обезличенный ключ пользователя по заголовкам запроса.
+    Токен в запись не попадает: вместо него хранится короткий хеш, по
+    которому при воспроизведении ответы раздаются тем же пользователям.
+    """
+    authorization = (headers or {}).get('Authorization', '')
+    return hashlib.blake2b(
+        authorization.encode('UTF-8'), digest_size=6).hexdigest()
+
+
+def redact(text, headers):
+    """Заменяет токен из заголовка Authorization в тексте на ***."""
+    token = (headers or {}).get('Authorization', '').partition(' ')[2]
+    return text.replace(token, REDACTED) if token else text
+
+
+def parse_speed(value):
+    """Разбирает скорость воспроизведения: число (1, 10) или max.
+    Returns:
+        float: множитель скорости; 0 - без пауз.
+    """
+    if str(value).lower() == 'max':
+        return 0.0
+    try:
+        speed = float(value)
+    except ValueError:
+        speed = -1.0
+    if speed <= 0:
+        raise ValueError(REPLAY_SPEED_INVALID.format(value=value))
+    return speed
+
+
+class RecordingSession:
+    """HTTP-сессия, записывающая ответы API Практикума.
+    Запросы выполняются через session (или requests), а параметры запроса,
+    код и тело ответа, задержка и время от начала записи дописываются в
+    файл path строкой JSON. Файл сжат gzip; токены в него не попадают -
+    вместо заголовка Authorization хранится хеш (tenant_key), а токен в
+    теле ответа заменяется на ***. Сессию можно
+    передать в get_api_answer через SESSION или в движок параметром
+    session; запись безопасна для потоков.
+    """
+
+    def __init__(self, path, session=None, clock=time.monotonic):
+        """Открывает файл записи на дозапись."""
+        self.session = session
+        self.clock = clock
+        self.started = clock()
+        self.lock = threading.Lock()
+        self.file = gzip.open(path, 'at', encoding='UTF-8')
+
+    def get(self, url, headers=None, params=None, stream=False, **kwargs):
+        """Выполняет запрос и записывает ответ."""
+        if self.session is None:
+            import requests
+            self.session = requests
+        started = self.clock()
+        response = self.session.get(
+            url, headers=headers, params=params, stream=stream, **kwargs)
+        body = response.content
+        record = {
+            'offset': round(started - self.started, 3),
+            'latency': round(self.clock() - started, 3),
+            'tenant': tenant_key(headers),
+            'params': params,
+            'status': response.status_code,
+            'body': redact(body.decode('UTF-8', errors='replace'), headers),
+        }
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        with self.lock:
+            self.file.write(line + '\n')
+        return response
+
+    def close(self):
+        """Дописывает и закрывает файл записи."""
+        with self.lock:
+            self.file.close()
+        if self.session is not None and hasattr(self.session, 'close'):
+            self.session.close()
+
+
+class ReplayResponse:
+    """Ответ из записи с тем же интерфейсом, что у requests.Response."""
+
+    def __init__(self, status_code, content):
+        """Запоминает код и тело ответа."""
+        self.status_code = status_code
+        self.content = content
+
+    @property
+    def ok(self):
+        """Истинен для кода меньше 400."""
+        return self.status_code < HTTPStatus.BAD_REQUEST
+
+    def json(self):
+        """Декодирует тело как JSON."""
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=1):
+        """Выдает тело частями по chunk_size байт."""
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        """Ничего не освобождает: тело уже в памяти."""
+
+
+class ReplaySession:
+    """HTTP-сессия, воспроизводящая записанные ответы API без сети.
+    Каждый пользователь (по хешу токена) получает свои записанные ответы
+    по порядку, пользователь, которого нет в записи, - ответы всех
+    пользователей подряд; исчерпав запись, сессия начинает ее сначала.
+    При speed=1 ответ выдается в тот же момент от начала воспроизведения,
+    что и при записи, с той же задержкой, при speed=N - в N раз быстрее,
+    при speed=0 (max) - сразу.
+    """
+
+    def __init__(self, path, speed=1.0, clock=time.monotonic,
+                 sleep=time.sleep):
+        """Загружает запись из файла path."""
+        with gzip.open(path, 'rt', encoding='UTF-8') as file:
+            self.records = [json.loads(line) for line in file if line.strip()]
+        if not self.records:
+            raise ValueError(REPLAY_EMPTY.format(path=path))
+        self.duration = max(
+            record['offset'] + record['latency'] for record in self.records)
+        self.by_tenant = defaultdict(list)
+        for record in self.records:
+            self.by_tenant[record['tenant']].append(record)
+        self.speed = speed
+        self.clock = clock
+        self.sleep = sleep
+        self.started = clock()
+        self.positions = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def next_record(self, key):
+        """Возвращает следующую запись пользователя и номер круга."""
+        records = self.by_tenant.get(key, self.records)
+        with self.lock:
+            position = self.positions[key]
+            self.positions[key] = position + 1
+        return records[position % len(records)], position // len(records)
+
+    def get(self, url, headers=None, params=None, stream=False, **kwargs):
+        """Возвращает следующий записанный ответ пользователя."""
+        record, cycle = self.next_record(tenant_key(headers))
+        if self.speed:
+            due = (cycle * self.duration + record['offset']
+                   + record['latency']) / self.speed
+            delay = self.started + due - self.clock()
+            if delay > 0:
+                self.sleep(delay)
+        return ReplayResponse(record['status'], record['body'].encode('UTF-8'))
+
+    def close(self):
+        """Ничего не освобождает: соединений нет."""
+
+
+def session_from_env(session=None):
+    """Оборачивает сессию по переменным окружения.
+    API_REPLAY=<файл> - ответы берутся из записи со скоростью
+    API_REPLAY_SPEED (1, N или max); API_RECORD=<файл> - ответы
+    записываются. Без них сессия возвращается как есть.
+    """
+    if API_REPLAY:
+        return ReplaySession(API_REPLAY, parse_speed(API_REPLAY_SPEED))
+    if API_RECORD:
+        recorder = RecordingSession(API_RECORD, session)
+        atexit.register(recorder.close)
+        return recorder
+    return session
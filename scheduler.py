@@ -0,0 +1,171 @@
+import random
+from array import array
+
+SCHEDULER_TICK = 1.0
+SCHEDULER_SLOTS = 1024
+
+
+class TimingWheel:
+    """Хешированное колесо таймеров для сроков опроса.
+    Время разбито на тики длиной tick секунд, тики - по кругу на slots
+    ячеек. Срок попадает в ячейку своего тика, поэтому добавление, перенос
+    и отмена стоят O(1), а продвижение колеса просматривает только
+    ячейки прошедших тиков. Сроки дальше одного оборота колеса остаются в
+    ячейке и срабатывают на нужном обороте.
+    Ключ - любое хешируемое значение, например индекс пользователя.
+    """
+
+    def __init__(self, now, tick=SCHEDULER_TICK, slots=SCHEDULER_SLOTS):
+        """Создает пустое колесо, текущим временем считается now."""
+        self.tick = tick
+        self.slots = [{} for _ in range(slots)]
+        self.positions = {}
+        self.current_tick = self._tick_of(now)
+        self.expired = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+
+    def __len__(self):
+        """Возвращает число запланированных сроков."""
+        return len(self.positions)
+
+    def _tick_of(self, moment):
+        return int(moment // self.tick)
+
+    def schedule(self, key, deadline):
+        """Планирует срок deadline для ключа, заменяя прежний."""
+        self.cancel(key)
+        slot = max(self._tick_of(deadline), self.current_tick) % len(
+            self.slots)
+        self.slots[slot][key] = deadline
+        self.positions[key] = slot
+
+    def scheduled(self):
+        """Возвращает список ключей, для которых запланирован срок."""
+        return list(self.positions)
+
+    def cancel(self, key):
+        """Отменяет срок для ключа, если он был запланирован."""
+        slot = self.positions.pop(key, None)
+        if slot is not None:
+            del self.slots[slot][key]
+
+    def spread(self, keys, now, period, jitter=0.0):
+        """Равномерно раскладывает первые сроки ключей по окну period.
+        Случайный сдвиг до jitter секунд не дает пользователям с соседними
+        позициями опрашивать API синхронно.
+        Args:
+            keys (list): ключи в порядке раскладки;
+            now (float): начало окна;
+            period (float): длина окна;
+            jitter (float): максимальный случайный сдвиг;
+        """
+        count = len(keys) or 1
+        for position, key in enumerate(keys):
+            self.schedule(
+                key,
+                now + period * position / count + random.uniform(0, jitter))
+
+    def advance(self, now):
+        """Продвигает колесо до момента now.
+        Args:
+            now (float): текущее время;
+        Returns:
+            list: ключи, срок которых наступил.
+        """
+        target_tick = self._tick_of(now)
+        ticks = min(target_tick - self.current_tick + 1, len(self.slots))
+        due = []
+        for offset in range(ticks):
+            slot_index = (self.current_tick + offset) % len(self.slots)
+            slot = self.slots[slot_index]
+            expired = [key for key, deadline in slot.items()
+                       if deadline <= now]
+            for key in expired:
+                lag = now - slot.pop(key)
+                del self.positions[key]
+                self.lag_total += lag
+                self.lag_max = max(self.lag_max, lag)
+            due.extend(expired)
+        self.expired += len(due)
+        self.current_tick = target_tick
+        return due
+
+    def stats(self):
+        """Возвращает статистику колеса: число сроков и опоздание таймеров.
+        Returns:
+            dict: pending, expired, lag_avg и lag_max (в секундах).
+        """
+        return {
+            'pending': len(self),
+            'expired': self.expired,
+            'lag_avg': self.lag_total / self.expired if self.expired else 0.0,
+            'lag_max': self.lag_max,
+        }
+
+
+class IndexedTimingWheel(TimingWheel):
+    """Колесо таймеров для ключей 0..capacity-1 с массивами вместо словарей.
+    Сроки и номера ячеек хранятся в массивах double и int32 по ключу, а
+    ячейки - множествами ключей, поэтому на запланированный ключ
+    приходится несколько десятков байт вместо объекта float и двух
+    записей словарей. Поведение то же, что у TimingWheel.
+    """
+
+    def __init__(self, now, capacity, tick=SCHEDULER_TICK,
+                 slots=SCHEDULER_SLOTS):
+        """Создает пустое колесо для capacity ключей."""
+        super().__init__(now, tick, slots)
+        self.slots = [set() for _ in range(slots)]
+        self.deadlines = array('d', [0.0]) * capacity
+        self.positions = array('i', [-1]) * capacity
+        self.pending = 0
+
+    def __len__(self):
+        """Возвращает число запланированных сроков."""
+        return self.pending
+
+    def schedule(self, key, deadline):
+        """Планирует срок deadline для ключа, заменяя прежний."""
+        self.cancel(key)
+        slot = max(self._tick_of(deadline), self.current_tick) % len(
+            self.slots)
+        self.slots[slot].add(key)
+        self.deadlines[key] = deadline
+        self.positions[key] = slot
+        self.pending += 1
+
+    def scheduled(self):
+        """Возвращает список ключей, для которых запланирован срок."""
+        return [key for key, slot in enumerate(self.positions) if slot >= 0]
+
+    def cancel(self, key):
+        """Отменяет срок для ключа, если он был запланирован."""
+        slot = self.positions[key]
+        if slot >= 0:
+            self.slots[slot].discard(key)
+            self.positions[key] = -1
+            self.pending -= 1
+
+    def advance(self, now):
+        """Продвигает колесо до момента now.
+        Returns:
+            list: ключи, срок которых наступил.
+        """
+        target_tick = self._tick_of(now)
+        ticks = min(target_tick - self.current_tick + 1, len(self.slots))
+        due = []
+        for offset in range(ticks):
+            slot = self.slots[(self.current_tick + offset) % len(self.slots)]
+            expired = [key for key in slot if self.deadlines[key] <= now]
+            for key in expired:
+                lag = now - self.deadlines[key]
+                slot.discard(key)
+                self.positions[key] = -1
+                self.lag_total += lag
+                self.lag_max = max(self.lag_max, lag)
+            due.extend(expired)
+        self.pending -= len(due)
+        self.expired += len(due)
+        self.current_tick = target_tick
+        return due
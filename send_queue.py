@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import time
+from http import HTTPStatus
+
+import requests
+from telebot.apihelper import ApiException, ApiTelegramException
+
+import homework
+import log_config
+import metrics
+import ratelimit
+import settings
+
+TELEGRAM_GLOBAL_RATE = settings.env_float('TELEGRAM_GLOBAL_RATE', 30.0)
+TELEGRAM_CHAT_RATE = settings.env_float('TELEGRAM_CHAT_RATE', 1.0)
+SEND_WORKERS = settings.env_int('SEND_WORKERS', 4)
+SEND_MAX_RETRIES = 3
+CHAT_BUCKETS_LIMIT = 10000
+CHAT_BUCKET_IDLE = 60
+
+RATE_LIMITED = ('Telegram ограничил частоту отправки в чат {chat_id}, '
+                'повтор через {retry_after} с.')
+
+
+def get_retry_after(error):
+    """Возвращает паузу из ответа Telegram 429 Too Many Requests.
+    Args:
+        error (ApiException): ошибка отправки;
+    Returns:
+        int: пауза в секундах или None, если это не ограничение частоты.
+    """
+    if (not isinstance(error, ApiTelegramException)
+            or error.error_code != HTTPStatus.TOO_MANY_REQUESTS):
+        return None
+    return error.result_json.get('parameters', {}).get('retry_after', 1)
+
+
+class SendQueue:
+    """Очередь исходящих сообщений Telegram с ограничением частоты.
+    Сообщения отправляют workers воркеров. Перед отправкой воркер берет
+    жетон из ведра своего чата (не чаще chat_rate сообщений в секунду в
+    один чат), а затем из общего ведра (не чаще global_rate сообщений в
+    секунду на бота) - это лимиты Telegram. Если жетона чата еще нет,
+    воркер не ждет его, а откладывает сообщение (defer) и берет
+    следующее, так что один чат не задерживает отправку в другие. Если
+    Telegram все же ответил 429, чат приостанавливается на retry_after
+    секунд, а сообщение повторяется после паузы, а не считается
+    неотправленным.
+    """
+
+    def __init__(self, bot, workers=SEND_WORKERS,
+                 global_rate=TELEGRAM_GLOBAL_RATE,
+                 chat_rate=TELEGRAM_CHAT_RATE, executor=None):
+        """Готовит очередь; воркеры запускаются методом start."""
+        self.bot = bot
+        self.workers = workers
+        self.chat_rate = chat_rate
+        self.executor = executor
+        self.global_bucket = ratelimit.TokenBucket(global_rate)
+        self.chat_buckets = {}
+        self.queue = None
+        self.tasks = []
+        self.deferred = set()
+
+    def qsize(self):
+        """Возвращает число сообщений, ожидающих отправки."""
+        return (self.queue.qsize() if self.queue else 0) + len(self.deferred)
+
+    async def start(self):
+        """Запускает воркеры в текущем цикле событий."""
+        self.queue = asyncio.Queue()
+        self.tasks = [asyncio.create_task(self.worker())
+                      for _ in range(self.workers)]
+
+    async def stop(self):
+        """Останавливает воркеры; неотправленные сообщения теряются."""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        for handle in self.deferred:
+            handle.cancel()
+        self.deferred = set()
+
+    async def join(self):
+        """Ждет, пока все сообщения, в том числе отложенные, обработаны."""
+        if self.queue:
+            await self.queue.join()
+
+    async def send(self, chat_id, message):
+        """Ставит сообщение в очередь и ждет результата отправки.
+        Если ожидание отменено, сообщение из очереди не отправляется.
+        Args:
+            chat_id (str): идентификатор чата;
+            message (str): сообщение;
+        Returns:
+            bool: True, если сообщение отправлено.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((chat_id, message, future, 0, False))
+        return await future
+
+    def defer(self, delay, item):
+        """Возвращает сообщение в очередь через delay секунд.
+        Пока сообщение отложено, оно считается необработанным: join его
+        дожидается.
+        """
+        def put_back():
+            self.deferred.discard(handle)
+            self.queue.put_nowait(item)
+            self.queue.task_done()
+        handle = asyncio.get_running_loop().call_later(delay, put_back)
+        self.deferred.add(handle)
+
+    def chat_bucket(self, chat_id):
+        """Возвращает ведро чата, при переполнении забывая простаивающие."""
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) >= CHAT_BUCKETS_LIMIT:
+                idle_since = time.monotonic() - CHAT_BUCKET_IDLE
+                self.chat_buckets = {
+                    key: value for key, value in self.chat_buckets.items()
+                    if value.updated > idle_since}
+            bucket = ratelimit.TokenBucket(self.chat_rate, capacity=1)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    def deliver(self, chat_id, message):
+        """Отправляет сообщение в Telegram, блокируя поток.
+        Сетевая ошибка, как и ошибка Telegram, означает неотправленное
+        сообщение: его повторит вызывающий.
+        Returns:
+            tuple: отправлено ли сообщение и пауза retry_after или None.
+        """
+        try:
+            with metrics.SEND_LATENCY.time():
+                self.bot.send_message(chat_id, message)
+        except (ApiException, requests.exceptions.RequestException) as error:
+            metrics.count_error(error)
+            retry_after = get_retry_after(error)
+            if retry_after is None:
+                logging.exception(homework.MESSAGE_NOT_SENT.format(
+                    error=error, message=message))
+            else:
+                logging.warning(RATE_LIMITED.format(
+                    chat_id=chat_id, retry_after=retry_after))
+            return False, retry_after
+        logging.debug(log_config.lazy(
+            homework.MESSAGE_SENT_SUCCESSULLY, message=message))
+        return True, None
+
+    async def process(self, item):
+        """Отправляет сообщение из очереди или откладывает его.
+        Args:
+            item (tuple): чат, сообщение, future отправителя, номер
+                попытки и признак уже взятого жетона чата;
+        Returns:
+            bool: отправлено ли сообщение; None, если оно отложено.
+        """
+        chat_id, message, future, attempt, reserved = item
+        if not reserved:
+            delay = self.chat_bucket(chat_id).reserve()
+            if delay:
+                self.defer(delay, (chat_id, message, future, attempt, True))
+                return None
+        await self.global_bucket.acquire()
+        sent, retry_after = await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.deliver, chat_id, message)
+        if retry_after is None:
+            return sent
+        if attempt + 1 >= SEND_MAX_RETRIES:
+            return False
+        self.chat_bucket(chat_id).pause(retry_after)
+        self.defer(retry_after, (chat_id, message, future, attempt + 1, True))
+        return None
+
+    async def worker(self):
+        """Разбирает очередь исходящих сообщений."""
+        while True:
+            item = await self.queue.get()
+            future = item[2]
+            deferred = False
+            try:
+                if not future.cancelled():
+                    result = await self.process(item)
+                    deferred = result is None
+                    if not deferred and not future.done():
+                        future.set_result(result)
+            except Exception as error:
+                if not future.done():
+                    future.set_exception(error)
+            finally:
+                if not deferred:
+                    self.queue.task_done()
@@ -0,0 +1,47 @@
+import os
+
+NUMBER_INVALID = ('Некорректное значение {name}={value!r}: ожидается '
+                  '{kind}.')
+KINDS = {int: 'целое число', float: 'число'}
+
+ERRORS = []
+
+
+def env_number(name, default, kind=int):
+    """Читает число из переменной окружения.
+    Модули читают настройки при импорте, поэтому некорректное значение не
+    выбрасывает исключение сразу: ошибка запоминается, а берется значение
+    по умолчанию. Сообщает о таких ошибках check, который вызывают
+    python homework.py --check и main() перед запуском.
+    Args:
+        name (str): имя переменной;
+        default (int | float): значение по умолчанию;
+        kind (type): int или float;
+    Returns:
+        int | float: значение переменной или default.
+    """
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return kind(value)
+    except ValueError:
+        ERRORS.append(NUMBER_INVALID.format(
+            name=name, value=value, kind=KINDS[kind]))
+        return default
+
+
+def env_int(name, default):
+    """Читает целое число из переменной окружения (env_number)."""
+    return env_number(name, default, int)
+
+
+def env_float(name, default):
+    """Читает число из переменной окружения (env_number)."""
+    return env_number(name, default, float)
+
+
+def check():
+    """Выбрасывает ValueError, если какая-то настройка некорректна."""
+    if ERRORS:
+        raise ValueError(' '.join(ERRORS))
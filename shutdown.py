@@ -0,0 +1,129 @@
+import logging
+import os
+import signal
+import sys
+import threading
+
+import settings
+
+SHUTDOWN_TIMEOUT = settings.env_float('SHUTDOWN_TIMEOUT', 30.0)
+STOP_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+POLL_NOW_SIGNAL = signal.SIGUSR1
+
+SHUTDOWN_REQUESTED = 'Получен сигнал {signal}, завершаю работу.'
+POLL_NOW_REQUESTED = 'Получен сигнал {signal}, опрашиваю API без ожидания.'
+SHUTDOWN_TIMED_OUT = ('Работа не завершилась за {timeout} с после сигнала '
+                      'остановки, выхожу принудительно.')
+
+
+class ShutdownRequested(BaseException):
+    """Остановка по сигналу.
+    Как и KeyboardInterrupt, наследуется от BaseException, чтобы ее не
+    перехватывали обработчики except Exception в цикле опроса.
+    """
+
+
+class PollNow(BaseException):
+    """Прерывание ожидания по сигналу «опросить сейчас»."""
+
+
+class GracefulShutdown:
+    """Обработка сигналов остановки и «опросить сейчас» для цикла main().
+    SIGTERM и SIGINT прерывают только ожидание между опросами: если сигнал
+    пришел во время запроса к API или отправки сообщения, итерация
+    завершается, состояние сохраняется, и цикл выходит, не начиная
+    ожидания. Повторный сигнал останавливает программу сразу, а если
+    работа не завершилась за timeout секунд после первого, процесс
+    завершается принудительно. SIGUSR1 прерывает ожидание и запускает
+    опрос немедленно.
+    Используется как контекстный менеджер: на входе ставит обработчики
+    сигналов, на выходе восстанавливает прежние и подавляет
+    ShutdownRequested.
+    """
+
+    def __init__(self, timeout=SHUTDOWN_TIMEOUT):
+        """Готовит обработчики; сигналы перехватываются на входе в with."""
+        self.timeout = timeout
+        self.stopping = False
+        self.sleeper = None
+        self.watchdog = None
+        self.previous = {}
+
+    def __enter__(self):
+        """Ставит обработчики сигналов (только в главном потоке)."""
+        if threading.current_thread() is threading.main_thread():
+            for signum in STOP_SIGNALS:
+                self.previous[signum] = signal.signal(signum, self.on_stop)
+            self.previous[POLL_NOW_SIGNAL] = signal.signal(
+                POLL_NOW_SIGNAL, self.on_poll_now)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Восстанавливает обработчики и останавливает сторожевой таймер."""
+        for signum, handler in self.previous.items():
+            signal.signal(signum, handler)
+        self.previous = {}
+        if self.watchdog:
+            self.watchdog.cancel()
+        return exc_type is not None and issubclass(
+            exc_type, ShutdownRequested)
+
+    def interruptible(self):
+        """Возвращает контекст ожидания, которое прерывают сигналы."""
+        return InterruptibleSleep(self)
+
+    def on_stop(self, signum, frame):
+        """Обработчик SIGTERM и SIGINT."""
+        if self.stopping:
+            raise ShutdownRequested
+        self.stopping = True
+        logging.warning(SHUTDOWN_REQUESTED.format(
+            signal=signal.Signals(signum).name))
+        self.watchdog = threading.Timer(self.timeout, self.force_exit)
+        self.watchdog.daemon = True
+        self.watchdog.start()
+        self.wake(frame, ShutdownRequested)
+
+    def on_poll_now(self, signum, frame):
+        """Обработчик SIGUSR1."""
+        logging.info(POLL_NOW_REQUESTED.format(
+            signal=signal.Signals(signum).name))
+        self.wake(frame, PollNow)
+
+    def wake(self, frame, exception):
+        """Прерывает ожидание, если сигнал пришел во время него.
+        Исключение выбрасывается, только когда выполняется тело контекста
+        ожидания (frame - кадр, открывший его), а не код вокруг.
+        """
+        if frame is not None and frame is self.sleeper:
+            self.sleeper = None
+            raise exception
+
+    def force_exit(self):
+        """Завершает процесс, если остановка затянулась."""
+        logging.critical(SHUTDOWN_TIMED_OUT.format(timeout=self.timeout))
+        logging.shutdown()
+        os._exit(1)
+
+
+class InterruptibleSleep:
+    """Контекст ожидания между опросами.
+    Если остановка уже запрошена, выход из цикла происходит сразу, без
+    ожидания; PollNow завершает ожидание досрочно и подавляется.
+    """
+
+    def __init__(self, controller):
+        """Запоминает обработчик сигналов."""
+        self.controller = controller
+
+    def __enter__(self):
+        """Начинает ожидание или выбрасывает ShutdownRequested."""
+        if self.controller.stopping:
+            raise ShutdownRequested
+        self.controller.sleeper = sys._getframe(1)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Завершает ожидание."""
+        self.controller.sleeper = None
+        return exc_type is PollNow
@@ -0,0 +1,60 @@
+import logging
+import os
+import time
+
+import metrics
+
+STARTUP_REPORT = 'Время запуска: {phases}.'
+STARTUP_PHASE = '{phase} {seconds:.3f} с'
+
+
+def process_age():
+    """Возвращает, сколько секунд назад запущен процесс.
+    Время старта берется из /proc, поэтому учитывает и запуск
+    интерпретатора, и импорт модулей. Вне Linux возвращает 0.
+    """
+    try:
+        with open('/proc/self/stat', encoding='ascii') as stat:
+            fields = stat.read().rpartition(')')[2].split()
+        with open('/proc/uptime', encoding='ascii') as uptime:
+            since_boot = float(uptime.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return 0.0
+    return max(0.0, since_boot - int(fields[19]) / os.sysconf('SC_CLK_TCK'))
+
+
+class StartupTimer:
+    """Отметки этапов запуска от старта процесса.
+    Каждая отметка попадает в метрику homework_startup_seconds, а после
+    первого опроса в лог пишется отчет со всеми этапами - так видно,
+    сколько занимает запуск после выкладки и на что уходит время.
+    """
+
+    def __init__(self, started):
+        """Начинает отсчет от момента started (по time.perf_counter)."""
+        self.started = started
+        self.phases = []
+        self.reported = False
+
+    def mark(self, phase):
+        """Отмечает завершение этапа запуска."""
+        seconds = time.perf_counter() - self.started
+        self.phases.append((phase, seconds))
+        metrics.STARTUP_SECONDS.set(round(seconds, 6), phase=phase)
+
+    def report(self):
+        """Возвращает отчет о времени этапов."""
+        return STARTUP_REPORT.format(phases=', '.join(
+            STARTUP_PHASE.format(phase=phase, seconds=seconds)
+            for phase, seconds in self.phases))
+
+    def first_poll(self):
+        """Отмечает первый опрос и один раз пишет отчет в лог."""
+        if self.reported:
+            return
+        self.reported = True
+        self.mark('first_poll')
+        logging.info(self.report())
+
+
+TIMER = StartupTimer(time.perf_counter() - process_age())
@@ -0,0 +1,385 @@
+import sqlite3
+import threading
+import time
+
+STATE_BATCH_SIZE = 100
+STATE_COMMIT_INTERVAL = 5.0
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tenant_state (
+    tenant TEXT PRIMARY KEY,
+    cursor INTEGER,
+    last_error TEXT
+)
+'''
+UPSERT_CURSOR = '''
+INSERT INTO tenant_state (tenant, cursor) VALUES (?, ?)
+ON CONFLICT (tenant) DO UPDATE SET cursor = excluded.cursor
+'''
+UPSERT_LAST_ERROR = '''
+INSERT INTO tenant_state (tenant, last_error) VALUES (?, ?)
+ON CONFLICT (tenant) DO UPDATE SET last_error = excluded.last_error
+'''
+SELECT_STATE = 'SELECT cursor, last_error FROM tenant_state WHERE tenant = ?'
+OUTBOX_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tenant TEXT NOT NULL,
+    message TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0
+)
+'''
+OUTBOX_INDEX = ('CREATE INDEX IF NOT EXISTS outbox_tenant '
+                'ON outbox (tenant, id)')
+INSERT_MESSAGE = 'INSERT INTO outbox (tenant, message) VALUES (?, ?)'
+SELECT_DUE = '''
+SELECT id, tenant, message, attempts FROM outbox
+WHERE id IN (SELECT MIN(id) FROM outbox GROUP BY tenant)
+AND next_attempt <= ? {tenant_filter}
+ORDER BY id LIMIT ?
+'''
+DELETE_MESSAGE = 'DELETE FROM outbox WHERE id = ?'
+UPDATE_ATTEMPT = ('UPDATE outbox SET attempts = ?, next_attempt = ? '
+                  'WHERE id = ?')
+COUNT_MESSAGES = 'SELECT COUNT(*) FROM outbox'
+OUTBOX_BATCH = 100
+HOMEWORK_STATUS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS homework_status (
+    tenant TEXT NOT NULL,
+    homework_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    date_updated TEXT,
+    PRIMARY KEY (tenant, homework_id)
+)
+'''
+UPSERT_HOMEWORK_STATUS = '''
+INSERT INTO homework_status (tenant, homework_id, status, date_updated)
+VALUES (?, ?, ?, ?)
+ON CONFLICT (tenant, homework_id) DO UPDATE
+SET status = excluded.status, date_updated = excluded.date_updated
+'''
+SELECT_HOMEWORK_STATUS = '''
+SELECT status, date_updated FROM homework_status
+WHERE tenant = ? AND homework_id = ?
+'''
+
+ATTACH_SIBLING = 'ATTACH DATABASE ? AS sibling'
+DETACH_SIBLING = 'DETACH DATABASE sibling'
+CREATE_ADOPTED = 'CREATE TEMP TABLE IF NOT EXISTS adopted (tenant TEXT)'
+INSERT_ADOPTED = 'INSERT INTO temp.adopted (tenant) VALUES (?)'
+CLEAR_ADOPTED = 'DELETE FROM temp.adopted'
+ADOPT_STATEMENTS = (
+    '''
+    INSERT INTO main.tenant_state (tenant, cursor, last_error)
+    SELECT tenant, cursor, last_error FROM sibling.tenant_state
+    WHERE cursor IS NOT NULL
+    AND tenant IN (SELECT tenant FROM temp.adopted)
+    ON CONFLICT (tenant) DO UPDATE
+    SET cursor = excluded.cursor, last_error = excluded.last_error
+    WHERE excluded.cursor > COALESCE(tenant_state.cursor, 0)
+    ''',
+    '''
+    INSERT INTO main.homework_status
+    (tenant, homework_id, status, date_updated)
+    SELECT tenant, homework_id, status, date_updated
+    FROM sibling.homework_status
+    WHERE tenant IN (SELECT tenant FROM temp.adopted)
+    ON CONFLICT (tenant, homework_id) DO UPDATE
+    SET status = excluded.status, date_updated = excluded.date_updated
+    WHERE (SELECT cursor FROM sibling.tenant_state
+           WHERE tenant = excluded.tenant)
+        >= (SELECT cursor FROM main.tenant_state
+            WHERE tenant = excluded.tenant)
+    ''',
+    '''
+    INSERT INTO main.outbox (tenant, message, attempts, next_attempt)
+    SELECT tenant, message, attempts, next_attempt FROM sibling.outbox
+    WHERE tenant IN (SELECT tenant FROM temp.adopted)
+    ORDER BY id
+    ''',
+    '''
+    DELETE FROM sibling.homework_status
+    WHERE tenant IN (SELECT tenant FROM temp.adopted)
+    ''',
+    '''
+    DELETE FROM sibling.outbox
+    WHERE tenant IN (SELECT tenant FROM temp.adopted)
+    ''',
+    '''
+    DELETE FROM sibling.tenant_state
+    WHERE tenant IN (SELECT tenant FROM temp.adopted)
+    ''',
+)
+
+
+class MemoryStateStore:
+    """Хранилище состояния пользователей в памяти.
+    Хранит для каждого пользователя (tenant) временную метку, с которой
+    нужно продолжить опрос (current_date из ответа API), и текст последней
+    отправленной ошибки. Используется в тестах и когда путь к базе не задан;
+    после перезапуска состояние теряется.
+    Кроме того, хранит outbox - очередь уведомлений, ожидающих отправки, -
+    и последние известные статусы работ.
+    """
+
+    def __init__(self):
+        """Создает пустое хранилище."""
+        self.states = {}
+        self.outbox = {}
+        self.next_message_id = 1
+        self.homework_statuses = {}
+
+    def get_cursor(self, tenant):
+        """Возвращает сохраненную временную метку или None."""
+        return self.states.get(tenant, {}).get('cursor')
+
+    def set_cursor(self, tenant, cursor):
+        """Сохраняет временную метку пользователя."""
+        self.states.setdefault(tenant, {})['cursor'] = cursor
+
+    def get_last_error(self, tenant):
+        """Возвращает текст последней отправленной ошибки или None."""
+        return self.states.get(tenant, {}).get('last_error')
+
+    def set_last_error(self, tenant, message):
+        """Сохраняет текст последней отправленной ошибки."""
+        self.states.setdefault(tenant, {})['last_error'] = message
+
+    def enqueue_messages(self, tenant, messages, cursor):
+        """Ставит уведомления в outbox и сдвигает метку пользователя.
+        Оба изменения выполняются вместе: метка не сдвинется без
+        уведомлений, а уведомления не появятся без сдвига метки.
+        """
+        for message in messages:
+            self.outbox[self.next_message_id] = [tenant, message, 0, 0.0]
+            self.next_message_id += 1
+        self.set_cursor(tenant, cursor)
+
+    def due_messages(self, now, tenant=None, limit=OUTBOX_BATCH):
+        """Возвращает уведомления, которые пора отправить.
+        У каждого пользователя берется только самое старое уведомление,
+        чтобы они доходили в порядке постановки в очередь.
+        Args:
+            now (float): текущее время (time.time());
+            tenant (str): только уведомления этого пользователя;
+            limit (int): максимальное число уведомлений;
+        Returns:
+            list: кортежи (id, пользователь, текст, число попыток).
+        """
+        seen = set()
+        due = []
+        for message_id, (owner, message, attempts, next_attempt) in (
+                self.outbox.items()):
+            if owner in seen:
+                continue
+            seen.add(owner)
+            if next_attempt <= now and tenant in (None, owner):
+                due.append((message_id, owner, message, attempts))
+                if len(due) >= limit:
+                    break
+        return due
+
+    def ack_message(self, message_id):
+        """Удаляет отправленное уведомление из outbox."""
+        self.outbox.pop(message_id, None)
+
+    def retry_message(self, message_id, attempts, next_attempt):
+        """Откладывает уведомление до времени next_attempt."""
+        entry = self.outbox.get(message_id)
+        if entry is not None:
+            entry[2:] = [attempts, next_attempt]
+
+    def count_messages(self):
+        """Возвращает число уведомлений в outbox."""
+        return len(self.outbox)
+
+    def get_homework_status(self, tenant, homework_id):
+        """Возвращает пару (статус, date_updated) работы или None."""
+        return self.homework_statuses.get((tenant, homework_id))
+
+    def set_homework_status(self, tenant, homework_id, status, date_updated):
+        """Сохраняет статус работы и время его изменения."""
+        self.homework_statuses[tenant, homework_id] = (status, date_updated)
+
+    def maybe_flush(self):
+        """Фиксирует накопленные изменения, если пора; в памяти нечего."""
+
+    def flush(self):
+        """Фиксирует накопленные изменения; в памяти нечего."""
+
+    def close(self):
+        """Закрывает хранилище."""
+
+
+class SQLiteStateStore:
+    """Хранилище состояния пользователей в SQLite.
+    База открывается в режиме WAL: чтение не блокируется записью, а запись
+    дописывает журнал вместо перезаписи страниц. Изменения копятся в
+    открытой транзакции и фиксируются пачкой - после batch_size записей,
+    раз в commit_interval секунд (maybe_flush) или явным вызовом flush.
+    Уведомления outbox хранятся в той же базе и записываются в той же
+    транзакции, что и метка пользователя. Там же хранятся последние
+    известные статусы работ (таблица homework_status).
+    """
+
+    def __init__(self, path, batch_size=STATE_BATCH_SIZE,
+                 commit_interval=STATE_COMMIT_INTERVAL):
+        """Открывает базу по пути path и создает таблицу при необходимости."""
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        for statement in (SCHEMA, OUTBOX_SCHEMA, OUTBOX_INDEX,
+                          HOMEWORK_STATUS_SCHEMA):
+            self.connection.execute(statement)
+        self.connection.commit()
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.pending = 0
+        self.last_commit = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _read(self, tenant):
+        with self.lock:
+            return self.connection.execute(
+                SELECT_STATE, (tenant,)).fetchone() or (None, None)
+
+    def _write(self, query, params):
+        with self.lock:
+            self.connection.execute(query, params)
+            self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def get_cursor(self, tenant):
+        """Возвращает сохраненную временную метку или None."""
+        return self._read(tenant)[0]
+
+    def set_cursor(self, tenant, cursor):
+        """Сохраняет временную метку пользователя."""
+        self._write(UPSERT_CURSOR, (tenant, cursor))
+
+    def get_last_error(self, tenant):
+        """Возвращает текст последней отправленной ошибки или None."""
+        return self._read(tenant)[1]
+
+    def set_last_error(self, tenant, message):
+        """Сохраняет текст последней отправленной ошибки."""
+        self._write(UPSERT_LAST_ERROR, (tenant, message))
+
+    def enqueue_messages(self, tenant, messages, cursor):
+        """Ставит уведомления в outbox и сдвигает метку пользователя.
+        Все записи попадают в одну транзакцию: фиксация между ними
+        невозможна, так что после сбоя либо есть и уведомления, и новая
+        метка, либо нет ни того, ни другого.
+        """
+        with self.lock:
+            self.connection.executemany(
+                INSERT_MESSAGE, [(tenant, message) for message in messages])
+            self.connection.execute(UPSERT_CURSOR, (tenant, cursor))
+            self.pending += len(messages) + 1
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def due_messages(self, now, tenant=None, limit=OUTBOX_BATCH):
+        """Возвращает уведомления, которые пора отправить.
+        У каждого пользователя берется только самое старое уведомление,
+        чтобы они доходили в порядке постановки в очередь.
+        Returns:
+            list: кортежи (id, пользователь, текст, число попыток).
+        """
+        if tenant is None:
+            query, params = SELECT_DUE.format(tenant_filter=''), (now, limit)
+        else:
+            query = SELECT_DUE.format(tenant_filter='AND tenant = ?')
+            params = (now, tenant, limit)
+        with self.lock:
+            return self.connection.execute(query, params).fetchall()
+
+    def ack_message(self, message_id):
+        """Удаляет отправленное уведомление из outbox."""
+        self._write(DELETE_MESSAGE, (message_id,))
+
+    def retry_message(self, message_id, attempts, next_attempt):
+        """Откладывает уведомление до времени next_attempt."""
+        self._write(UPDATE_ATTEMPT, (attempts, next_attempt, message_id))
+
+    def count_messages(self):
+        """Возвращает число уведомлений в outbox."""
+        with self.lock:
+            return self.connection.execute(COUNT_MESSAGES).fetchone()[0]
+
+    def get_homework_status(self, tenant, homework_id):
+        """Возвращает пару (статус, date_updated) работы или None."""
+        with self.lock:
+            return self.connection.execute(
+                SELECT_HOMEWORK_STATUS, (tenant, homework_id)).fetchone()
+
+    def set_homework_status(self, tenant, homework_id, status, date_updated):
+        """Сохраняет статус работы и время его изменения."""
+        self._write(UPSERT_HOMEWORK_STATUS,
+                    (tenant, homework_id, status, date_updated))
+
+    def adopt(self, path, tenants):
+        """Переносит состояние пользователей tenants из базы path.
+        Метка, последняя ошибка и статусы работ берутся, если в path
+        метка новее своей; неотправленные уведомления outbox переносятся
+        всегда. Из path состояние пользователей удаляется целиком: прежний
+        воркер не отправит уведомления повторно, а если пользователь
+        вернется к нему, он снова перенесет состояние, а не продолжит со
+        своей устаревшей метки. Все изменения обеих баз фиксируются одной
+        транзакцией.
+        Args:
+            path (str): путь к базе другого воркера;
+            tenants (list): идентификаторы пользователей;
+        """
+        with self.lock:
+            self.connection.commit()
+            self.connection.execute(ATTACH_SIBLING, (path,))
+            try:
+                self.connection.execute(CREATE_ADOPTED)
+                self.connection.executemany(
+                    INSERT_ADOPTED, [(tenant,) for tenant in tenants])
+                for statement in ADOPT_STATEMENTS:
+                    self.connection.execute(statement)
+                self.connection.execute(CLEAR_ADOPTED)
+                self.connection.commit()
+            except sqlite3.Error:
+                self.connection.rollback()
+                raise
+            finally:
+                self.connection.execute(DETACH_SIBLING)
+            self.pending = 0
+            self.last_commit = time.monotonic()
+
+    def maybe_flush(self):
+        """Фиксирует изменения, если прошло commit_interval секунд."""
+        if (self.pending
+                and time.monotonic() - self.last_commit
+                >= self.commit_interval):
+            self.flush()
+
+    def flush(self):
+        """Фиксирует все накопленные изменения одной транзакцией."""
+        with self.lock:
+            self.connection.commit()
+            self.pending = 0
+            self.last_commit = time.monotonic()
+
+    def close(self):
+        """Фиксирует изменения и закрывает базу."""
+        self.flush()
+        self.connection.close()
+
+
+def open_store(path=None):
+    """Открывает хранилище состояния.
+    Args:
+        path (str): путь к файлу SQLite; если не задан, состояние хранится
+            в памяти;
+    Returns:
+        MemoryStateStore или SQLiteStateStore.
+    """
+    if not path:
+        return MemoryStateStore()
+    return SQLiteStateStore(path)
@@ -0,0 +1,118 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+import settings
+
+STATUS_CACHE_TTL = settings.env_float('STATUS_CACHE_TTL', 900.0)
+STATUS_CACHE_SIZE = settings.env_int('STATUS_CACHE_SIZE', 10000)
+
+
+def newest_first(works):
+    """Сортирует работы по времени изменения, самые новые первыми."""
+    return sorted(works.values(),
+                  key=lambda record: record.date_updated or '', reverse=True)
+
+
+class StatusCache:
+    """Последние известные статусы работ по пользователям.
+    Кеш отвечает на команды /status и /list без запроса к API. Запись
+    пользователя - все его работы по названию и время, когда они были
+    подтверждены ответом API. Цикл опроса подтверждает и дополняет
+    существующие записи (update); запись старше ttl секунд считается
+    устаревшей. Записей не больше max_size: при переполнении вытесняется
+    та, к которой дольше всего не обращались (LRU).
+    Кеш используется только из цикла событий движка, поэтому блокировки
+    не нужны.
+    """
+
+    def __init__(self, ttl=STATUS_CACHE_TTL, max_size=STATUS_CACHE_SIZE,
+                 clock=time.monotonic):
+        """Создает пустой кеш."""
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+
+    def __len__(self):
+        """Возвращает число пользователей в кеше."""
+        return len(self.entries)
+
+    def get(self, key):
+        """Возвращает работы пользователя, если запись свежая.
+        Returns:
+            list: записи Homework, самые новые первыми, или None.
+        """
+        entry = self.entries.get(key)
+        if entry is None or self.clock() - entry[0] > self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return newest_first(entry[1])
+
+    def put(self, key, records):
+        """Заменяет запись пользователя полным списком его работ.
+        Returns:
+            dict: работы пользователя по названию.
+        """
+        works = {record.name: record for record in records}
+        self.entries[key] = (self.clock(), works)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return works
+
+    def update(self, key, records):
+        """Дополняет запись изменившимися работами и продлевает ее.
+        Ответ цикла опроса содержит только работы, изменившиеся с прошлого
+        опроса, поэтому новую запись он не создает: полный список
+        загружается при первой команде.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+        works = entry[1]
+        for record in records:
+            works[record.name] = record
+        self.entries[key] = (self.clock(), works)
+
+    async def get_or_fetch(self, key, fetch):
+        """Возвращает свежую запись или загружает ее одним запросом.
+        Если загрузка для пользователя уже идет, остальные вызовы ждут ее
+        результата, а не делают свои запросы (single-flight), поэтому
+        команды не увеличивают нагрузку на API.
+        Args:
+            key (str): пользователь;
+            fetch: корутинная функция, возвращающая полный список работ;
+        Returns:
+            list: записи Homework, самые новые первыми.
+        """
+        records = self.get(key)
+        if records is not None:
+            return records
+        pending = self.pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._load(key, fetch))
+            self.pending[key] = pending
+        return await asyncio.shield(pending)
+
+    async def _load(self, key, fetch):
+        self.fetches += 1
+        try:
+            records = await fetch()
+        finally:
+            self.pending.pop(key, None)
+        return newest_first(self.put(key, records))
+
+    def stats(self):
+        """Возвращает счетчики кеша.
+        Returns:
+            dict: hits, misses, fetches - число запросов к API и size.
+        """
+        return {'hits': self.hits, 'misses': self.misses,
+                'fetches': self.fetches, 'size': len(self.entries)}
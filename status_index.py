@@ -0,0 +1,88 @@
+from collections import OrderedDict
+
+import settings
+
+STATUS_INDEX_SIZE = settings.env_int('STATUS_INDEX_SIZE', 10000)
+HOMEWORKS_PER_TENANT = 64
+
+
+class StatusIndex:
+    """Последние известные статусы работ по пользователям.
+    Ключ - id работы, значение - ее статус и date_updated. Уведомление
+    нужно, только если статус работы изменился или обновился
+    date_updated (повторный вердикт): ответы с перекрывающимися метками и
+    повторы после ошибок возвращают те же работы, и они не отправляются
+    второй раз. Проверка - поиск в словаре, O(1).
+    Память ограничена: не больше max_size пользователей и
+    HOMEWORKS_PER_TENANT работ у каждого, при переполнении вытесняются
+    давно не проверявшиеся (LRU). Индекс хранится в store, поэтому
+    вытесненная работа и состояние после перезапуска читаются оттуда.
+    """
+
+    def __init__(self, store, max_size=STATUS_INDEX_SIZE):
+        """Создает пустой индекс поверх хранилища store."""
+        self.store = store
+        self.max_size = max_size
+        self.tenants = OrderedDict()
+
+    def _works(self, tenant):
+        works = self.tenants.get(tenant)
+        if works is None:
+            works = self.tenants[tenant] = OrderedDict()
+        self.tenants.move_to_end(tenant)
+        while len(self.tenants) > self.max_size:
+            self.tenants.popitem(last=False)
+        return works
+
+    @staticmethod
+    def _touch(works, homework_id):
+        works.move_to_end(homework_id)
+        while len(works) > HOMEWORKS_PER_TENANT:
+            works.popitem(last=False)
+
+    def _lookup(self, tenant, homework_id):
+        works = self._works(tenant)
+        state = works.get(homework_id)
+        if state is None:
+            state = self.store.get_homework_status(tenant, homework_id)
+            if state is None:
+                return None
+            works[homework_id] = state = tuple(state)
+        self._touch(works, homework_id)
+        return state
+
+    def changed(self, tenant, homework_id, status, date_updated):
+        """Проверяет, изменился ли статус работы с прошлого раза.
+        Работа без id всегда считается изменившейся.
+        Args:
+            tenant (str): пользователь;
+            homework_id: id работы из ответа API;
+            status (str): статус работы;
+            date_updated (str): время изменения статуса;
+        Returns:
+            bool: True, если об этом статусе еще не уведомляли.
+        """
+        if homework_id is None:
+            return True
+        return self._lookup(tenant, str(homework_id)) != (
+            status, date_updated)
+
+    def remember(self, tenant, homework_id, status, date_updated):
+        """Запоминает статус работы, о котором уведомили."""
+        if homework_id is None:
+            return
+        homework_id = str(homework_id)
+        works = self._works(tenant)
+        works[homework_id] = (status, date_updated)
+        self._touch(works, homework_id)
+        self.store.set_homework_status(
+            tenant, homework_id, status, date_updated)
+
+    def stats(self):
+        """Возвращает размер индекса в памяти.
+        Returns:
+            dict: tenants - число пользователей и homeworks - работ.
+        """
+        return {'tenants': len(self.tenants),
+                'homeworks': sum(
+                    len(works) for works in self.tenants.values())}
@@ -0,0 +1,317 @@
+import asyncio
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import time
+import urllib.request
+from http import HTTPStatus
+
+from telebot import TeleBot
+
+import engine
+import hash_ring
+import homework
+import http_client
+import log_config
+import metrics
+import settings
+import shutdown
+import state_store
+import tenant_table
+
+SUPERVISOR_WORKERS = settings.env_int(
+    'SUPERVISOR_WORKERS', os.cpu_count() or 1)
+SUPERVISOR_CHECK_PERIOD = 1.0
+WORKER_RESTART_DELAY = 5.0
+SCRAPE_TIMEOUT = 2.0
+
+SUPERVISOR_STARTED = 'Супервизор запущен: воркеров {count}.'
+WORKER_STARTED = 'Воркер {node} (pid {pid}) опрашивает пользователей: {count}.'
+WORKER_EXITED = 'Воркер {node} завершился с кодом {code}, перезапускаю.'
+WORKER_KILLED = ('Воркер {node} не остановился за {timeout} с, '
+                 'завершаю принудительно.')
+SCRAPE_FAILED = 'Не удалось получить метрики воркера {node}: {error}.'
+
+SUPERVISOR_REGISTRY = metrics.Registry()
+WORKER_RESTARTS = SUPERVISOR_REGISTRY.register(metrics.Counter(
+    'homework_worker_restarts_total', 'Перезапуски воркеров.'))
+WORKERS_ALIVE = SUPERVISOR_REGISTRY.register(metrics.Gauge(
+    'homework_workers_alive', 'Число работающих воркеров.'))
+
+
+def worker_state_path(node):
+    """Возвращает путь к базе состояния воркера или None.
+    У каждого воркера своя база STATE_DB_PATH.<узел>: пакетные транзакции
+    SQLite одного процесса иначе блокировали бы запись остальных.
+    """
+    if not homework.STATE_DB_PATH:
+        return None
+    return f'{homework.STATE_DB_PATH}.{node}'
+
+
+def adopt_state(tenants, store, paths):
+    """Переносит в базу воркера состояние пользователей из чужих баз.
+    Пользователь, переехавший к воркеру после изменения числа воркеров,
+    продолжает опрос с метки, сохраненной прежним воркером, а не с
+    начала. Если метка есть в нескольких базах, берется самая поздняя.
+    Вместе с меткой переезжают статусы работ и неотправленные
+    уведомления (SQLiteStateStore.adopt).
+    Args:
+        tenants (list): пользователи воркера;
+        store (SQLiteStateStore): база воркера;
+        paths (list): пути к базам остальных воркеров;
+    """
+    missing = [tenant.chat_id for tenant in tenants
+               if store.get_cursor(tenant.chat_id) is None]
+    if not missing:
+        return
+    for path in paths:
+        store.adopt(path, missing)
+
+
+def run_worker(node, nodes, metrics_port, log_path):
+    """Точка входа процесса-воркера: опрашивает свою часть пользователей.
+    Args:
+        node (str): имя воркера на кольце;
+        nodes (list): имена всех воркеров;
+        metrics_port (int): порт метрик воркера;
+        log_path (str): файл лога воркера;
+    """
+    for signum in shutdown.STOP_SIGNALS:
+        signal.signal(signum, signal.SIG_DFL)
+    signal.signal(shutdown.POLL_NOW_SIGNAL, signal.SIG_IGN)
+    handler = log_config.build_queue_handler(log_path)
+    logging.basicConfig(
+        level=os.getenv('LOG_LEVEL', 'INFO'), handlers=[handler], force=True)
+    try:
+        ring = hash_ring.HashRing(nodes)
+        tenants = tenant_table.TenantTable(
+            tenant for tenant in engine.load_tenants(engine.TENANTS_FILE)
+            if ring.node_for(tenant.chat_id) == node)
+        store = state_store.open_store(worker_state_path(node))
+        if homework.STATE_DB_PATH:
+            adopt_state(tenants, store, [
+                path for path in glob.glob(worker_state_path('worker-*'))
+                if path != worker_state_path(node)
+                and not path.endswith(('-wal', '-shm', '-journal'))])
+        metrics.start_server(port=metrics_port)
+        logging.info(WORKER_STARTED.format(
+            node=node, pid=os.getpid(), count=len(tenants)))
+        bot = TeleBot(token=homework.TELEGRAM_TOKEN)
+        polling_engine = engine.PollingEngine(
+            tenants, bot,
+            session=http_client.create_session(
+                pool_size=engine.POLL_CONCURRENCY),
+            store=store, signals=True)
+        asyncio.run(polling_engine.run())
+    finally:
+        handler.listener.stop()
+
+
+def label_sample(line, node):
+    """Добавляет к строке метрики метку worker."""
+    name, _, value = line.rpartition(' ')
+    label = f'worker="{node}"'
+    if name.endswith('}'):
+        name = f'{name[:-1]},{label}}}'
+    else:
+        name = f'{name}{{{label}}}'
+    return f'{name} {value}'
+
+
+def merge_metrics(scrapes):
+    """Объединяет метрики воркеров в один текст Prometheus.
+    Значения каждого воркера получают метку worker, а строки одной
+    метрики разных воркеров собираются под одними HELP и TYPE, как того
+    требует текстовый формат.
+    Args:
+        scrapes (list): пары (имя воркера, текст его /metrics);
+    Returns:
+        str: объединенные метрики.
+    """
+    families = {}
+    for node, text in scrapes:
+        family = None
+        for line in text.splitlines():
+            if line.startswith(('# HELP ', '# TYPE ')):
+                family = families.setdefault(line.split()[2], ([], []))
+                if line not in family[0]:
+                    family[0].append(line)
+            elif line and family is not None:
+                family[1].append(label_sample(line, node))
+    lines = [line for header, samples in families.values()
+             for line in header + samples]
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+class SupervisorHandler(metrics.MetricsHandler):
+    """Отдает общие метрики (/metrics) и состояние воркеров (/health)."""
+
+    supervisor = None
+
+    def do_GET(self):
+        """Обрабатывает GET-запрос."""
+        if self.path == '/metrics':
+            self.reply(HTTPStatus.OK, metrics.CONTENT_TYPE,
+                       self.supervisor.render_metrics())
+        elif self.path == '/health':
+            health = self.supervisor.health()
+            status = (HTTPStatus.OK if health['status'] == 'ok'
+                      else HTTPStatus.SERVICE_UNAVAILABLE)
+            self.reply(status, 'application/json',
+                       json.dumps(health, ensure_ascii=False))
+        else:
+            self.send_error(HTTPStatus.NOT_FOUND)
+
+    def reply(self, status, content_type, text):
+        """Отправляет ответ с телом text."""
+        body = text.encode('UTF-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class Supervisor:
+    """Запускает воркеры движка в отдельных процессах и следит за ними.
+    Один процесс Python упирается в GIL при декодировании JSON и TLS,
+    поэтому пользователи делятся между workers процессами по
+    консистентному хешу chat_id (hash_ring.HashRing). Упавший воркер
+    перезапускается с тем же именем и получает тех же пользователей, а
+    при изменении числа воркеров переезжает лишь около 1/N из них.
+    Если задан metrics_port, воркеры отдают метрики на следующих портах,
+    а супервизор на metrics_port - их объединение с меткой worker и
+    состояние воркеров по адресу /health.
+    """
+
+    def __init__(self, workers=SUPERVISOR_WORKERS,
+                 metrics_port=metrics.METRICS_PORT,
+                 log_path='supervisor.py.log',
+                 shutdown_timeout=shutdown.SHUTDOWN_TIMEOUT):
+        """Готовит супервизор; воркеры запускаются методом run."""
+        self.nodes = [f'worker-{index}' for index in range(workers)]
+        self.metrics_port = metrics_port
+        self.log_path = log_path
+        self.shutdown_timeout = shutdown_timeout
+        self.context = multiprocessing.get_context('fork')
+        self.processes = {}
+        self.started = {}
+        self.restarts = dict.fromkeys(self.nodes, 0)
+        SUPERVISOR_REGISTRY.add_collector(self.collect_metrics)
+
+    def worker_port(self, node):
+        """Возвращает порт метрик воркера или 0, если метрики выключены."""
+        if not self.metrics_port:
+            return 0
+        return self.metrics_port + 1 + self.nodes.index(node)
+
+    def start_worker(self, node):
+        """Запускает процесс воркера."""
+        process = self.context.Process(
+            target=run_worker, name=node,
+            args=(node, self.nodes, self.worker_port(node),
+                  f'{self.log_path}.{node}'))
+        process.start()
+        self.processes[node] = process
+        self.started[node] = time.monotonic()
+
+    def check_workers(self):
+        """Перезапускает завершившиеся воркеры.
+        Воркер, упавший вскоре после запуска, перезапускается не раньше
+        чем через WORKER_RESTART_DELAY секунд после предыдущего старта.
+        """
+        for node, process in list(self.processes.items()):
+            if process.is_alive():
+                continue
+            if time.monotonic() - self.started[node] < WORKER_RESTART_DELAY:
+                continue
+            logging.error(WORKER_EXITED.format(
+                node=node, code=process.exitcode))
+            WORKER_RESTARTS.inc(worker=node)
+            self.restarts[node] += 1
+            self.start_worker(node)
+
+    def stop(self):
+        """Останавливает воркеры, давая им shutdown_timeout секунд."""
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + self.shutdown_timeout
+        for node, process in self.processes.items():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logging.error(WORKER_KILLED.format(
+                    node=node, timeout=self.shutdown_timeout))
+                process.kill()
+                process.join()
+
+    def health(self):
+        """Возвращает состояние воркеров.
+        Returns:
+            dict: status ('ok' или 'degraded') и по каждому воркеру pid,
+            alive и число перезапусков.
+        """
+        workers = {
+            node: {'pid': process.pid, 'alive': process.is_alive(),
+                   'restarts': self.restarts[node]}
+            for node, process in self.processes.items()}
+        alive = all(worker['alive'] for worker in workers.values())
+        return {'status': 'ok' if workers and alive else 'degraded',
+                'workers': workers}
+
+    def collect_metrics(self):
+        """Обновляет метрики супервизора перед выгрузкой."""
+        WORKERS_ALIVE.set(sum(
+            process.is_alive() for process in self.processes.values()))
+
+    def scrape(self, node):
+        """Возвращает текст метрик воркера или пустую строку."""
+        url = f'http://{metrics.METRICS_HOST}:{self.worker_port(node)}/metrics'
+        try:
+            with urllib.request.urlopen(url, timeout=SCRAPE_TIMEOUT) as reply:
+                return reply.read().decode('UTF-8')
+        except OSError as error:
+            logging.warning(SCRAPE_FAILED.format(node=node, error=error))
+            return ''
+
+    def render_metrics(self):
+        """Возвращает метрики супервизора и всех воркеров."""
+        return SUPERVISOR_REGISTRY.render() + merge_metrics(
+            [(node, self.scrape(node)) for node in self.processes])
+
+    def run(self):
+        """Запускает воркеры и следит за ними до сигнала остановки."""
+        for node in self.nodes:
+            self.start_worker(node)
+        handler = type('Handler', (SupervisorHandler,), {'supervisor': self})
+        server = metrics.start_server(
+            port=self.metrics_port, registry=SUPERVISOR_REGISTRY,
+            handler=handler)
+        logging.info(SUPERVISOR_STARTED.format(count=len(self.nodes)))
+        with shutdown.GracefulShutdown(self.shutdown_timeout) as controller:
+            while True:
+                self.check_workers()
+                with controller.interruptible():
+                    time.sleep(SUPERVISOR_CHECK_PERIOD)
+        self.stop()
+        if server:
+            server.shutdown()
+        logging.info(homework.BOT_STOPPED)
+
+
+def main():
+    """Запускает супервизор воркеров движка."""
+    engine.check_engine_tokens()
+    settings.check()
+    Supervisor(log_path=f'{__file__}.log').run()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=os.getenv('LOG_LEVEL', 'INFO'),
+        handlers=[log_config.build_queue_handler(f'{__file__}.log')])
+    main()
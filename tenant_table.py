@@ -0,0 +1,150 @@
+import math
+import sys
+from array import array
+
+import homework
+
+STATUS_CODES = tuple(homework.HOMEWORK_VERDICTS)
+NO_STATUS = -1
+
+
+class TenantTable:
+    """Компактное хранилище пользователей движка по столбцам.
+    Вместо объекта на пользователя каждое поле хранится отдельным
+    столбцом: токены и chat_id - списками строк (chat_id интернируются,
+    чтобы ключи кешей движка ссылались на одну строку), временные метки -
+    массивом int64, время последнего изменения - массивом double (NaN
+    вместо None), последний статус - номером в STATUS_CODES в массиве
+    int8. Тексты последних ошибок есть у немногих пользователей и хранятся
+    в словаре по номеру. Заголовки запроса не хранятся, а собираются при
+    обращении. Так 100 тысяч пользователей занимают единицы мегабайт, а не
+    сотни.
+    Таблица ведет себя как список: table[index] возвращает TenantRef -
+    легкое представление строки с атрибутами Tenant.
+    """
+
+    def __init__(self, tenants=()):
+        """Создает таблицу и переносит в нее пользователей tenants."""
+        self.tokens = []
+        self.chat_ids = []
+        self.timestamps = array('q')
+        self.last_updated = array('d')
+        self.last_statuses = array('b')
+        self.last_messages = {}
+        for tenant in tenants:
+            self.append(tenant.token, tenant.chat_id, tenant.timestamp)
+            index = len(self) - 1
+            row = TenantRef(self, index)
+            row.last_message = tenant.last_message
+            row.last_status = tenant.last_status
+            row.last_updated = tenant.last_updated
+
+    def __len__(self):
+        """Возвращает число пользователей."""
+        return len(self.tokens)
+
+    def __getitem__(self, index):
+        """Возвращает представление пользователя с номером index."""
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        return TenantRef(self, index % len(self))
+
+    def __iter__(self):
+        """Перебирает представления всех пользователей."""
+        return (TenantRef(self, index) for index in range(len(self)))
+
+    def append(self, token, chat_id, timestamp):
+        """Добавляет пользователя."""
+        timestamp = int(timestamp)
+        self.tokens.append(token)
+        self.chat_ids.append(sys.intern(chat_id))
+        self.timestamps.append(timestamp)
+        self.last_updated.append(math.nan)
+        self.last_statuses.append(NO_STATUS)
+
+    def nbytes(self):
+        """Возвращает примерный размер таблицы в байтах."""
+        columns = (self.tokens, self.chat_ids, self.timestamps,
+                   self.last_updated, self.last_statuses, self.last_messages)
+        return (sum(sys.getsizeof(column) for column in columns)
+                + sum(sys.getsizeof(value)
+                      for column in (self.tokens, self.chat_ids)
+                      for value in column)
+                + sum(sys.getsizeof(message)
+                      for message in self.last_messages.values()))
+
+
+class TenantRef:
+    """Пользователь в TenantTable: те же атрибуты, что у Tenant.
+    Представление не хранит данных, только номер строки, и создается на
+    время обработки пользователя.
+    """
+
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table, index):
+        """Запоминает таблицу и номер строки."""
+        self.table = table
+        self.index = index
+
+    def __repr__(self):
+        """Возвращает отладочное представление пользователя."""
+        return f'TenantRef({self.chat_id!r}, {self.timestamp!r})'
+
+    @property
+    def token(self):
+        """Токен Практикума."""
+        return self.table.tokens[self.index]
+
+    @property
+    def chat_id(self):
+        """Идентификатор чата Telegram."""
+        return self.table.chat_ids[self.index]
+
+    @property
+    def headers(self):
+        """Заголовки запроса к API; собираются при каждом обращении."""
+        return homework.make_headers(self.token)
+
+    @property
+    def timestamp(self):
+        """Временная метка, с которой идет опрос."""
+        return self.table.timestamps[self.index]
+
+    @timestamp.setter
+    def timestamp(self, value):
+        self.table.timestamps[self.index] = int(value)
+
+    @property
+    def last_message(self):
+        """Текст последней отправленной ошибки или None."""
+        return self.table.last_messages.get(self.index)
+
+    @last_message.setter
+    def last_message(self, value):
+        if value is None:
+            self.table.last_messages.pop(self.index, None)
+        else:
+            self.table.last_messages[self.index] = value
+
+    @property
+    def last_status(self):
+        """Статус последней работы или None."""
+        code = self.table.last_statuses[self.index]
+        return None if code == NO_STATUS else STATUS_CODES[code]
+
+    @last_status.setter
+    def last_status(self, value):
+        self.table.last_statuses[self.index] = (
+            NO_STATUS if value is None else STATUS_CODES.index(value))
+
+    @property
+    def last_updated(self):
+        """Unix-время последнего изменения статуса или None."""
+        value = self.table.last_updated[self.index]
+        return None if math.isnan(value) else value
+
+    @last_updated.setter
+    def last_updated(self, value):
+        self.table.last_updated[self.index] = (
+            math.nan if value is None else value)
@@ -0,0 +1,22 @@
+class TestBatching:
+
+    def test_all_homeworks_are_parsed(self, homework_module):
+        homeworks = [
+            {'homework_name': 'hw1', 'status': 'approved'},
+            {'homework_name': 'hw2', 'status': 'rejected'},
+        ]
+        messages = homework_module.parse_statuses(homeworks)
+        assert len(messages) == 2, (
+            'Убедитесь, что обрабатываются все работы из ответа API.'
+        )
+        chunks = homework_module.join_messages(messages)
+        assert chunks == ['\n'.join(messages)], (
+            'Статусы всех работ должны уходить одним сообщением.'
+        )
+
+    def test_join_messages_respects_limit(self, homework_module):
+        chunks = homework_module.join_messages(
+            ['a' * 4, 'b' * 4, 'c' * 12], limit=10)
+        assert chunks == ['aaaa\nbbbb', 'c' * 10, 'cc']
+        assert all(len(chunk) <= 10 for chunk in chunks)
+        assert homework_module.join_messages([]) == []
@@ -0,0 +1,39 @@
+DAY = 24 * 3600
+
+
+class TestCadence:
+
+    def test_reviewing_is_polled_faster_than_default(self):
+        import cadence
+        policy = cadence.CadencePolicy()
+        now = 100 * DAY
+        assert policy.interval('reviewing', now, now) < policy.interval(
+            None, None, now)
+
+    def test_finished_and_stale_tenants_back_off(self):
+        import cadence
+        policy = cadence.CadencePolicy()
+        now = 100 * DAY
+        default = policy.interval('rejected', now, now)
+        approved = policy.interval('approved', now, now)
+        stale = policy.interval('rejected', now - 30 * DAY, now)
+        assert default < approved < stale, (
+            'Принятые и давно не менявшиеся работы нужно опрашивать реже.'
+        )
+
+    def test_parse_date_updated(self):
+        import cadence
+        assert cadence.parse_date_updated('1970-01-02T00:00:00Z') == DAY
+        assert cadence.parse_date_updated(None) is None
+        assert cadence.parse_date_updated('вчера') is None
+
+    def test_token_bucket_limits_rate(self):
+        import ratelimit
+        bucket = ratelimit.TokenBucket(rate=2, capacity=2)
+        now = bucket.updated
+        delays = [bucket.reserve(now) for _ in range(4)]
+        assert delays == [0.0, 0.0, 0.5, 1.0], (
+            'Сверх емкости ведра запросы должны ждать 1 / rate секунд '
+            'каждый.'
+        )
+        assert bucket.reserve(now + 10) == 0.0
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+import exceptions
+
+
+def make_breaker():
+    import circuit_breaker
+    return circuit_breaker.CircuitBreaker(
+        window=60, error_rate=0.5, min_requests=4, open_timeout=30)
+
+
+class TestCircuitBreaker:
+
+    def test_opens_on_error_rate_and_fails_fast(self):
+        import circuit_breaker
+        breaker = make_breaker()
+        for failed in (False, True, False, True):
+            breaker.before_call(now=0)
+            breaker.record(failed, now=0)
+        assert breaker.state == circuit_breaker.OPEN
+        with pytest.raises(exceptions.CircuitOpenError):
+            breaker.before_call(now=10)
+
+    def test_half_open_probe_closes_breaker(self):
+        import circuit_breaker
+        breaker = make_breaker()
+        breaker._open(now=0)
+        breaker.before_call(now=31)
+        assert breaker.state == circuit_breaker.HALF_OPEN
+        with pytest.raises(exceptions.CircuitOpenError):
+            breaker.before_call(now=31)
+        breaker.record(failed=False, now=31)
+        assert breaker.state == circuit_breaker.CLOSED
+
+    def test_failed_probe_reopens_breaker(self):
+        import circuit_breaker
+        breaker = make_breaker()
+        breaker._open(now=0)
+        breaker.before_call(now=31)
+        breaker.record(failed=True, now=31)
+        assert breaker.state == circuit_breaker.OPEN
+
+    def test_client_error_probe_does_not_close_breaker(self):
+        import circuit_breaker
+        breaker = make_breaker()
+        breaker._open(now=0)
+        breaker.before_call(now=31)
+        breaker.record(failed=None, now=31)
+        assert breaker.state == circuit_breaker.HALF_OPEN, (
+            'Проба, завершившаяся ответом 4xx, не доказывает здоровье API.'
+        )
+        breaker.before_call(now=32)
+        breaker.record(failed=False, now=32)
+        assert breaker.state == circuit_breaker.CLOSED
+
+    def test_outcomes_are_ignored_while_open(self):
+        import circuit_breaker
+        breaker = make_breaker()
+        breaker._open(now=0)
+        for failed in (True, True, True, True):
+            breaker.record(failed, now=10)
+        assert breaker.opened_at == 0, (
+            'Исходы запросов, начатых до размыкания, не должны продлевать '
+            'размыкание.'
+        )
+        assert not breaker.buckets
+        breaker.before_call(now=31)
+        assert breaker.state == circuit_breaker.HALF_OPEN
+
+    def test_call_rate_limited_probe_keeps_breaker_half_open(self):
+        import circuit_breaker
+        breaker = make_breaker()
+        breaker._open(now=0)
+        breaker.opened_at = -breaker.open_timeout
+
+        async def request():
+            raise exceptions.APIIsUnavailableError('', status_code=429)
+
+        with pytest.raises(exceptions.APIIsUnavailableError):
+            asyncio.run(breaker.call(request))
+        assert breaker.state == circuit_breaker.HALF_OPEN
+        assert breaker.probes_in_flight == 0
+
+    def test_client_errors_are_not_transient(self):
+        import circuit_breaker
+        assert circuit_breaker.is_transient(ConnectionError())
+        assert circuit_breaker.is_transient(
+            exceptions.APIIsUnavailableError('', status_code=503))
+        assert not circuit_breaker.is_transient(
+            exceptions.APIIsUnavailableError('', status_code=401)), (
+            'Ответ 4xx не говорит о недоступности API.'
+        )
+
+    def test_call_retries_transient_errors(self, monkeypatch):
+        import circuit_breaker
+        monkeypatch.setattr(circuit_breaker, 'backoff', lambda attempt: 0)
+        attempts = []
+
+        async def request():
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise ConnectionError('reset')
+            return 'ok'
+
+        result = asyncio.run(make_breaker().call(request, retries=2))
+        assert result == 'ok'
+        assert len(attempts) == 2
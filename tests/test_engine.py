@@ -0,0 +1,434 @@
+import asyncio
+import json
+import time
+
+import requests
+
+import tests.check_utils as check_utils
+
+
+class MockResponse(check_utils.MockResponseGET):
+
+    @property
+    def content(self):
+        return json.dumps(self.data).encode()
+
+    def iter_content(self, chunk_size=1):
+        content = self.content
+        for start in range(0, len(content), 7):
+            yield content[start:start + 7]
+
+    def close(self):
+        pass
+
+
+def mock_get_returning(data, random_timestamp, calls=None):
+    def mock_get(*args, **kwargs):
+        if calls is not None:
+            calls.append(kwargs)
+        return MockResponse(
+            *args, random_timestamp=random_timestamp, data=data, **kwargs)
+    return mock_get
+
+
+def poll_once(polling_engine, tenant):
+    async def poll():
+        await polling_engine.send_queue.start()
+        try:
+            await polling_engine.poll(tenant)
+            await polling_engine.deliver_due()
+        finally:
+            await polling_engine.send_queue.stop()
+    asyncio.run(poll())
+
+
+def make_engine(engine_module, tenants):
+    bot = check_utils.MockTelegramBot()
+    return engine_module.PollingEngine(tenants, bot, concurrency=2)
+
+
+class TestEngine:
+
+    def test_load_tenants_skips_invalid_lines(self, tmp_path):
+        import engine
+        path = tmp_path / 'tenants.jsonl'
+        path.write_text('\n'.join((
+            json.dumps({'token': 't1', 'chat_id': 1, 'from_date': 10}),
+            '{not json',
+            json.dumps({'chat_id': 2}),
+        )), encoding='UTF-8')
+        tenants = engine.load_tenants(str(path))
+        assert len(tenants) == 1, (
+            'Некорректные строки файла пользователей должны пропускаться.'
+        )
+        assert tenants[0].chat_id == '1'
+        assert tenants[0].timestamp == 10
+        assert tenants[0].headers == {'Authorization': 'OAuth t1'}
+
+    def test_poll_sends_status_to_tenant_chat(
+            self, monkeypatch, random_timestamp, data_with_new_hw_status
+    ):
+        import engine
+        monkeypatch.setattr(requests, 'get', mock_get_returning(
+            data_with_new_hw_status, random_timestamp))
+        tenant = engine.Tenant('token', '42', timestamp=0)
+        polling_engine = make_engine(engine, [tenant])
+        poll_once(polling_engine, tenant)
+        assert polling_engine.bot.chat_id == '42', (
+            'Сообщение должно уходить в чат пользователя.'
+        )
+        assert tenant.timestamp == random_timestamp, (
+            'После отправки сообщения метка пользователя должна сдвигаться.'
+        )
+
+    def test_repeated_status_is_not_enqueued_again(self):
+        import engine
+        import validation
+        tenant = engine.Tenant('token', '42', timestamp=0)
+        polling_engine = make_engine(engine, [tenant])
+        record = validation.Homework(1, 'hw.zip', 'reviewing', '2024-01-01')
+
+        async def process_twice():
+            await polling_engine.process(tenant, [record], 10)
+            await polling_engine.process(tenant, [record], 20)
+        asyncio.run(process_twice())
+        assert polling_engine.store.count_messages() == 1, (
+            'Повтор того же статуса работы не должен ставить уведомление.'
+        )
+        assert tenant.timestamp == 20
+
+    def test_stop_delivers_messages_of_staggered_polls(self, monkeypatch):
+        import engine
+        import validation
+        tenants = [engine.Tenant('token', str(index)) for index in range(2)]
+        polling_engine = engine.PollingEngine(
+            tenants, check_utils.MockTelegramBot(), period=0, jitter=0)
+        sent = []
+
+        async def queued_send(chat_id, message):
+            sent.append(chat_id)
+            return True
+
+        async def slow_poll(tenant):
+            await asyncio.sleep(0.3 * (int(tenant.chat_id) + 1))
+            await polling_engine.process(tenant, [validation.Homework(
+                1, 'hw.zip', 'approved', '2024-01-01')], None)
+
+        monkeypatch.setattr(polling_engine.send_queue, 'send', queued_send)
+        monkeypatch.setattr(polling_engine, 'poll', slow_poll)
+
+        async def run_and_stop():
+            task = asyncio.create_task(polling_engine.run())
+            await asyncio.sleep(0.1)
+            polling_engine.request_stop()
+            await asyncio.wait_for(task, 1.5)
+
+        asyncio.run(run_and_stop())
+        assert sorted(sent) == ['0', '1'], (
+            'При остановке уведомления опросов, завершившихся позже '
+            'других, тоже должны отправляться.'
+        )
+        assert polling_engine.store.count_messages() == 0
+
+    def test_send_errors_are_failed_outbox_attempts(self, monkeypatch):
+        import engine
+        tenant = engine.Tenant('token', '42')
+        polling_engine = make_engine(engine, [tenant])
+
+        def offline_send_message(chat_id, text):
+            raise requests.ConnectionError('network is unreachable')
+
+        monkeypatch.setattr(
+            polling_engine.bot, 'send_message', offline_send_message)
+        store = polling_engine.store
+        store.enqueue_messages('42', ['text'], 10)
+
+        async def deliver():
+            await polling_engine.send_queue.start()
+            try:
+                return await polling_engine.deliver_due()
+            finally:
+                await polling_engine.send_queue.stop()
+
+        assert asyncio.run(deliver()) == 1
+        ((message_id, entry),) = store.outbox.items()
+        assert entry[2] == 1, (
+            'Сетевая ошибка отправки должна учитываться как неудачная '
+            'попытка, а уведомление оставаться в outbox.'
+        )
+
+        async def broken_send(chat_id, message):
+            raise requests.ConnectionError('network is unreachable')
+
+        monkeypatch.setattr(polling_engine.send_queue, 'send', broken_send)
+        store.retry_message(message_id, 1, 0)
+        assert asyncio.run(polling_engine.deliver_due()) == 1
+        assert store.outbox[message_id][2] == 2, (
+            'Исключение из очереди отправки тоже должно учитываться как '
+            'неудачная попытка.'
+        )
+
+    def test_telegram_sink_uses_engine_send_queue(self):
+        import engine
+        import notifiers
+        tenant = engine.Tenant('token', '42')
+        polling_engine = make_engine(engine, [tenant])
+        sent = []
+
+        async def queued_send(chat_id, message):
+            sent.append((chat_id, message))
+            return True
+
+        polling_engine.send_queue.send = queued_send
+        sink = notifiers.TelegramSink(
+            '-100', send=polling_engine.send_threadsafe)
+
+        async def publish():
+            polling_engine.loop = asyncio.get_running_loop()
+            notifier = notifiers.Notifier([sink])
+            notifier.publish({'message': 'text'})
+            await polling_engine.run_blocking(notifier.close)
+            return notifier.stats()[sink.name]['ok']
+
+        assert asyncio.run(publish()) == 1
+        assert sent == [('-100', 'text')], (
+            'Приемник telegram движка должен отправлять через очередь '
+            'отправки с ее лимитами частоты.'
+        )
+
+    def test_telegram_sink_send_is_bounded_by_sink_timeout(self):
+        import engine
+        import notifiers
+        polling_engine = make_engine(engine, [engine.Tenant('token', '42')])
+        sent = []
+
+        async def slow_send(chat_id, message):
+            await asyncio.sleep(1)
+            sent.append(chat_id)
+            return True
+
+        polling_engine.send_queue.send = slow_send
+        sink = notifiers.TelegramSink(
+            '-100', timeout=0.1, send=polling_engine.send_threadsafe)
+
+        async def publish():
+            polling_engine.loop = asyncio.get_running_loop()
+            notifier = notifiers.Notifier([sink])
+            notifier.publish({'message': 'text'})
+            await polling_engine.run_blocking(notifier.close)
+            await asyncio.sleep(0)
+            return notifier.stats()[sink.name]
+
+        stats = asyncio.run(publish())
+        assert stats['error'] == 1 and not sent, (
+            'Отправка приемника telegram должна прерываться по таймауту '
+            'приемника.'
+        )
+
+    def test_schedule_spreads_tenants_over_period(self):
+        import engine
+        tenants = [engine.Tenant(str(i), str(i)) for i in range(4)]
+        polling_engine = make_engine(engine, tenants)
+        polling_engine.jitter = 0
+        polling_engine.schedule_all(now=0)
+        wheel = polling_engine.wheel
+        assert sorted(wheel.advance(0)) == [0]
+        assert sorted(wheel.advance(300)) == [1, 2]
+        assert len(wheel) == 1
+
+    def test_poll_now_moves_scheduled_tenants_to_now(self):
+        import engine
+        tenants = [engine.Tenant(str(i), str(i)) for i in range(5)]
+        polling_engine = make_engine(engine, tenants)
+        polling_engine.jitter = 0
+        polling_engine.schedule_all(now=time.monotonic())
+        polling_engine.wheel.cancel(3)
+        polling_engine.poll_now()
+        assert sorted(polling_engine.wheel.advance(
+            time.monotonic() + 1)) == [0, 1, 2, 4], (
+            'SIGUSR1 должен переносить на сейчас опросы всех '
+            'запланированных пользователей, и только их.'
+        )
+
+    def test_worker_survives_unexpected_poll_error(self, monkeypatch):
+        import engine
+        tenant = engine.Tenant('token', '42')
+        polling_engine = make_engine(engine, [tenant])
+
+        async def broken_poll(tenant):
+            raise RuntimeError('unexpected')
+
+        monkeypatch.setattr(polling_engine, 'poll', broken_poll)
+
+        async def run_worker():
+            queue = asyncio.Queue()
+            worker = asyncio.create_task(polling_engine.worker(queue))
+            for _ in range(2):
+                queue.put_nowait(0)
+            await asyncio.wait_for(queue.join(), 1)
+            alive = not worker.done()
+            worker.cancel()
+            return alive
+
+        assert asyncio.run(run_worker()), (
+            'Непредвиденная ошибка опроса не должна останавливать воркер.'
+        )
+        assert 0 in polling_engine.wheel.scheduled(), (
+            'После ошибки опрос пользователя должен планироваться снова.'
+        )
+
+    def test_open_circuit_skips_poll_without_notifying(self, monkeypatch):
+        import engine
+        import metrics
+        calls = []
+        monkeypatch.setattr(requests, 'get', mock_get_returning(
+            {'homeworks': [], 'current_date': int(time.time())}, 0, calls))
+        tenant = engine.Tenant('token', '42', timestamp=int(time.time()))
+        polling_engine = make_engine(engine, [tenant])
+        polling_engine.breaker._open(time.monotonic())
+        skipped = metrics.ERRORS.values.get(
+            (('exception', 'CircuitOpenError'),), 0)
+        poll_once(polling_engine, tenant)
+        assert calls == [], 'При открытом выключателе API не опрашивается.'
+        assert not getattr(polling_engine.bot, 'is_message_sent', False), (
+            'Открытый выключатель не ошибка пользователя: сообщение о сбое '
+            'отправляться не должно.'
+        )
+        assert polling_engine.store.count_messages() == 0
+        assert polling_engine.errors.summary(tenant.chat_id) is None, (
+            'Пропущенный опрос не должен попадать в сводку ошибок.'
+        )
+        assert metrics.ERRORS.values[
+            (('exception', 'CircuitOpenError'),)] == skipped + 1, (
+            'Пропущенный опрос должен учитываться в метриках.'
+        )
+
+    def test_unchanged_response_is_not_parsed_again(
+            self, monkeypatch, random_timestamp, homework_module
+    ):
+        import engine
+        monkeypatch.setattr(requests, 'get', mock_get_returning(
+            {'homeworks': [], 'current_date': int(time.time())},
+            random_timestamp))
+        import validation
+        parsed = []
+        validate_response = validation.validate_response
+
+        def counting_validate_response(response):
+            parsed.append(response)
+            return validate_response(response)
+
+        monkeypatch.setattr(
+            validation, 'validate_response', counting_validate_response)
+        tenant = engine.Tenant('token', '42')
+        polling_engine = make_engine(engine, [tenant])
+        poll_once(polling_engine, tenant)
+        poll_once(polling_engine, tenant)
+        assert len(parsed) == 1, (
+            'Ответ, совпадающий с уже обработанным, не должен '
+            'проверяться повторно.'
+        )
+        assert polling_engine.fingerprints.stats()['hits'] == 1
+        import metrics
+        polling_engine.collect_metrics(asyncio.Queue())
+        assert metrics.FINGERPRINT_CACHE.values[(('stat', 'hits'),)] == 1, (
+            'Попадания кеша отпечатков должны выгружаться в метрики.'
+        )
+
+    def test_old_cursor_is_read_as_stream(
+            self, monkeypatch, random_timestamp, data_with_new_hw_status
+    ):
+        import engine
+        calls = []
+        monkeypatch.setattr(requests, 'get', mock_get_returning(
+            data_with_new_hw_status, random_timestamp, calls))
+        tenant = engine.Tenant('token', '42', timestamp=0)
+        polling_engine = make_engine(engine, [tenant])
+        poll_once(polling_engine, tenant)
+        assert calls[0].get('stream'), (
+            'Ответ для давней метки должен читаться потоково.'
+        )
+        assert polling_engine.bot.text.startswith('Изменился статус')
+        assert tenant.timestamp == random_timestamp
+
+    def test_empty_answer_ends_stream_backfill(
+            self, monkeypatch, random_timestamp
+    ):
+        import engine
+        calls = []
+        current_date = int(time.time())
+        monkeypatch.setattr(requests, 'get', mock_get_returning(
+            {'homeworks': [], 'current_date': current_date},
+            random_timestamp, calls))
+        tenant = engine.Tenant('token', '42', timestamp=0)
+        polling_engine = make_engine(engine, [tenant])
+        poll_once(polling_engine, tenant)
+        poll_once(polling_engine, tenant)
+        assert [bool(call.get('stream')) for call in calls] == [True, False], (
+            'После догоняющего чтения пустой ответ должен сдвигать метку, '
+            'а не запускать потоковое чтение при каждом опросе.'
+        )
+        assert tenant.timestamp == current_date
+        assert polling_engine.store.get_cursor('42') == current_date
+
+    def test_commands_are_answered_from_one_fetch(
+            self, monkeypatch, random_timestamp, data_with_new_hw_status
+    ):
+        import engine
+        calls = []
+        monkeypatch.setattr(requests, 'get', mock_get_returning(
+            data_with_new_hw_status, random_timestamp, calls))
+        import send_queue
+        tenant = engine.Tenant('token', '42')
+        polling_engine = make_engine(engine, [tenant])
+        polling_engine.send_queue = send_queue.SendQueue(
+            polling_engine.bot, global_rate=1e9, chat_rate=1e9)
+
+        async def ask():
+            await polling_engine.send_queue.start()
+            try:
+                await asyncio.gather(
+                    polling_engine.answer('42', 'status'),
+                    polling_engine.answer('42', 'list'))
+                await polling_engine.answer('42', 'status')
+            finally:
+                await polling_engine.send_queue.stop()
+
+        asyncio.run(ask())
+        assert len(calls) == 1, (
+            'Команды должны обслуживаться одним запросом к API и кешем.'
+        )
+        assert calls[0]['params'] == {'from_date': 0}
+        assert polling_engine.bot.text.startswith('Работа'), (
+            'Ответ на /status должен содержать статус последней работы.'
+        )
+
+    def test_stop_drains_and_closes_store(
+            self, monkeypatch, random_timestamp, data_with_new_hw_status
+    ):
+        import engine
+        monkeypatch.setattr(requests, 'get', mock_get_returning(
+            data_with_new_hw_status, random_timestamp))
+        tenant = engine.Tenant('token', '42')
+        polling_engine = make_engine(engine, [tenant])
+        polling_engine.jitter = 0
+        closed = []
+        monkeypatch.setattr(
+            polling_engine.store, 'close', lambda: closed.append(True))
+
+        async def run_and_stop():
+            task = asyncio.create_task(polling_engine.run())
+            await asyncio.sleep(0.1)
+            polling_engine.request_stop()
+            await asyncio.wait_for(task, 1.5)
+
+        import metrics
+        collectors = list(metrics.REGISTRY.collectors)
+        asyncio.run(run_and_stop())
+        assert metrics.REGISTRY.collectors == collectors, (
+            'После остановки движок не должен оставлять сборщик метрик.'
+        )
+        assert polling_engine.bot.text.startswith('Изменился статус'), (
+            'Начатые опросы и отправки должны завершаться до остановки.'
+        )
+        assert closed, 'При остановке состояние должно сохраняться.'
@@ -0,0 +1,58 @@
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def connection_error(timestamp):
+    import homework
+    return ConnectionError(homework.CONNECTION_ERROR.format(
+        url=homework.ENDPOINT, headers={'Authorization': 'OAuth token'},
+        params={'from_date': timestamp}))
+
+
+class TestErrorDigest:
+
+    def test_fingerprint_ignores_variable_parts(self):
+        import error_digest
+        assert (error_digest.error_fingerprint(connection_error(1))
+                == error_digest.error_fingerprint(connection_error(2))), (
+            'Ошибки одного шаблона с разными параметрами должны иметь '
+            'один отпечаток.'
+        )
+        assert (error_digest.error_fingerprint(connection_error(1))
+                != error_digest.error_fingerprint(ValueError('1')))
+
+    def test_repeats_are_summarized_after_window(self):
+        import error_digest
+        clock = FakeClock()
+        digest = error_digest.ErrorDigest(window=3600, clock=clock)
+        assert digest.record('1', connection_error(0))
+        for timestamp in range(1, 38):
+            assert not digest.record('1', connection_error(timestamp)), (
+                'Повтор ошибки внутри окна не должен отправляться сразу.'
+            )
+        assert digest.record('1', KeyError('homeworks'))
+        assert digest.summary('1') is None
+        clock.now = 3600
+        summary = digest.summary('1')
+        assert summary == (
+            'Повторяющиеся ошибки за последние 60 мин.: '
+            'ConnectionError ×37.'
+        ), 'По окончании окна должна приходить одна сводка.'
+        assert digest.summary('1') is None
+        assert digest.record('1', connection_error(99))
+
+    def test_memory_is_bounded(self):
+        import error_digest
+        digest = error_digest.ErrorDigest(max_size=2)
+        for key in range(5):
+            for number in range(error_digest.FINGERPRINTS_PER_TENANT + 5):
+                digest.record(str(key), ValueError(f'error{"x" * number}'))
+        assert digest.stats() == {
+            'tenants': 2,
+            'fingerprints': 2 * error_digest.FINGERPRINTS_PER_TENANT,
+        }, 'Число пользователей и отпечатков должно быть ограничено.'
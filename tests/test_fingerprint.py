@@ -0,0 +1,25 @@
+class TestFingerprint:
+
+    def test_current_date_is_ignored(self):
+        import fingerprint
+        first = fingerprint.fingerprint(
+            b'{"homeworks": [], "current_date": 1000}')
+        second = fingerprint.fingerprint(
+            b'{"homeworks": [], "current_date": 2000}')
+        changed = fingerprint.fingerprint(
+            b'{"homeworks": [{"id": 1}], "current_date": 2000}')
+        assert first == second, (
+            'Отпечаток не должен зависеть от current_date.'
+        )
+        assert first != changed
+
+    def test_cache_counts_hits_and_misses(self):
+        import fingerprint
+        cache = fingerprint.FingerprintCache()
+        digest = fingerprint.fingerprint(b'{}')
+        assert not cache.matches('1', digest)
+        cache.remember('1', digest)
+        assert cache.matches('1', digest)
+        cache.forget('1')
+        assert not cache.matches('1', digest)
+        assert cache.stats() == {'hits': 1, 'misses': 2, 'size': 0}
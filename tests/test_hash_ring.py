@@ -0,0 +1,33 @@
+class TestHashRing:
+
+    def test_keys_are_spread_evenly(self):
+        import hash_ring
+        nodes = [f'worker-{index}' for index in range(4)]
+        ring = hash_ring.HashRing(nodes)
+        counts = dict.fromkeys(nodes, 0)
+        for key in range(10000):
+            counts[ring.node_for(str(key))] += 1
+        assert min(counts.values()) > 10000 / 4 * 0.75, (
+            'Пользователи должны распределяться по воркерам равномерно.'
+        )
+
+    def test_adding_node_moves_about_one_nth_of_keys(self):
+        import hash_ring
+        keys = [str(key) for key in range(10000)]
+        ring = hash_ring.HashRing([f'worker-{index}' for index in range(4)])
+        before = {key: ring.node_for(key) for key in keys}
+        ring.add('worker-4')
+        moved = [key for key in keys if ring.node_for(key) != before[key]]
+        assert len(moved) < len(keys) / 5 * 1.3, (
+            'При добавлении воркера должно переезжать около 1/N '
+            'пользователей.'
+        )
+        assert all(ring.node_for(key) == 'worker-4' for key in moved), (
+            'Переезжать должны только пользователи нового воркера.'
+        )
+        ring.remove('worker-4')
+        assert all(ring.node_for(key) == before[key] for key in keys)
+
+    def test_empty_ring(self):
+        import hash_ring
+        assert hash_ring.HashRing().node_for('1') is None
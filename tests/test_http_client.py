@@ -0,0 +1,57 @@
+import tests.check_utils as check_utils
+
+
+class TestHttpClient:
+
+    def test_session_pool_settings(self):
+        import http_client
+        session = http_client.create_session(pool_size=8, pool_hosts=2)
+        adapter = session.get_adapter('https://practicum.yandex.ru/')
+        assert adapter._pool_maxsize == 8
+        assert adapter._pool_connections == 2
+        assert adapter._pool_block, (
+            'При исчерпании пула запрос должен ждать свободное соединение.'
+        )
+
+    def test_get_api_answer_uses_shared_session(
+            self, monkeypatch, random_timestamp, homework_module
+    ):
+        calls = []
+
+        class MockSession:
+            def get(self, *args, **kwargs):
+                calls.append(kwargs)
+                return check_utils.MockResponseGET(
+                    random_timestamp=random_timestamp)
+
+        monkeypatch.setattr(homework_module, 'SESSION', MockSession())
+        homework_module.get_api_answer(random_timestamp)
+        assert calls, (
+            'Убедитесь, что get_api_answer использует общую сессию SESSION.'
+        )
+        assert calls[0]['params'] == {'from_date': random_timestamp}
+        import http_client
+        assert calls[0]['timeout'] == http_client.HTTP_TIMEOUT, (
+            'Запрос к API должен ограничиваться таймаутом, иначе зависшее '
+            'соединение навсегда займет поток и место в пуле.'
+        )
+
+    def test_timeout_is_a_transient_connection_error(
+            self, monkeypatch, homework_module
+    ):
+        import requests
+
+        import circuit_breaker
+
+        class HangingSession:
+            def get(self, *args, **kwargs):
+                raise requests.exceptions.ReadTimeout('read timed out')
+
+        try:
+            homework_module.fetch_api_response(0, {}, HangingSession())
+        except ConnectionError as error:
+            assert circuit_breaker.is_transient(error), (
+                'Таймаут запроса должен учитываться выключателем.'
+            )
+        else:
+            raise AssertionError('Таймаут должен приводить к ошибке.')
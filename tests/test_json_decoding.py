@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+
+def chunked(data, size):
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+class TestJsonDecoding:
+
+    DOCUMENT = {
+        'current_date': 123,
+        'homeworks': [
+            {'id': 1, 'homework_name': 'hw1', 'status': 'approved',
+             'reviewer_comment': 'Отлично! ' * 50},
+            {'id': 2, 'homework_name': 'hw2', 'status': 'rejected'},
+        ],
+    }
+
+    @pytest.mark.parametrize('chunk_size', [1, 5, 64, 100000])
+    def test_stream_yields_items_across_chunks(self, chunk_size):
+        import json_decoding
+        body = json.dumps(self.DOCUMENT, ensure_ascii=False).encode()
+        stream = json_decoding.HomeworkStream(chunked(body, chunk_size))
+        assert list(stream) == self.DOCUMENT['homeworks'], (
+            'Потоковый разбор должен выдавать все работы из ответа.'
+        )
+        assert stream.document == {'current_date': 123, 'homeworks': []}
+
+    def test_stream_without_homeworks_key(self):
+        import json_decoding
+        stream = json_decoding.HomeworkStream([b'{"code": "not_', b'auth"}'])
+        assert list(stream) == []
+        assert stream.document == {'code': 'not_auth'}
+
+    def test_truncated_stream_raises(self):
+        import json_decoding
+        stream = json_decoding.HomeworkStream(
+            [b'{"homeworks": [{"id": 1}, {"id"'])
+        with pytest.raises(ValueError):
+            list(stream)
+
+    def test_loads_accepts_bytes(self):
+        import json_decoding
+        assert json_decoding.loads(b'{"a": 1}') == {'a': 1}
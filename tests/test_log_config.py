@@ -0,0 +1,46 @@
+import json
+import logging
+
+
+class ExplodingTemplate(str):
+    def format(self, *args, **kwargs):
+        raise AssertionError(
+            'Шаблон не должен форматироваться, если уровень выключен.')
+
+
+class TestLogConfig:
+
+    def test_lazy_message_is_not_formatted_below_level(self, caplog):
+        import log_config
+        with caplog.at_level(logging.INFO):
+            logging.debug(log_config.lazy(ExplodingTemplate('{x}'), x=1))
+        with caplog.at_level(logging.DEBUG):
+            logging.debug(log_config.lazy('value={x}', x=1))
+        assert [record.getMessage() for record in caplog.records] == [
+            'value=1']
+
+    def test_queue_handler_writes_json_lines(self, tmp_path):
+        import log_config
+        path = tmp_path / 'bot.log'
+        handler = log_config.build_queue_handler(
+            str(path), json_lines=True, stream=None)
+        logger = logging.getLogger('test_log_config')
+        logger.propagate = False
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+        try:
+            logger.info(log_config.lazy('Опрошено {count}', count=3))
+        finally:
+            logger.removeHandler(handler)
+            handler.listener.stop()
+        entry = json.loads(path.read_text(encoding='UTF-8'))
+        assert entry['message'] == 'Опрошено 3'
+        assert entry['level'] == 'INFO'
+
+    def test_size_rotation(self, tmp_path):
+        import log_config
+        handler = log_config.build_file_handler(
+            str(tmp_path / 'bot.log'), max_bytes=100, backup_count=2)
+        assert handler.maxBytes == 100
+        assert handler.backupCount == 2
+        handler.close()
@@ -0,0 +1,52 @@
+import socket
+import urllib.request
+
+import exceptions
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class TestMetrics:
+
+    def test_histogram_render(self):
+        import metrics
+        registry = metrics.Registry()
+        histogram = registry.register(metrics.Histogram(
+            'latency_seconds', 'Latency.', buckets=(0.1, 1)))
+        histogram.observe(0.05, target='api')
+        histogram.observe(0.5, target='api')
+        histogram.observe(5, target='api')
+        text = registry.render()
+        assert 'latency_seconds_bucket{target="api",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{target="api",le="1"} 2' in text
+        assert 'latency_seconds_bucket{target="api",le="+Inf"} 3' in text
+        assert 'latency_seconds_count{target="api"} 3' in text
+        assert '# TYPE latency_seconds histogram' in text
+
+    def test_errors_counted_by_exception_class(self):
+        import metrics
+        metrics.count_error(exceptions.APIIsUnavailableError('down'))
+        text = metrics.REGISTRY.render()
+        assert (
+            'homework_errors_total{exception="APIIsUnavailableError"}'
+            in text
+        )
+
+    def test_server_exposes_metrics(self):
+        import metrics
+        registry = metrics.Registry()
+        gauge = registry.register(metrics.Gauge('tenants', 'Tenants.'))
+        registry.add_collector(lambda: gauge.set(3))
+        server = metrics.start_server(port=free_port(), registry=registry)
+        try:
+            url = 'http://{}:{}/metrics'.format(*server.server_address)
+            with urllib.request.urlopen(url, timeout=1) as response:
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert 'tenants 3' in body
@@ -0,0 +1,118 @@
+import json
+import threading
+
+import pytest
+
+
+class TestNotifiers:
+
+    def test_parse_sinks(self, tmp_path):
+        import notifiers
+        path = tmp_path / 'audit.jsonl'
+        sinks = notifiers.parse_sinks(
+            f'webhook=http://user@hooks/homework@2; jsonl={path}; '
+            'telegram=-100123')
+        assert [sink.kind for sink in sinks] == [
+            'webhook', 'jsonl', 'telegram']
+        assert sinks[0].target == 'http://user@hooks/homework'
+        assert sinks[0].timeout == 2, (
+            'Таймаут приемника задается суффиксом @секунды.'
+        )
+        assert sinks[2].timeout == notifiers.NOTIFY_TIMEOUT
+        for sink in sinks:
+            sink.close()
+        with pytest.raises(ValueError):
+            notifiers.parse_sinks('smtp=admin@example.com')
+        (audit,) = notifiers.parse_sinks(f'jsonl={path}', send=print)
+        assert not hasattr(audit, 'send_message'), (
+            'Функция отправки бота нужна только приемникам telegram.'
+        )
+        audit.close()
+
+    def test_slow_sink_does_not_delay_others(self, tmp_path):
+        import notifiers
+        release = threading.Event()
+
+        class SlowSink(notifiers.Sink):
+            kind = 'slow'
+
+            def send(self, event):
+                release.wait(2)
+
+        path = tmp_path / 'audit.jsonl'
+        audit = notifiers.JsonLinesSink(str(path))
+        notifier = notifiers.Notifier(
+            [SlowSink('slow'), audit], max_pending=1)
+        event = notifiers.status_event('1', 7, 'hw.zip', 'approved', 'd', 'ok')
+        for _ in range(2):
+            notifier.publish(event)
+            notifier.executors[audit.name].submit(lambda: None).result(1)
+        stats = notifier.stats()
+        assert stats[audit.name]['ok'] == 2, (
+            'Медленный приемник не должен задерживать остальные.'
+        )
+        assert stats['slow:slow']['dropped'] == 1, (
+            'При переполнении очереди приемника событие пропускается.'
+        )
+        release.set()
+        notifier.close()
+        lines = path.read_text(encoding='UTF-8').splitlines()
+        assert json.loads(lines[0])['homework_name'] == 'hw.zip'
+
+    def test_failures_are_counted_per_sink(self):
+        import notifiers
+
+        class BrokenSink(notifiers.Sink):
+            kind = 'broken'
+
+            def send(self, event):
+                raise ConnectionError('refused')
+
+        notifier = notifiers.Notifier([BrokenSink('a')])
+        notifier.publish({'message': 'text'})
+        notifier.close()
+        assert notifier.stats()['broken:a'] == {
+            'ok': 0, 'error': 1, 'timeout': 0, 'dropped': 0, 'pending': 0}
+
+    def test_telegram_sink_sends_through_bot_queue(self):
+        import notifiers
+        sent = []
+        with pytest.raises(TypeError):
+            notifiers.Sink('abstract')
+        sink = notifiers.TelegramSink(
+            '-100', timeout=2, send=lambda chat_id, text, timeout: sent.append(
+                (chat_id, text, timeout)) or text != 'lost')
+        notifier = notifiers.Notifier([sink])
+        notifier.publish({'message': 'ok'})
+        notifier.publish({'message': 'lost'})
+        notifier.close()
+        assert sent == [('-100', 'ok', 2), ('-100', 'lost', 2)], (
+            'Приемник telegram должен отправлять через функцию отправки '
+            'бота, а не напрямую.'
+        )
+        assert notifier.stats()[sink.name]['error'] == 1, (
+            'Неотправленное сообщение приемника telegram - ошибка доставки.'
+        )
+
+    def test_close_with_timeout_drops_backlog(self):
+        import time
+
+        import notifiers
+        release = threading.Event()
+
+        class SlowSink(notifiers.Sink):
+            kind = 'slow'
+
+            def send(self, event):
+                release.wait(0.5)
+
+        notifier = notifiers.Notifier([SlowSink('slow')])
+        for _ in range(5):
+            notifier.publish({'message': 'text'})
+        started = time.monotonic()
+        notifier.close(timeout=0.1)
+        assert time.monotonic() - started < 0.4, (
+            'Закрытие рассылки со сроком не должно ждать всю очередь '
+            'приемника.'
+        )
+        release.set()
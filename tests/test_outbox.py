@@ -0,0 +1,35 @@
+class TestOutbox:
+
+    def test_failed_message_is_retried_with_backoff(self):
+        import outbox
+        import state_store
+        store = state_store.MemoryStateStore()
+        store.enqueue_messages('1', ['text'], 10)
+        sent = []
+        outbox.deliver_pending(store, lambda message: False)
+        (entry,) = store.outbox.values()
+        assert entry[2] == 1, 'Неудачная попытка должна учитываться.'
+        assert entry[3] > 0, 'Повтор должен быть отложен.'
+        store.retry_message(next(iter(store.outbox)), 1, 0)
+        outbox.deliver_pending(
+            store, lambda message: sent.append(message) or True)
+        assert sent == ['text']
+        assert store.count_messages() == 0, (
+            'Отправленное уведомление должно удаляться из outbox.'
+        )
+
+    def test_message_is_dropped_after_max_attempts(self, monkeypatch):
+        import outbox
+        import state_store
+        monkeypatch.setattr(outbox, 'OUTBOX_MAX_ATTEMPTS', 3)
+        store = state_store.MemoryStateStore()
+        store.enqueue_messages('1', ['text'], 10)
+        outbox.settle(store, (1, '1', 'text', 2), False)
+        assert store.count_messages() == 0, (
+            'После OUTBOX_MAX_ATTEMPTS попыток уведомление удаляется.'
+        )
+
+    def test_retry_delay_is_capped(self):
+        import outbox
+        assert outbox.retry_delay(1) == outbox.OUTBOX_RETRY_BASE
+        assert outbox.retry_delay(100) == outbox.OUTBOX_RETRY_MAX
@@ -0,0 +1,43 @@
+import json
+
+
+class TestProfiling:
+
+    def test_disabled_profiler_is_a_no_op(self, monkeypatch):
+        import profiling
+        monkeypatch.setattr(profiling, 'PROFILE_CPU_EVERY', 0)
+        monkeypatch.setattr(profiling, 'PROFILE_MEMORY_EVERY', 0)
+        monkeypatch.setattr(profiling, 'PROFILE_PHASES', False)
+        profiler = profiling.from_env()
+        assert type(profiler) is profiling.NullProfiler
+        assert profiler.phase('fetch') is profiler.phase('send'), (
+            'Выключенное профилирование не должно создавать объектов.'
+        )
+
+    def test_profiles_are_sampled_and_rotated(self, tmp_path):
+        import profiling
+        profiler = profiling.Profiler(
+            cpu_every=2, memory_every=1, phases=True,
+            directory=str(tmp_path), keep=1)
+        for _ in range(4):
+            profiler.start_iteration()
+            with profiler.phase('fetch'):
+                sum(range(1000))
+            with profiler.phase('send'):
+                pass
+            profiler.end_iteration()
+        profiler.close()
+        assert [path.name for path in tmp_path.glob('*.prof')] == [
+            'cpu-00000004.prof'], (
+            'cProfile должен сниматься каждую N-ю итерацию, а старые '
+            'файлы - удаляться.'
+        )
+        records = [json.loads(line) for line in (
+            tmp_path / 'profile.log').read_text(encoding='UTF-8').splitlines()
+            if line.startswith('{')]
+        phases = [record for record in records if 'phases' in record]
+        assert len(phases) == 4
+        assert set(phases[0]['phases']) == {'fetch', 'send'}
+        assert sum('memory' in record for record in records) == 3, (
+            'Разница снимков памяти пишется начиная со второй итерации.'
+        )
@@ -0,0 +1,76 @@
+import gzip
+import json
+
+import pytest
+
+
+class FakeResponse:
+    def __init__(self, body, status_code=200):
+        self.content = json.dumps(body).encode('UTF-8')
+        self.status_code = status_code
+
+
+class FakeSession:
+    def __init__(self, bodies):
+        self.bodies = list(bodies)
+
+    def get(self, url, headers=None, params=None, stream=False, timeout=None):
+        return FakeResponse(self.bodies.pop(0))
+
+
+class TestRecording:
+
+    def test_recording_redacts_token_and_replays_per_tenant(self, tmp_path):
+        import homework
+        import recording
+        path = str(tmp_path / 'api.jsonl.gz')
+        first = {'homeworks': [], 'current_date': 1}
+        leaked = {'error': 'bad token secret2', 'current_date': 2}
+        recorder = recording.RecordingSession(
+            path, FakeSession([first, leaked]))
+        for token in ('secret1', 'secret2'):
+            homework.fetch_api_response(
+                0, homework.make_headers(token), recorder)
+        recorder.close()
+        with gzip.open(path, 'rt', encoding='UTF-8') as file:
+            text = file.read()
+        assert 'secret' not in text, 'Токены не должны попадать в запись.'
+        replay = recording.ReplaySession(path, speed=0)
+        answer = homework.request_api_answer(
+            5, homework.make_headers('secret1'), replay)
+        assert answer == first, (
+            'Пользователь должен получать свои записанные ответы.'
+        )
+        with pytest.raises(Exception):
+            homework.request_api_answer(
+                5, homework.make_headers('secret2'), replay)
+
+    def test_replay_keeps_recorded_pace(self, tmp_path):
+        import recording
+        path = str(tmp_path / 'api.jsonl.gz')
+        with gzip.open(path, 'wt', encoding='UTF-8') as file:
+            for offset in (0, 10):
+                file.write(json.dumps({
+                    'offset': offset, 'latency': 2, 'tenant': 'x',
+                    'params': {}, 'status': 200, 'body': '{}'}) + '\n')
+        now = [0.0]
+        sleeps = []
+
+        def sleep(delay):
+            sleeps.append(delay)
+            now[0] += delay
+
+        replay = recording.ReplaySession(
+            path, speed=2, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            replay.get('url')
+        assert sleeps == [1.0, 5.0, 1.0], (
+            'При скорости 2 паузы должны быть вдвое короче записанных.'
+        )
+
+    @pytest.mark.parametrize('value, speed', [('1', 1.0), ('max', 0.0)])
+    def test_parse_speed(self, value, speed):
+        import recording
+        assert recording.parse_speed(value) == speed
+        with pytest.raises(ValueError):
+            recording.parse_speed('0')
@@ -0,0 +1,42 @@
+class TestTimingWheel:
+
+    def test_expires_in_deadline_order(self):
+        import scheduler
+        wheel = scheduler.TimingWheel(now=0, tick=1, slots=8)
+        wheel.schedule('a', 2.5)
+        wheel.schedule('b', 5)
+        assert wheel.advance(2) == []
+        assert wheel.advance(3) == ['a']
+        assert wheel.advance(10) == ['b']
+        assert len(wheel) == 0
+
+    def test_deadline_beyond_one_rotation(self):
+        import scheduler
+        wheel = scheduler.TimingWheel(now=0, tick=1, slots=8)
+        wheel.schedule('far', 20)
+        assert wheel.advance(4) == []
+        assert wheel.advance(12) == [], (
+            'Срок дальше одного оборота колеса не должен срабатывать раньше.'
+        )
+        assert wheel.advance(20) == ['far']
+
+    def test_reschedule_and_cancel(self):
+        import scheduler
+        wheel = scheduler.TimingWheel(now=0, tick=1, slots=8)
+        wheel.schedule('a', 1)
+        wheel.schedule('a', 6)
+        wheel.schedule('b', 2)
+        wheel.cancel('b')
+        assert wheel.advance(3) == []
+        assert wheel.advance(6) == ['a']
+
+    def test_lag_stats(self):
+        import scheduler
+        wheel = scheduler.TimingWheel(now=0, tick=1, slots=8)
+        wheel.schedule('a', 1)
+        wheel.schedule('b', 2)
+        wheel.advance(3)
+        stats = wheel.stats()
+        assert stats['expired'] == 2
+        assert stats['lag_max'] == 2
+        assert stats['lag_avg'] == 1.5
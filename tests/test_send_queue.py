@@ -0,0 +1,118 @@
+import asyncio
+
+import requests
+from telebot.apihelper import ApiTelegramException
+
+
+def too_many_requests(retry_after):
+    return ApiTelegramException('send_message', None, {
+        'error_code': 429,
+        'description': 'Too Many Requests',
+        'parameters': {'retry_after': retry_after},
+    })
+
+
+class FlakyBot:
+    def __init__(self, failures):
+        self.failures = failures
+        self.sent = []
+
+    def send_message(self, chat_id, text):
+        if self.failures:
+            self.failures -= 1
+            raise too_many_requests(0)
+        self.sent.append((chat_id, text))
+
+
+class ThrottledBot:
+    def __init__(self, throttled=(), retry_after=1):
+        self.throttled = set(throttled)
+        self.retry_after = retry_after
+        self.sent = []
+
+    def send_message(self, chat_id, text):
+        if chat_id in self.throttled:
+            self.throttled.discard(chat_id)
+            raise too_many_requests(self.retry_after)
+        self.sent.append((chat_id, text))
+
+
+class OfflineBot:
+    def send_message(self, chat_id, text):
+        raise requests.exceptions.ConnectionError('network is unreachable')
+
+
+def run_sends(queue, messages):
+    async def run():
+        await queue.start()
+        try:
+            return await asyncio.gather(
+                *(queue.send(chat_id, text) for chat_id, text in messages))
+        finally:
+            await queue.stop()
+    return asyncio.run(run())
+
+
+class TestSendQueue:
+
+    def test_retry_after_is_not_a_failure(self):
+        import send_queue
+        bot = FlakyBot(failures=1)
+        queue = send_queue.SendQueue(bot, workers=1, chat_rate=1000)
+        assert run_sends(queue, [('1', 'hello')]) == [True], (
+            'Ответ 429 должен приводить к повтору после retry_after, '
+            'а не к ошибке отправки.'
+        )
+        assert bot.sent == [('1', 'hello')]
+
+    def test_gives_up_after_retries(self):
+        import send_queue
+        bot = FlakyBot(failures=send_queue.SEND_MAX_RETRIES)
+        queue = send_queue.SendQueue(bot, workers=1, chat_rate=1000)
+        assert run_sends(queue, [('1', 'hello')]) == [False]
+
+    def test_network_error_is_not_sent(self):
+        import send_queue
+        queue = send_queue.SendQueue(OfflineBot(), workers=1, chat_rate=1000)
+        assert run_sends(queue, [('1', 'hello')]) == [False], (
+            'Сетевая ошибка при отправке должна означать неотправленное '
+            'сообщение, а не исключение.'
+        )
+
+    def test_get_retry_after(self):
+        import send_queue
+        assert send_queue.get_retry_after(too_many_requests(7)) == 7
+        assert send_queue.get_retry_after(ValueError()) is None
+
+    def test_chat_buckets_are_separate(self):
+        import send_queue
+        queue = send_queue.SendQueue(FlakyBot(0), chat_rate=1)
+        assert queue.chat_bucket('1') is queue.chat_bucket('1')
+        assert queue.chat_bucket('1') is not queue.chat_bucket('2')
+        assert queue.chat_bucket('1').reserve() == 0.0
+        assert queue.chat_bucket('1').reserve() > 0, (
+            'Сообщения в один чат должны ограничиваться по частоте.'
+        )
+        assert queue.chat_bucket('2').reserve() == 0.0
+
+    def test_chat_rate_limit_does_not_block_other_chats(self):
+        import send_queue
+        bot = ThrottledBot()
+        queue = send_queue.SendQueue(bot, workers=1, chat_rate=5)
+        assert run_sends(
+            queue, [('1', 'a'), ('1', 'b'), ('2', 'c')]) == [True] * 3
+        assert [chat_id for chat_id, _ in bot.sent] == ['1', '2', '1'], (
+            'Пока чат ждет жетона, воркер должен отправлять сообщения '
+            'в другие чаты, а не простаивать.'
+        )
+
+    def test_retry_after_does_not_block_other_chats(self):
+        import send_queue
+        bot = ThrottledBot(throttled={'1'})
+        queue = send_queue.SendQueue(bot, workers=1, chat_rate=1000)
+        assert run_sends(queue, [('1', 'a'), ('2', 'b')]) == [True, True]
+        assert bot.sent == [('2', 'b'), ('1', 'a')], (
+            'Ответ 429 должен приостанавливать только свой чат, а не '
+            'занимать воркер на retry_after секунд.'
+        )
+        assert queue.qsize() == 0
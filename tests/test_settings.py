@@ -0,0 +1,17 @@
+import pytest
+
+
+class TestSettings:
+
+    def test_invalid_number_is_reported_by_check(self, monkeypatch):
+        import settings
+        monkeypatch.setattr(settings, 'ERRORS', [])
+        monkeypatch.setenv('SEND_WORKERS', 'four')
+        monkeypatch.setenv('POLL_JITTER', '2.5')
+        assert settings.env_int('SEND_WORKERS', 4) == 4, (
+            'Некорректное значение не должно ронять импорт модуля.'
+        )
+        assert settings.env_float('POLL_JITTER', 5.0) == 2.5
+        assert settings.env_int('MISSING_SETTING', 7) == 7
+        with pytest.raises(ValueError, match='SEND_WORKERS'):
+            settings.check()
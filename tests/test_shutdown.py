@@ -0,0 +1,60 @@
+import os
+import signal
+import threading
+import time
+
+
+def send_to_main_thread(signum, delay=0.05):
+    timer = threading.Timer(
+        delay, signal.pthread_kill, (threading.main_thread().ident, signum))
+    timer.start()
+    return timer
+
+
+class TestGracefulShutdown:
+
+    def test_stop_signal_interrupts_sleep(self):
+        import shutdown
+        start = time.monotonic()
+        with shutdown.GracefulShutdown(timeout=60) as controller:
+            send_to_main_thread(signal.SIGTERM)
+            with controller.interruptible():
+                time.sleep(5)
+            raise AssertionError(
+                'Сигнал остановки должен прерывать ожидание и выходить '
+                'из цикла.'
+            )
+        assert time.monotonic() - start < 1
+        assert controller.stopping
+        assert controller.watchdog.finished.is_set(), (
+            'После выхода сторожевой таймер должен останавливаться.'
+        )
+
+    def test_stop_during_work_skips_next_sleep(self):
+        import shutdown
+        with shutdown.GracefulShutdown(timeout=60) as controller:
+            os.kill(os.getpid(), signal.SIGTERM)
+            assert controller.stopping, (
+                'Сигнал вне ожидания должен только запоминаться.'
+            )
+            with controller.interruptible():
+                raise AssertionError(
+                    'После сигнала остановки ожидание не должно начинаться.'
+                )
+
+    def test_poll_now_ends_sleep_early(self):
+        import shutdown
+        start = time.monotonic()
+        with shutdown.GracefulShutdown() as controller:
+            send_to_main_thread(signal.SIGUSR1)
+            with controller.interruptible():
+                time.sleep(5)
+        assert time.monotonic() - start < 1
+        assert not controller.stopping
+
+    def test_previous_handlers_are_restored(self):
+        import shutdown
+        previous = signal.getsignal(signal.SIGINT)
+        with shutdown.GracefulShutdown():
+            assert signal.getsignal(signal.SIGINT) != previous
+        assert signal.getsignal(signal.SIGINT) == previous
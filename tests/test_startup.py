@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_homework(*args, **env):
+    return subprocess.run(
+        [sys.executable, *args], cwd=BASE_DIR, capture_output=True,
+        text=True, timeout=10, env={**os.environ, **env})
+
+
+class TestStartup:
+
+    def test_network_stacks_are_imported_lazily(self):
+        result = run_homework('-c', (
+            'import sys, homework; '
+            'print(sorted(name for name in ("requests", "telebot", "dotenv") '
+            'if name in sys.modules))'))
+        assert result.stdout.strip() == '[]', (
+            'Импорт homework не должен загружать telebot, requests и '
+            'dotenv.'
+        )
+
+    def test_check_mode_validates_config(self, tmp_path):
+        tokens = {'PRACTICUM_TOKEN': 'token', 'TELEGRAM_TOKEN': 'token',
+                  'TELEGRAM_CHAT_ID': '1'}
+        result = run_homework('homework.py', '--check', **tokens)
+        assert result.returncode == 0, result.stderr
+        assert 'Время запуска' in result.stderr, (
+            'Режим --check должен выводить отчет о времени запуска.'
+        )
+        result = run_homework(
+            'homework.py', '--check',
+            STATE_DB_PATH=str(tmp_path / 'missing' / 'state.sqlite3'),
+            **tokens)
+        assert result.returncode == 1, (
+            'Режим --check должен завершаться с ошибкой при неверных '
+            'настройках.'
+        )
+        result = run_homework(
+            'homework.py', '--check', NOTIFY_SINKS='bogus=1', **tokens)
+        assert result.returncode == 1, (
+            'Режим --check должен проверять описание приемников '
+            'NOTIFY_SINKS.'
+        )
+        result = run_homework(
+            'homework.py', '--check', METRICS_PORT='abc', **tokens)
+        assert result.returncode == 1 and 'Traceback' not in result.stderr, (
+            'Нечисловая настройка должна приводить к понятной ошибке '
+            '--check, а не к исключению при импорте.'
+        )
+        assert 'METRICS_PORT' in result.stderr
+
+    def test_timer_reports_first_poll_once(self, caplog):
+        import logging
+        import startup
+        timer = startup.StartupTimer(started=0.0)
+        timer.mark('imports')
+        with caplog.at_level(logging.INFO):
+            timer.first_poll()
+            timer.first_poll()
+        assert [phase for phase, _ in timer.phases] == [
+            'imports', 'first_poll']
+        assert len(caplog.records) == 1
@@ -0,0 +1,88 @@
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'state.sqlite3')
+
+
+class TestStateStore:
+
+    def test_memory_store_roundtrip(self):
+        import state_store
+        store = state_store.open_store()
+        assert store.get_cursor('1') is None
+        store.set_cursor('1', 100)
+        store.set_last_error('1', 'error')
+        assert store.get_cursor('1') == 100
+        assert store.get_last_error('1') == 'error'
+
+    def test_sqlite_store_survives_restart(self, db_path):
+        import state_store
+        store = state_store.open_store(db_path)
+        store.set_cursor('1', 100)
+        store.set_last_error('1', 'error')
+        store.close()
+        store = state_store.open_store(db_path)
+        assert store.get_cursor('1') == 100, (
+            'Временная метка должна сохраняться между перезапусками.'
+        )
+        assert store.get_last_error('1') == 'error'
+        mode = store.connection.execute('PRAGMA journal_mode').fetchone()[0]
+        assert mode == 'wal'
+        store.close()
+
+    def test_sqlite_store_batches_commits(self, db_path):
+        import state_store
+        store = state_store.SQLiteStateStore(db_path, batch_size=3)
+        reader = sqlite3.connect(db_path)
+        query = 'SELECT COUNT(*) FROM tenant_state'
+        store.set_cursor('1', 1)
+        store.set_cursor('2', 2)
+        assert reader.execute(query).fetchone()[0] == 0, (
+            'Изменения должны фиксироваться пачкой, а не по одному.'
+        )
+        store.set_cursor('3', 3)
+        assert reader.execute(query).fetchone()[0] == 3
+        reader.close()
+        store.close()
+
+    def test_outbox_is_committed_with_cursor(self, db_path):
+        import state_store
+        store = state_store.SQLiteStateStore(db_path, batch_size=100)
+        store.enqueue_messages('1', ['first', 'second'], 100)
+        reader = sqlite3.connect(db_path)
+        assert reader.execute(
+            'SELECT COUNT(*) FROM outbox').fetchone()[0] == 0
+        store.flush()
+        assert reader.execute(
+            'SELECT COUNT(*) FROM outbox').fetchone()[0] == 2
+        assert reader.execute(
+            'SELECT cursor FROM tenant_state').fetchone()[0] == 100, (
+            'Уведомления и метка должны фиксироваться одной транзакцией.'
+        )
+        reader.close()
+        store.close()
+
+    @pytest.mark.parametrize('sqlite', [False, True])
+    def test_outbox_keeps_order_per_tenant(self, sqlite, db_path):
+        import state_store
+        store = state_store.open_store(db_path if sqlite else None)
+        store.enqueue_messages('1', ['a1', 'a2'], 10)
+        store.enqueue_messages('2', ['b1'], 20)
+        due = store.due_messages(0)
+        assert [entry[2] for entry in due] == ['a1', 'b1'], (
+            'У пользователя должно отправляться только самое старое '
+            'уведомление.'
+        )
+        store.retry_message(due[0][0], 1, 50)
+        store.ack_message(due[1][0])
+        assert store.due_messages(0) == [], (
+            'Отложенное уведомление не должно пропускать вперед следующие.'
+        )
+        assert [entry[2:] for entry in store.due_messages(50)] == [
+            ('a1', 1)]
+        assert store.count_messages() == 2
+        store.close()
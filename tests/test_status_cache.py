@@ -0,0 +1,84 @@
+import asyncio
+
+
+def make_record(name, status='approved', date_updated='2024-01-01T00:00:00Z'):
+    import validation
+    return validation.Homework(None, name, status, date_updated)
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestStatusCache:
+
+    def test_entry_expires_after_ttl(self):
+        import status_cache
+        clock = FakeClock()
+        cache = status_cache.StatusCache(ttl=10, clock=clock)
+        cache.put('1', [make_record('a')])
+        clock.now = 10
+        assert [record.name for record in cache.get('1')] == ['a']
+        clock.now = 11
+        assert cache.get('1') is None, (
+            'Запись старше ttl должна считаться устаревшей.'
+        )
+
+    def test_update_merges_and_refreshes_existing_entry(self):
+        import status_cache
+        clock = FakeClock()
+        cache = status_cache.StatusCache(ttl=10, clock=clock)
+        cache.update('1', [make_record('a')])
+        assert len(cache) == 0, (
+            'Цикл опроса не должен создавать неполные записи.'
+        )
+        cache.put('1', [make_record('a', 'reviewing')])
+        clock.now = 8
+        cache.update('1', [make_record(
+            'b', 'rejected', '2024-02-01T00:00:00Z')])
+        clock.now = 15
+        records = cache.get('1')
+        assert [(record.name, record.status) for record in records] == [
+            ('b', 'rejected'), ('a', 'reviewing')], (
+            'Опрос должен дополнять и продлевать запись; самые новые '
+            'работы идут первыми.'
+        )
+
+    def test_least_recently_used_entry_is_evicted(self):
+        import status_cache
+        cache = status_cache.StatusCache(max_size=2)
+        cache.put('1', [])
+        cache.put('2', [])
+        cache.get('1')
+        cache.put('3', [])
+        assert list(cache.entries) == ['1', '3'], (
+            'При переполнении должна вытесняться давно не использованная '
+            'запись.'
+        )
+
+    def test_concurrent_misses_share_one_fetch(self):
+        import status_cache
+        cache = status_cache.StatusCache()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return [make_record('a')]
+
+        async def ask():
+            return await asyncio.gather(*(
+                cache.get_or_fetch('1', fetch) for _ in range(10)))
+
+        results = asyncio.run(ask())
+        assert len(calls) == 1, (
+            'Одновременные запросы устаревшей записи должны выполнять '
+            'одну загрузку.'
+        )
+        assert all(result[0].name == 'a' for result in results)
+        assert cache.stats()['fetches'] == 1
@@ -0,0 +1,56 @@
+import pytest
+
+
+class TestStatusIndex:
+
+    def test_only_transitions_are_changes(self):
+        import state_store
+        import status_index
+        index = status_index.StatusIndex(state_store.MemoryStateStore())
+        assert index.changed('1', 7, 'reviewing', 'd1')
+        index.remember('1', 7, 'reviewing', 'd1')
+        assert not index.changed('1', 7, 'reviewing', 'd1'), (
+            'Тот же статус работы не должен считаться изменением.'
+        )
+        assert index.changed('1', 7, 'approved', 'd2')
+        assert index.changed('1', 7, 'reviewing', 'd2'), (
+            'Повторный вердикт с новым date_updated - это изменение.'
+        )
+        assert index.changed('2', 7, 'reviewing', 'd1'), (
+            'Индексы пользователей должны быть независимы.'
+        )
+        assert index.changed('1', None, 'reviewing', 'd1')
+
+    def test_memory_is_bounded_and_evicted_entries_are_reloaded(
+            self, monkeypatch
+    ):
+        import state_store
+        import status_index
+        monkeypatch.setattr(status_index, 'HOMEWORKS_PER_TENANT', 2)
+        store = state_store.MemoryStateStore()
+        index = status_index.StatusIndex(store, max_size=2)
+        for homework_id in range(3):
+            index.remember('1', homework_id, 'approved', 'd')
+        index.remember('2', 0, 'approved', 'd')
+        index.remember('3', 0, 'approved', 'd')
+        assert index.stats() == {'tenants': 2, 'homeworks': 2}, (
+            'Индекс должен вытеснять давно не использованные записи.'
+        )
+        assert not index.changed('1', 0, 'approved', 'd'), (
+            'Вытесненная работа должна читаться из хранилища.'
+        )
+
+    @pytest.mark.parametrize('homework_id', [5, '5'])
+    def test_index_survives_restart(self, tmp_path, homework_id):
+        import state_store
+        import status_index
+        path = str(tmp_path / 'state.sqlite3')
+        store = state_store.open_store(path)
+        status_index.StatusIndex(store).remember('1', 5, 'approved', 'd')
+        store.close()
+        store = state_store.open_store(path)
+        assert not status_index.StatusIndex(store).changed(
+            '1', homework_id, 'approved', 'd'), (
+            'Индекс статусов должен сохраняться между перезапусками.'
+        )
+        store.close()
@@ -0,0 +1,30 @@
+import pytest
+import requests
+
+from benchmarks.stub_servers import (PracticumHandler, StubConfig,
+                                     start_stub)
+
+
+@pytest.fixture
+def practicum_stub(monkeypatch, homework_module):
+    server, url = start_stub(PracticumHandler, StubConfig(homeworks=2))
+    monkeypatch.setattr(
+        homework_module, 'ENDPOINT',
+        url + '/api/user_api/homework_statuses/')
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestStubServers:
+
+    def test_practicum_stub_matches_api_format(
+            self, practicum_stub, homework_module
+    ):
+        response = homework_module.request_api_answer(
+            0, homework_module.make_headers('token'), requests.Session())
+        homework_module.check_response(response)
+        messages = homework_module.parse_statuses(response['homeworks'])
+        assert len(messages) == 2, (
+            'Заглушка должна отвечать в формате API Практикума.'
+        )
@@ -0,0 +1,103 @@
+class TestSupervisor:
+
+    def test_merge_metrics_labels_and_groups_samples(self):
+        import supervisor
+        text = ('# HELP homework_errors_total Ошибки.\n'
+                '# TYPE homework_errors_total counter\n'
+                'homework_errors_total{exception="KeyError"} 1\n'
+                '# HELP homework_active_tenants Пользователи.\n'
+                '# TYPE homework_active_tenants gauge\n'
+                'homework_active_tenants 5\n')
+        merged = supervisor.merge_metrics(
+            [('worker-0', text), ('worker-1', text)])
+        assert merged.splitlines() == [
+            '# HELP homework_errors_total Ошибки.',
+            '# TYPE homework_errors_total counter',
+            'homework_errors_total{exception="KeyError",worker="worker-0"} 1',
+            'homework_errors_total{exception="KeyError",worker="worker-1"} 1',
+            '# HELP homework_active_tenants Пользователи.',
+            '# TYPE homework_active_tenants gauge',
+            'homework_active_tenants{worker="worker-0"} 5',
+            'homework_active_tenants{worker="worker-1"} 5',
+        ], (
+            'Метрики воркеров должны получать метку worker и '
+            'группироваться под одним HELP и TYPE.'
+        )
+
+    def test_moved_tenant_keeps_latest_cursor(self, tmp_path):
+        import engine
+        import state_store
+        import supervisor
+        paths = [str(tmp_path / f'state.worker-{index}') for index in range(3)]
+        for path, cursor in zip(paths[1:], (100, 200)):
+            store = state_store.SQLiteStateStore(path)
+            store.set_cursor('42', cursor)
+            store.set_last_error('42', f'error {cursor}')
+            store.close()
+        store = state_store.SQLiteStateStore(paths[0])
+        supervisor.adopt_state(
+            [engine.Tenant('token', '42')], store, paths[1:])
+        assert store.get_cursor('42') == 200, (
+            'Переехавший пользователь должен продолжать опрос с самой '
+            'поздней сохраненной метки.'
+        )
+        assert store.get_last_error('42') == 'error 200'
+        store.close()
+
+    def test_moved_tenant_takes_statuses_and_outbox(self, tmp_path):
+        import engine
+        import state_store
+        import supervisor
+        paths = [str(tmp_path / f'state.worker-{index}') for index in range(2)]
+        sibling = state_store.SQLiteStateStore(paths[1])
+        sibling.set_homework_status('42', '7', 'reviewing', '2024-01-01')
+        sibling.enqueue_messages('42', ['first', 'second'], 100)
+        sibling.enqueue_messages('43', ['other'], 100)
+        sibling.close()
+        store = state_store.SQLiteStateStore(paths[0])
+        supervisor.adopt_state([engine.Tenant('token', '42')], store, paths[1:])
+        assert store.get_homework_status('42', '7') == (
+            'reviewing', '2024-01-01'), (
+            'Статусы работ должны переезжать вместе с пользователем.'
+        )
+        assert [entry[2] for entry in store.due_messages(0)] == ['first']
+        assert store.count_messages() == 2, (
+            'Неотправленные уведомления должны переезжать вместе с '
+            'пользователем.'
+        )
+        store.close()
+        sibling = state_store.SQLiteStateStore(paths[1])
+        assert sibling.get_homework_status('42', '7') is None
+        assert [entry[1] for entry in sibling.due_messages(0)] == ['43'], (
+            'Перенесенные уведомления не должны оставаться у прежнего '
+            'воркера, иначе они уйдут дважды.'
+        )
+        sibling.close()
+
+    def test_tenant_moving_back_takes_newer_state(self, tmp_path):
+        import engine
+        import state_store
+        import supervisor
+        paths = [str(tmp_path / f'state.worker-{index}') for index in range(2)]
+        tenants = [engine.Tenant('token', '42')]
+        first = state_store.SQLiteStateStore(paths[0])
+        first.set_homework_status('42', '7', 'reviewing', '2024-01-01')
+        first.enqueue_messages('42', [], 100)
+        first.close()
+        second = state_store.SQLiteStateStore(paths[1])
+        supervisor.adopt_state(tenants, second, paths[:1])
+        second.set_homework_status('42', '7', 'approved', '2024-01-02')
+        second.enqueue_messages('42', [], 300)
+        second.close()
+        first = state_store.SQLiteStateStore(paths[0])
+        supervisor.adopt_state(tenants, first, paths[1:])
+        assert first.get_cursor('42') == 300, (
+            'Вернувшийся пользователь должен продолжать опрос с метки '
+            'воркера, у которого был последним, а не со своей старой.'
+        )
+        assert first.get_homework_status('42', '7') == (
+            'approved', '2024-01-02'), (
+            'Вернувшийся пользователь не должен получать повторно '
+            'уведомления, которые уже отправил другой воркер.'
+        )
+        first.close()
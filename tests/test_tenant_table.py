@@ -0,0 +1,52 @@
+class TestTenantTable:
+
+    def test_rows_behave_like_tenants(self):
+        import engine
+        import tenant_table
+        tenant = engine.Tenant('token', '42', timestamp=10)
+        tenant.last_status = 'reviewing'
+        table = tenant_table.TenantTable([tenant])
+        row = table[0]
+        assert (row.token, row.chat_id, row.timestamp) == ('token', '42', 10)
+        assert row.headers == tenant.headers
+        assert row.last_status == 'reviewing'
+        assert row.last_updated is None and row.last_message is None
+        row.timestamp = 20
+        row.last_status = None
+        row.last_updated = 1.5
+        row.last_message = 'error'
+        assert table[-1].timestamp == 20, (
+            'Изменения должны сохраняться в столбцах таблицы.'
+        )
+        assert table[0].last_status is None
+        assert table[0].last_updated == 1.5
+        assert table.last_messages == {0: 'error'}
+        row.last_message = None
+        assert table.last_messages == {}, (
+            'Пустые тексты ошибок не должны занимать память.'
+        )
+        assert [row.chat_id for row in table] == ['42']
+
+    def test_indexed_wheel_matches_timing_wheel(self):
+        import scheduler
+        wheel = scheduler.IndexedTimingWheel(now=0, capacity=3, tick=1,
+                                             slots=8)
+        wheel.schedule(0, 2.5)
+        wheel.schedule(1, 20)
+        wheel.schedule(2, 1)
+        wheel.schedule(2, 6)
+        wheel.cancel(1)
+        assert len(wheel) == 2
+        assert wheel.advance(3) == [0]
+        assert wheel.advance(12) == [2]
+        assert len(wheel) == 0
+        assert wheel.stats()['expired'] == 2
+
+    def test_benchmark_reports_bytes_per_tenant(self):
+        from benchmarks import bench_tenants
+        report = bench_tenants.run(bench_tenants.parse_args(
+            ['--tenants', '2000', '--layouts', 'table']))
+        per_tenant = float(report.split('bytes/tenant=')[1].split()[0])
+        assert per_tenant < bench_tenants.TARGET_BYTES, (
+            'Состояние пользователя должно занимать меньше 1 КБ.'
+        )
@@ -0,0 +1,41 @@
+import pytest
+
+
+class TestValidation:
+
+    def test_valid_response_becomes_records(self, homework_module):
+        import validation
+        response = {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved',
+                 'date_updated': '2021-04-11T10:31:09Z'},
+                {'id': 2, 'homework_name': 'hw2',
+                 'status': ''.join(['revie', 'wing'])},
+            ],
+            'current_date': 123,
+        }
+        records, current_date = validation.validate_response(response)
+        assert current_date == 123
+        assert [record.id for record in records] == [1, 2]
+        assert records[1].status is validation.STATUSES['reviewing'], (
+            'Статусы записей должны быть интернированы.'
+        )
+        assert not hasattr(records[0], '__dict__')
+        assert records[0].message() == homework_module.parse_status(
+            response['homeworks'][0])
+
+    @pytest.mark.parametrize('response, error', [
+        ([], TypeError),
+        ({'current_date': 1}, KeyError),
+        ({'homeworks': {}}, TypeError),
+        ({'homeworks': ['hw']}, TypeError),
+        ({'homeworks': [{'status': 'approved'}]}, KeyError),
+        ({'homeworks': [{'homework_name': 'hw', 'status': 'unknown'}]},
+         ValueError),
+        ({'homeworks': [{'homework_name': 'hw', 'status': ['approved']}]},
+         ValueError),
+    ])
+    def test_errors_match_existing_checks(self, response, error):
+        import validation
+        with pytest.raises(error):
+            validation.validate_response(response)
@@ -0,0 +1,80 @@
+import logging
+import sys
+
+import homework
+import log_config
+
+STATUSES = {
+    status: sys.intern(status) for status in homework.HOMEWORK_VERDICTS}
+RESPONSE_VALIDATED = 'Ответ API проверен, работ: {count}.'
+
+
+class Homework:
+    """Компактная запись о домашней работе из ответа API.
+    Хранит только поля, нужные для уведомления и выбора частоты опроса.
+    Статус - интернированная строка из HOMEWORK_VERDICTS, поэтому все
+    записи с одинаковым статусом ссылаются на один объект.
+    """
+
+    __slots__ = ('id', 'name', 'status', 'date_updated')
+
+    def __init__(self, id, name, status, date_updated=None):
+        """Создает запись о работе."""
+        self.id = id
+        self.name = name
+        self.status = status
+        self.date_updated = date_updated
+
+    def __repr__(self):
+        """Возвращает отладочное представление записи."""
+        return f'Homework({self.id!r}, {self.name!r}, {self.status!r})'
+
+    def message(self):
+        """Возвращает сообщение об изменении статуса работы."""
+        return homework.HOMEWORK_VERDICT.format(
+            homework_name=self.name,
+            verdict=homework.HOMEWORK_VERDICTS[self.status])
+
+
+def validate_homework(item):
+    """Проверяет одну работу и возвращает запись Homework.
+    Ошибки те же, что у parse_status: KeyError без homework_name и
+    ValueError для неизвестного статуса; если работа не словарь -
+    TypeError.
+    """
+    if not isinstance(item, dict):
+        raise TypeError(homework.HOMEWORK_WRONG_TYPE.format(
+            homework_type=type(item)))
+    if 'homework_name' not in item:
+        raise KeyError(homework.NO_HOMEWORK_NAME_IN_HOMEWORKS)
+    raw_status = item.get('status')
+    status = STATUSES.get(raw_status) if isinstance(raw_status, str) else None
+    if status is None:
+        raise ValueError(homework.UNKNOWN_HOMEWORK_STATUS.format(
+            status=raw_status))
+    return Homework(
+        item.get('id'), item['homework_name'], status,
+        item.get('date_updated'))
+
+
+def validate_response(response):
+    """Проверяет ответ API и все работы в нем за один проход.
+    Объединяет check_response и parse_status: ошибки и их тексты те же,
+    но словари обходятся один раз, а дальше передаются компактные записи.
+    Args:
+        response (dict): ответ API;
+    Returns:
+        tuple: список Homework и current_date ответа (или None).
+    """
+    if not isinstance(response, dict):
+        raise TypeError(homework.RESPONSE_TYPE_CHECK.format(
+            response_type=type(response)))
+    if 'homeworks' not in response:
+        raise KeyError(homework.NO_HOMEWORK_IN_RESPONSE)
+    items = response['homeworks']
+    if not isinstance(items, list):
+        raise TypeError(homework.RESPONSE_HOMEWORKS_TYPE_CHECK.format(
+            homework_type=type(items)))
+    records = [validate_homework(item) for item in items]
+    logging.debug(log_config.lazy(RESPONSE_VALIDATED, count=len(records)))
+    return records, response.get('current_date')